@@ -0,0 +1,48 @@
+"""Estado de aprovação das mortes de um regear (✅ aprovada, ❌ negada).
+
+O ledger guarda uma Approval por mensagem, atualizada pelos eventos de
+reação (com quem reagiu e quando) e pelos comandos /aprovar e /negar, que
+alteram várias mortes de uma vez sem reagir mensagem por mensagem. O
+relatório só consulta esse índice.
+"""
+
+import datetime
+
+APPROVED = "V"
+DENIED = "X"
+PENDING = "-"
+
+EMOJI_STATUS = {"✅": APPROVED, "❌": DENIED}
+
+
+class Approval:
+    __slots__ = ("status", "user_id", "user_name", "at")
+
+    def __init__(self, status, user_id=None, user_name=None, at=None):
+        self.status = status
+        # Sem user_id: estado lido das reações do histórico, sem saber quem reagiu
+        self.user_id = user_id
+        self.user_name = user_name
+        self.at = at
+
+    def to_json(self):
+        return [self.status, self.user_id, self.user_name, self.at.isoformat() if self.at else None]
+
+    @classmethod
+    def from_json(cls, data):
+        status, user_id, user_name, at = data
+        return cls(status, user_id, user_name, datetime.datetime.fromisoformat(at) if at else None)
+
+
+def status_from_reactions(reactions):
+    """Estado pela primeira reação de ✅ ou ❌ (na ordem em que apareceram)."""
+    for emoji in reactions:
+        status = EMOJI_STATUS.get(emoji)
+        if status is not None:
+            return status
+    return PENDING
+
+
+def approval_from_reactions(reactions):
+    status = status_from_reactions(reactions)
+    return Approval(status) if status != PENDING else None
@@ -0,0 +1,165 @@
+"""Arquivo local das prints de regear, endereçado pelo conteúdo.
+
+Os links do CDN do Discord expiram, então cada print é baixada assim que a
+morte chega (gateway ou histórico), com downloads em paralelo limitados por
+um semáforo, pela sessão aiohttp compartilhada. O arquivo é guardado como
+objects/<sha256>.<ext>; a mesma imagem postada de novo reaproveita o objeto
+por hardlink em by_message/<ID da mensagem>.<ext>. O índice (mensagem ->
+objeto) é um JSON por linha, só acrescentado.
+
+O relatório usa o link estável do arquivo (servido em /arquivo/<nome> pelo
+servidor HTTP do bot) no lugar do link do CDN.
+"""
+
+import asyncio
+import hashlib
+import json
+import os
+import shutil
+import tempfile
+from urllib.parse import urlparse
+
+from http_client import get_session
+
+ARCHIVE_DIR = os.environ.get("ARCHIVE_DIR", "archive")
+# Downloads simultâneos
+MAX_CONCURRENT_DOWNLOADS = 4
+# Maior anexo baixado, em bytes (limite de upload do Discord com boost máximo)
+MAX_ATTACHMENT_SIZE = 100 * 1024 * 1024
+EXTENSIONS = (".png", ".jpg", ".jpeg", ".webp", ".gif")
+
+
+def attachment_extension(url):
+    extension = os.path.splitext(urlparse(url).path)[1].lower()
+    return extension if extension in EXTENSIONS else ".bin"
+
+
+class AttachmentArchive:
+    def __init__(self, directory=ARCHIVE_DIR, public_url=None, concurrency=MAX_CONCURRENT_DOWNLOADS, on_archived=None):
+        self.directory = directory
+        # Corrotina chamada com (message_id, channel_id, nome do objeto) depois de cada print nova
+        self.on_archived = on_archived
+        # URL do servidor HTTP do bot; sem ela, o relatório traz o caminho local
+        self.public_url = public_url.rstrip("/") if public_url else None
+        self.downloaded = 0
+        self.duplicates = 0
+        self.failed = 0
+        self._semaphore = asyncio.Semaphore(concurrency)
+        self._index = None
+        self._inflight = {}
+
+    @property
+    def objects_dir(self):
+        return os.path.join(self.directory, "objects")
+
+    @property
+    def messages_dir(self):
+        return os.path.join(self.directory, "by_message")
+
+    def _load_index(self):
+        if self._index is not None:
+            return self._index
+        self._index = {}
+        try:
+            with open(os.path.join(self.directory, "index.jsonl"), encoding="utf-8") as f:
+                for line in f:
+                    try:
+                        record = json.loads(line)
+                    except ValueError:
+                        continue  # Linha incompleta de um crash no meio da escrita
+                    self._index[record["m"]] = record["o"]
+        except FileNotFoundError:
+            pass
+        return self._index
+
+    def object_name(self, message_id):
+        """Nome do objeto (<sha256>.<ext>) da print da mensagem, ou None se ainda não foi arquivada."""
+        return self._load_index().get(message_id)
+
+    def object_path(self, name):
+        return os.path.join(self.objects_dir, name)
+
+    def link_for(self, message_id):
+        name = self.object_name(message_id)
+        if name is None:
+            return None
+        if self.public_url:
+            return f"{self.public_url}/arquivo/{name}"
+        return os.path.join(self.messages_dir, str(message_id) + os.path.splitext(name)[1])
+
+    def links_for(self, entries):
+        """message_id -> link estável das mortes já arquivadas."""
+        links = {}
+        for entry in entries:
+            link = self.link_for(entry.message_id)
+            if link is not None:
+                links[entry.message_id] = link
+        return links
+
+    def prefetch(self, message_id, url, channel_id=None):
+        """Agenda o download da print, se ainda não foi arquivada nem está baixando."""
+        if message_id in self._inflight or self.object_name(message_id) is not None:
+            return self._inflight.get(message_id)
+        task = self._inflight[message_id] = asyncio.create_task(self._fetch(message_id, url, channel_id))
+        task.add_done_callback(lambda _: self._inflight.pop(message_id, None))
+        return task
+
+    async def wait(self, message_ids, timeout):
+        """Espera (até `timeout` segundos) os downloads em andamento dessas mensagens."""
+        tasks = [self._inflight[message_id] for message_id in message_ids if message_id in self._inflight]
+        if tasks:
+            await asyncio.wait(tasks, timeout=timeout)
+
+    def pending_count(self):
+        return len(self._inflight)
+
+    async def _fetch(self, message_id, url, channel_id):
+        try:
+            async with self._semaphore:
+                async with get_session().get(url) as response:
+                    response.raise_for_status()
+                    if (response.content_length or 0) > MAX_ATTACHMENT_SIZE:
+                        raise ValueError(f"anexo grande demais ({response.content_length} bytes)")
+                    data = await response.read()
+            # Hash e escrita em disco fora do event loop
+            name = await asyncio.to_thread(self._store, message_id, data, attachment_extension(url))
+        except Exception as e:
+            self.failed += 1
+            print(f"[ERRO] Não foi possível arquivar a print da mensagem {message_id}: {e}")
+            return
+        if self.on_archived is not None:
+            await self.on_archived(message_id, channel_id, name)
+
+    def _store(self, message_id, data, extension):
+        name = hashlib.sha256(data).hexdigest() + extension
+        object_path = self.object_path(name)
+        if os.path.exists(object_path):
+            self.duplicates += 1
+        else:
+            os.makedirs(self.objects_dir, exist_ok=True)
+            # Temporário único: a mesma print pode estar sendo gravada por outra mensagem ao mesmo tempo
+            fd, tmp_path = tempfile.mkstemp(dir=self.objects_dir, suffix=".tmp")
+            try:
+                with os.fdopen(fd, "wb") as f:
+                    f.write(data)
+                # Se a outra gravação terminou antes, o conteúdo é o mesmo e o replace não muda nada
+                os.replace(tmp_path, object_path)
+            except BaseException:
+                os.unlink(tmp_path)
+                raise
+            self.downloaded += 1
+
+        os.makedirs(self.messages_dir, exist_ok=True)
+        message_path = os.path.join(self.messages_dir, str(message_id) + extension)
+        if not os.path.exists(message_path):
+            try:
+                os.link(object_path, message_path)
+            except FileExistsError:
+                pass  # Outra gravação da mesma mensagem chegou primeiro
+            except OSError:
+                shutil.copyfile(object_path, message_path)  # Sistema de arquivos sem hardlinks
+
+        with open(os.path.join(self.directory, "index.jsonl"), "a", encoding="utf-8") as f:
+            f.write(json.dumps({"m": message_id, "o": name}, separators=(",", ":")) + "\n")
+        self._load_index()[message_id] = name
+        return name
@@ -0,0 +1,113 @@
+"""Servidor local no lugar das APIs do Albion, para testar o bot sem rede.
+
+Serve a lista de membros da guilda e o feed de eventos (/events), com novas
+mortes geradas a cada --interval segundos. Metade das mortes é de membros
+da guilda. A paginação segue a da API: do evento mais recente para o mais
+antigo, com limit (até 51) e offset.
+
+Também responde à API de preços do Albion Online Data Project, com um
+preço fixo (derivado do ID) por item e cidade.
+
+Uso:
+    python -m benchmarks.albion_stub --port 8090 --players 50
+    ALBION_API_BASE=http://localhost:8090/api/gameinfo \
+    PRICES_API_BASE=http://localhost:8090/api/v2/stats/prices python main.py
+"""
+
+import argparse
+import asyncio
+import datetime
+import random
+import zlib
+
+from aiohttp import web
+
+GUILD_ID = "B5-Vz8JfSjiTd-mS2fJ3BQ"
+OTHER_GUILD_ID = "outra-guilda"
+CITIES = ("Martlock", "Lymhurst", "Bridgewatch", "Fort Sterling", "Thetford", "Caerleon")
+
+
+class StubGuild:
+    def __init__(self, players, seed=None):
+        self.random = random.Random(seed)
+        self.members = [f"Jogador{i}" for i in range(1, players + 1)]
+        self.events = []  # Do mais antigo para o mais recente
+        self.next_event_id = 1_000_000_000
+
+    def add_event(self, moment=None):
+        moment = moment or datetime.datetime.now(datetime.timezone.utc)
+        guild_death = self.random.random() < 0.5
+        victim = self.random.choice(self.members) if guild_death else f"Inimigo{self.random.randint(1, 500)}"
+        killer = f"Inimigo{self.random.randint(1, 500)}" if guild_death else self.random.choice(self.members)
+        self.next_event_id += self.random.randint(1, 50)
+        self.events.append({
+            "EventId": self.next_event_id,
+            # Mesmo formato da API: 7 casas decimais e sufixo Z
+            "TimeStamp": moment.strftime("%Y-%m-%dT%H:%M:%S.%f") + "0Z",
+            "Killer": {"Name": killer, "GuildId": OTHER_GUILD_ID if guild_death else GUILD_ID},
+            "Victim": {"Name": victim, "GuildId": GUILD_ID if guild_death else OTHER_GUILD_ID},
+        })
+
+    def page(self, limit, offset):
+        newest_first = self.events[::-1]
+        return newest_first[offset:offset + limit]
+
+
+def make_app(guild, interval):
+    async def members(request):
+        return web.json_response([{"Name": name} for name in guild.members])
+
+    async def events(request):
+        try:
+            limit = min(int(request.query.get("limit", 51)), 51)
+            offset = int(request.query.get("offset", 0))
+        except ValueError:
+            raise web.HTTPBadRequest()
+        if offset > 1000:
+            raise web.HTTPBadRequest(text="offset acima do limite da API")
+        return web.json_response(guild.page(limit, offset))
+
+    async def prices(request):
+        item_ids = request.match_info["items"].split(",")
+        rows = []
+        for item_id in item_ids:
+            base = 10_000 + zlib.crc32(item_id.encode()) % 500_000
+            for index, city in enumerate(CITIES):
+                rows.append({"item_id": item_id, "city": city, "quality": 1, "sell_price_min": base + index * 1_000})
+        return web.json_response(rows)
+
+    async def generate(app):
+        async def loop():
+            while True:
+                await asyncio.sleep(interval)
+                guild.add_event()
+        task = asyncio.create_task(loop())
+        yield
+        task.cancel()
+
+    app = web.Application()
+    app.router.add_get("/api/gameinfo/guilds/{guild_id}/members", members)
+    app.router.add_get("/api/gameinfo/events", events)
+    app.router.add_get("/api/v2/stats/prices/{items}.json", prices)
+    app.cleanup_ctx.append(generate)
+    return app
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--port", type=int, default=8090)
+    parser.add_argument("--players", type=int, default=50, help="Membros da guilda")
+    parser.add_argument("--history", type=int, default=300, help="Eventos gerados antes de subir o servidor")
+    parser.add_argument("--interval", type=float, default=5.0, help="Segundos entre eventos novos")
+    parser.add_argument("--seed", type=int, default=None)
+    args = parser.parse_args()
+
+    guild = StubGuild(args.players, seed=args.seed)
+    now = datetime.datetime.now(datetime.timezone.utc)
+    for i in range(args.history, 0, -1):
+        guild.add_event(now - datetime.timedelta(minutes=i))
+    web.run_app(make_app(guild, args.interval), port=args.port)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,157 @@
+"""Benchmark offline do caminho do relatório (histórico -> ledger -> relatório -> arquivos).
+
+Uso:
+    python -m benchmarks.bench_report --messages 1500 5000 --output bench_report.json
+    python -m benchmarks.bench_report --compare bench_antigo.json
+
+Os resultados (vazão, pico de memória e tempo por etapa) vão para um JSON,
+que pode ser comparado com o de outra versão via --compare.
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import platform
+import subprocess
+import tempfile
+import time
+import tracemalloc
+
+from benchmarks.fakes import FakeChannel, generate_messages
+from catalog import CatalogService
+from ledger import RegearLedger
+from matcher import BuildMatcher
+from report import build_report, close_files, report_sources, write_report_files
+
+CHANNEL_ID = 1
+
+
+class StageTimer:
+    def __init__(self):
+        self.stages = {}
+
+    def measure(self, name):
+        timer = self
+
+        class _Stage:
+            def __enter__(self):
+                self.start = time.perf_counter()
+
+            def __exit__(self, *exc):
+                timer.stages[name] = timer.stages.get(name, 0.0) + time.perf_counter() - self.start
+
+        return _Stage()
+
+
+async def _sync(channel, ledger):
+    # Mesmo caminho do sync_ledger do bot, sem o lock/snapshot
+    messages = [message async for message in channel.history(limit=None)]
+    ledger.seed(messages)
+    return len(messages)
+
+
+def run_case(count, builds_path, page_latency, seed):
+    timer = StageTimer()
+    tracemalloc.start()
+
+    with timer.measure("catalog_parse"):
+        with tempfile.TemporaryDirectory() as tmp:
+            catalog = CatalogService(builds_path, cache_path=os.path.join(tmp, "builds.cache")).get()
+    with timer.measure("matcher_build"):
+        BuildMatcher(catalog.builds)
+
+    with timer.measure("generate"):
+        messages = generate_messages(count, catalog.names, seed=seed)
+    channel = FakeChannel(CHANNEL_ID, messages, page_latency=page_latency)
+
+    ledger = RegearLedger(CHANNEL_ID)
+    with timer.measure("history_sync"):
+        asyncio.run(_sync(channel, ledger))
+
+    with timer.measure("build_report"):
+        entries = sorted(ledger.entries.values(), key=lambda entry: entry.message_id)
+        report_data, purchase_data = build_report(entries, catalog, ledger.approvals)
+
+    sizes = {}
+    for compression in ("none", "zip"):
+        with timer.measure(f"write_files_{compression}"):
+            files = write_report_files(report_sources(report_data, purchase_data), compression)
+        for filename, fileobj in files:
+            sizes[filename] = fileobj.seek(0, os.SEEK_END)
+        close_files(files)
+
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    report_path = sum(timer.stages[name] for name in ("history_sync", "build_report", "write_files_none"))
+    return {
+        "messages": count,
+        "rows": len(report_data),
+        "pages": channel.pages_fetched,
+        "stages_s": {name: round(value, 6) for name, value in timer.stages.items()},
+        "report_path_s": round(report_path, 6),
+        "messages_per_s": round(count / report_path, 1) if report_path else None,
+        "peak_memory_kb": round(peak / 1024, 1),
+        "file_sizes": sizes,
+    }
+
+
+def _git_revision():
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, check=True,
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def compare(current, previous):
+    old_cases = {case["messages"]: case for case in previous["cases"]}
+    for case in current["cases"]:
+        old = old_cases.get(case["messages"])
+        if old is None:
+            continue
+        print(f"\n{case['messages']} mensagens (atual vs {previous.get('revision') or 'anterior'}):")
+        for name, value in case["stages_s"].items():
+            before = old["stages_s"].get(name)
+            if before:
+                print(f"  {name:<20} {value * 1000:9.2f} ms  ({(value - before) / before * 100:+6.1f}%)")
+        before_mem = old["peak_memory_kb"]
+        print(f"  {'peak_memory_kb':<20} {case['peak_memory_kb']:9.1f}     "
+              f"({(case['peak_memory_kb'] - before_mem) / before_mem * 100:+6.1f}%)")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--messages", type=int, nargs="+", default=[100, 1500, 10000])
+    parser.add_argument("--builds", default="builds.xml")
+    parser.add_argument("--page-latency", type=float, default=0.0, help="Atraso simulado por página da API, em segundos")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--output", default="bench_report.json")
+    parser.add_argument("--compare", help="JSON de uma execução anterior para comparar")
+    args = parser.parse_args()
+
+    results = {
+        "revision": _git_revision(),
+        "python": platform.python_version(),
+        "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "cases": [],
+    }
+    for count in args.messages:
+        case = run_case(count, args.builds, args.page_latency, args.seed)
+        results["cases"].append(case)
+        print(f"{count:>7} mensagens: {case['report_path_s'] * 1000:9.1f} ms, "
+              f"{case['messages_per_s']} msg/s, pico {case['peak_memory_kb']} KB")
+
+    with open(args.output, "w", encoding="utf-8") as f:
+        json.dump(results, f, indent=2)
+    print(f"Resultados gravados em {args.output}")
+
+    if args.compare:
+        with open(args.compare, encoding="utf-8") as f:
+            compare(results, json.load(f))
+
+
+if __name__ == "__main__":
+    main()
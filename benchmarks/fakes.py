@@ -0,0 +1,130 @@
+"""Canal e mensagens falsos para rodar o caminho do relatório sem conexão com o Discord."""
+
+import asyncio
+import datetime
+import random
+import unicodedata
+
+from ledger import DISCORD_EPOCH
+
+CHAT_LINES = ["gg", "alguém tem print?", "vou repostar", "valeu!", "qual build era?", "ok"]
+
+
+class FakeAuthor:
+    def __init__(self, display_name, bot=False):
+        self.display_name = display_name
+        self.bot = bot
+
+
+class FakeAttachment:
+    def __init__(self, url):
+        self.url = url
+
+
+class FakeReaction:
+    def __init__(self, emoji, count):
+        self.emoji = emoji
+        self.count = count
+
+
+class FakeMessage:
+    def __init__(self, message_id, created_at, author, content, attachments=(), reactions=()):
+        self.id = message_id
+        self.created_at = created_at
+        self.author = author
+        self.content = content
+        self.attachments = list(attachments)
+        self.reactions = list(reactions)
+
+
+class FakeChannel:
+    """Canal com histórico paginado como a API (100 mensagens por página)."""
+
+    def __init__(self, channel_id, messages, page_latency=0.0):
+        self.id = channel_id
+        self.name = f"regear-{channel_id}"
+        self.messages = sorted(messages, key=lambda message: message.id)
+        self.page_latency = page_latency
+        self.pages_fetched = 0
+
+    async def history(self, limit=None, after=None, oldest_first=None):
+        after_id = getattr(after, "id", after) or 0
+        count = 0
+        for message in self.messages:
+            if message.id <= after_id:
+                continue
+            if count % 100 == 0:
+                self.pages_fetched += 1
+                if self.page_latency:
+                    await asyncio.sleep(self.page_latency)
+            yield message
+            count += 1
+            if limit is not None and count >= limit:
+                return
+
+
+def make_snowflake(moment, sequence):
+    milliseconds = int(moment.timestamp() * 1000) - DISCORD_EPOCH
+    return (milliseconds << 22) | (sequence & 0x3FFFFF)
+
+
+def _strip_accents(text):
+    return "".join(ch for ch in unicodedata.normalize("NFKD", text) if not unicodedata.combining(ch))
+
+
+def _typo(text, rng):
+    if len(text) < 4:
+        return text
+    i = rng.randrange(1, len(text) - 1)
+    return text[:i] + text[i + 1:]
+
+
+def build_text(names, rng):
+    """Texto de build como os jogadores escrevem: variações de caixa, acento, tag Core e erros."""
+    text = rng.choice(names)
+    roll = rng.random()
+    if roll < 0.15:
+        text += " Core"
+    elif roll < 0.25:
+        text = _strip_accents(text)
+    elif roll < 0.32:
+        text = _typo(text, rng)
+    elif roll < 0.36:
+        text = text.replace(" ", "  ")
+    elif roll < 0.38:
+        text = "build desconhecida"
+    return text.upper() if rng.random() < 0.1 else text
+
+
+def generate_messages(count, names, seed=0, start=None, players=200):
+    """Gera `count` mensagens de um tópico de regear: mortes com print, conversa e posts de bot."""
+    rng = random.Random(seed)
+    start = start or datetime.datetime(2025, 1, 1, 23, tzinfo=datetime.timezone.utc)
+    nicks = [f"Jogador{i:03d}" for i in range(players)]
+    bot_author = FakeAuthor("Regear Bot", bot=True)
+    messages = []
+    moment = start
+    for sequence in range(count):
+        moment += datetime.timedelta(seconds=rng.randint(1, 20))
+        message_id = make_snowflake(moment, sequence)
+        roll = rng.random()
+        if roll < 0.08:
+            messages.append(FakeMessage(message_id, moment, FakeAuthor(rng.choice(nicks)), rng.choice(CHAT_LINES)))
+            continue
+        if roll < 0.10:
+            messages.append(FakeMessage(message_id, moment, bot_author, "Lembrete: 1 print por mensagem"))
+            continue
+        attachments = [FakeAttachment(f"https://cdn.discordapp.com/attachments/1/{message_id}/{n}.png")
+                       for n in range(2 if rng.random() < 0.05 else 1)]
+        reactions = []
+        status = rng.random()
+        if status < 0.6:
+            reactions.append(FakeReaction('✅', 1))
+        elif status < 0.7:
+            reactions.append(FakeReaction('❌', 1))
+        if rng.random() < 0.05:
+            reactions.append(FakeReaction('🔥', rng.randint(1, 30)))
+        messages.append(FakeMessage(
+            message_id, moment, FakeAuthor(rng.choice(nicks)), build_text(names, rng), attachments, reactions,
+        ))
+    return messages
@@ -0,0 +1,203 @@
+"""Reprodução offline de uma gravação feita com RECORD_EVENTS (recorder.py).
+
+Os eventos são aplicados, na ordem gravada, aos ledgers e ao caminho do
+relatório, que é o mesmo código chamado pelos handlers do bot. O histórico
+pedido pelos relatórios é servido por um canal local montado a partir das
+páginas gravadas, no lugar da API do Discord.
+
+Uso:
+    python -m benchmarks.replay gravacao.jsonl.gz
+    python -m benchmarks.replay gravacao.jsonl.gz --realtime 10 --profile replay.prof
+"""
+
+import argparse
+import asyncio
+import cProfile
+import datetime
+import gzip
+import json
+import time
+import zlib
+from collections import defaultdict
+
+from benchmarks.fakes import FakeAttachment, FakeAuthor, FakeChannel, FakeMessage, FakeReaction
+from catalog import CatalogService
+from ledger import RegearLedger
+from report import build_report, close_files, report_sources, write_report_files
+
+
+def load_events(path):
+    events = []
+    try:
+        with gzip.open(path, "rt", encoding="utf-8") as f:
+            for line in f:
+                try:
+                    events.append(json.loads(line))
+                except ValueError:
+                    break  # Última linha incompleta
+    except (EOFError, zlib.error):
+        pass  # Gravação interrompida sem fechar o gzip: usa o que foi lido
+    return events
+
+
+def deserialize_message(data):
+    return FakeMessage(
+        data["id"],
+        datetime.datetime.fromisoformat(data["at"]),
+        FakeAuthor(data["a"], bot=data.get("bot", False)),
+        data["t"],
+        [FakeAttachment(url) for url in data["f"]],
+        [FakeReaction(emoji, count) for emoji, count in data["r"]],
+    )
+
+
+def build_stand_in_channels(events):
+    """Canais locais com todas as mensagens que a API entregou (histórico) ou o gateway enviou."""
+    messages = defaultdict(dict)
+    for event in events:
+        if event["k"] == "history":
+            for data in event["m"]:
+                messages[event["c"]][data["id"]] = data
+        elif event["k"] == "message":
+            messages[event["m"]["c"]].setdefault(event["m"]["id"], event["m"])
+    return {
+        channel_id: FakeChannel(channel_id, [deserialize_message(data) for data in by_id.values()])
+        for channel_id, by_id in messages.items()
+    }
+
+
+class Replayer:
+    def __init__(self, events, catalog, realtime=0.0):
+        self.events = events
+        self.catalog = catalog
+        self.realtime = realtime
+        self.channels = build_stand_in_channels(events)
+        self.ledgers = {}
+        self.event_times = defaultdict(float)
+        self.event_counts = defaultdict(int)
+        self.reports = []
+
+    def _ledger(self, channel_id, seeded=False):
+        ledger = self.ledgers.get(channel_id)
+        if ledger is None:
+            ledger = self.ledgers[channel_id] = RegearLedger(channel_id, seeded=seeded)
+        return ledger
+
+    async def run(self):
+        started = time.monotonic()
+        for event in self.events:
+            if self.realtime:
+                # Mantém o espaçamento original, acelerado `realtime` vezes
+                delay = event["dt"] / self.realtime - (time.monotonic() - started)
+                if delay > 0:
+                    await asyncio.sleep(delay)
+            kind = event["k"]
+            start = time.perf_counter()
+            await self.apply(event)
+            self.event_times[kind] += time.perf_counter() - start
+            self.event_counts[kind] += 1
+
+    async def apply(self, event):
+        kind = event["k"]
+        if kind == "ready":
+            for ledger in self.ledgers.values():
+                ledger.mark_stale()
+        elif kind == "thread":
+            self._ledger(event["c"], seeded=True)
+        elif kind == "message":
+            self._ledger(event["m"]["c"]).add_message(deserialize_message(event["m"]))
+        elif kind == "edit":
+            self._ledger(event["c"]).update_message(event["id"], event["d"], lambda user_id: event.get("n"))
+        elif kind == "delete":
+            ledger = self._ledger(event["c"])
+            for message_id in event["ids"]:
+                ledger.remove_message(message_id)
+            channel = self.channels.get(event["c"])
+            if channel is not None:
+                # Senão um rescan depois de um "ready" traria a morte apagada de volta
+                deleted = set(event["ids"])
+                channel.messages = [message for message in channel.messages if message.id not in deleted]
+        elif kind == "reaction_add":
+            self._ledger(event["c"]).add_reaction(event["id"], event["e"], event.get("u"), event.get("n"))
+        elif kind == "reaction_remove":
+            self._ledger(event["c"]).remove_reaction(event["id"], event["e"], event.get("u"))
+        elif kind == "reaction_clear":
+            self._ledger(event["c"]).clear_reactions(event["id"], event["e"])
+        elif kind == "review":
+            self._ledger(event["c"]).review(event["ids"], event["s"], event["u"], event["n"])
+        elif kind == "report":
+            await self.report(event["c"], datetime.datetime.fromisoformat(event["at"]))
+        # "history" só alimenta os canais locais
+
+    async def report(self, channel_id, created_at):
+        stages = {}
+        ledger = self._ledger(channel_id)
+        channel = self.channels.get(channel_id) or FakeChannel(channel_id, [])
+        pages_before = channel.pages_fetched
+
+        start = time.perf_counter()
+        if not ledger.seeded:
+            # Mesmo caminho do sync_ledger: checkpoint, ou a janela do rescan depois de um "ready"
+            rescan, after_id = ledger.begin_sync()
+            messages = [message async for message in channel.history(limit=None, after=after_id)]
+            ledger.finish_sync(messages, rescan, after_id)
+        stages["history_sync"] = time.perf_counter() - start
+
+        start = time.perf_counter()
+        report_data, purchase_data = build_report(ledger.entries_before(created_at), self.catalog, ledger.approvals)
+        stages["build_report"] = time.perf_counter() - start
+
+        start = time.perf_counter()
+        files = write_report_files(report_sources(report_data, purchase_data), "auto")
+        close_files(files)
+        stages["write_files"] = time.perf_counter() - start
+
+        self.reports.append({
+            "channel_id": channel_id,
+            "rows": len(report_data),
+            "pages": channel.pages_fetched - pages_before,
+            "stages_s": {name: round(value, 6) for name, value in stages.items()},
+        })
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("recording")
+    parser.add_argument("--builds", default="builds.xml")
+    parser.add_argument("--realtime", type=float, default=0.0,
+                        help="Reproduz com o espaçamento original acelerado N vezes (0 = velocidade máxima)")
+    parser.add_argument("--profile", help="Grava um perfil cProfile da reprodução neste arquivo")
+    parser.add_argument("--output", help="Grava o resumo em JSON neste arquivo")
+    args = parser.parse_args()
+
+    events = load_events(args.recording)
+    replayer = Replayer(events, CatalogService(args.builds).get(), realtime=args.realtime)
+
+    profiler = cProfile.Profile() if args.profile else None
+    start = time.perf_counter()
+    if profiler:
+        profiler.enable()
+    asyncio.run(replayer.run())
+    if profiler:
+        profiler.disable()
+        profiler.dump_stats(args.profile)
+    elapsed = time.perf_counter() - start
+
+    summary = {
+        "events": len(events),
+        "elapsed_s": round(elapsed, 6),
+        "events_per_s": round(len(events) / elapsed, 1) if elapsed else None,
+        "by_kind": {
+            kind: {"count": replayer.event_counts[kind], "total_s": round(replayer.event_times[kind], 6)}
+            for kind in sorted(replayer.event_counts)
+        },
+        "reports": replayer.reports,
+    }
+    print(json.dumps(summary, indent=2))
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(summary, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
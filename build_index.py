@@ -0,0 +1,112 @@
+"""Índice ordenado dos nomes de build, para o autocomplete dos comandos.
+
+Cada nome normalizado entra no índice uma vez por palavra (o sufixo a partir
+dela), então "clap" encontra "Maça 1H Clapper". Uma consulta é um bisect
+até o primeiro sufixo com o prefixo digitado e uma varredura só pelos que
+ainda começam com ele, bem dentro do prazo de 3s do autocomplete do Discord
+mesmo com centenas de builds.
+"""
+
+import bisect
+
+from matcher import matcher_for, normalize
+
+# Limite de sugestões do autocomplete do Discord
+MAX_CHOICES = 25
+# Limite da descrição de um embed
+EMBED_DESCRIPTION_LIMIT = 4096
+
+INSTRUCTIONS_HEADER = (
+    "**Copie sua build conforme abaixo, e cole junto com a print do regear!**\n"
+    "**Se você morreu mais de uma vez, repita o processo para as demais mortes!**\n\n"
+    "**Não coloque 2 prints em 1 mensagem.**\n\n"
+    "__Se você tiver a tag \"Core\" escreva junto com a build__\n\n"
+    "Ex: **Segadeira Core**\n\n"
+)
+
+
+class BuildIndex:
+    def __init__(self, names):
+        # names: nomes originais na ordem do catálogo
+        self.names = tuple(names)
+        entries = []
+        for position, name in enumerate(self.names):
+            words = normalize(name).split()
+            for start in range(len(words)):
+                entries.append((" ".join(words[start:]), start, position))
+        entries.sort()
+        self._suffixes = [entry[0] for entry in entries]
+        self._entries = entries
+
+    def complete(self, text, limit=MAX_CHOICES):
+        """Nomes que começam com `text` (no nome todo ou numa palavra), os do início primeiro."""
+        prefix = normalize(text)
+        if not prefix:
+            return list(self.names[:limit])
+        best = {}
+        index = bisect.bisect_left(self._suffixes, prefix)
+        while index < len(self._suffixes) and self._suffixes[index].startswith(prefix):
+            _, start, position = self._entries[index]
+            rank = (start > 0, position)
+            if position not in best or rank < best[position]:
+                best[position] = rank
+            index += 1
+        ranked = sorted(best, key=best.get)
+        return [self.names[position] for position in ranked[:limit]]
+
+
+_indexes = {}
+_instructions = {}
+
+
+def index_for(catalog):
+    """Índice do catálogo atual, reconstruído só quando a versão do catálogo muda."""
+    index = _indexes.get(catalog.version)
+    if index is None:
+        _indexes.clear()
+        index = _indexes[catalog.version] = BuildIndex(catalog.names)
+    return index
+
+
+def suggest_builds(catalog, text, limit=MAX_CHOICES):
+    """Sugestões do autocomplete: por prefixo e, sem nenhum, a build mais parecida."""
+    names = index_for(catalog).complete(text, limit)
+    if not names and text.strip():
+        match = matcher_for(catalog).match(text)
+        if match.build:
+            names = [_original_name(catalog, match.build)]
+    return names
+
+
+def canonical_build(catalog, text):
+    """Nome oficial da build digitada (tolerando erros), ou None se não houver uma parecida."""
+    match = matcher_for(catalog).match(text)
+    return _original_name(catalog, match.build) if match.build else None
+
+
+def _original_name(catalog, key):
+    for name in catalog.names:
+        if name.lower() == key:
+            return name
+    return key
+
+
+def regear_instructions(catalog):
+    """Texto do embed do /criar_regear com as builds do catálogo, gerado uma vez por versão."""
+    text = _instructions.get(catalog.version)
+    if text is None:
+        _instructions.clear()
+        text = _instructions[catalog.version] = _format_instructions(catalog.names)
+    return text
+
+
+def _format_instructions(names):
+    text = INSTRUCTIONS_HEADER + "\n".join(names)
+    if len(text) <= EMBED_DESCRIPTION_LIMIT:
+        return text
+    # Muitas builds para uma por linha: lista separada por vírgula e, se ainda não couber, corta
+    text = INSTRUCTIONS_HEADER + ", ".join(names)
+    if len(text) <= EMBED_DESCRIPTION_LIMIT:
+        return text
+    suffix = "\n\n... use /morte para ver todas as builds."
+    return text[:EMBED_DESCRIPTION_LIMIT - len(suffix)].rsplit(", ", 1)[0] + suffix
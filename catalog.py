@@ -0,0 +1,144 @@
+"""Catálogo de builds (builds.xml) carregado uma vez e recarregado só quando o arquivo muda.
+
+O XML é convertido num índice imutável (nome normalizado -> itens por slot).
+Uma versão pré-compilada fica em cache (pickle) ao lado do XML, então um
+cold start só precisa ler o cache se o builds.xml não mudou.
+"""
+
+import hashlib
+import os
+import pickle
+from types import MappingProxyType
+
+SLOTS = ("Arma", "Secundaria", "Elmo", "Peito", "Bota", "Capa")
+
+# Incrementar quando o formato do cache mudar
+CACHE_FORMAT = 1
+
+
+class BuildCatalog:
+    __slots__ = ("builds", "names", "categories", "version")
+
+    def __init__(self, builds, names, categories, version):
+        # builds: nome normalizado -> {slot: item}; names: nomes originais na ordem do XML
+        self.builds = MappingProxyType({name: MappingProxyType(items) for name, items in builds.items()})
+        self.names = tuple(names)
+        self.categories = MappingProxyType(dict(categories))
+        self.version = version
+
+    def __len__(self):
+        return len(self.builds)
+
+    def __contains__(self, name):
+        return name in self.builds
+
+    def get(self, name):
+        return self.builds.get(name)
+
+    def to_cache(self):
+        return {
+            "format": CACHE_FORMAT,
+            "version": self.version,
+            "builds": {name: dict(items) for name, items in self.builds.items()},
+            "names": self.names,
+            "categories": dict(self.categories),
+        }
+
+
+def _text(element, tag):
+    child = element.find(tag)
+    if child is None or not child.text or not child.text.strip():
+        return "-"
+    return child.text.strip()
+
+
+def parse_builds(source, version):
+    # Importado só aqui: com o cache em dia, um cold start nem carrega o parser de XML
+    import xml.etree.ElementTree as ET
+
+    root = ET.fromstring(source)
+    builds = {}
+    names = []
+    categories = {}
+
+    for build in root.iter("build"):
+        category = build.get("category", "-")
+        for set_element in build.findall("set"):
+            nome_build = set_element.find("NomeBuild")
+            h2_element = set_element.find("h2")
+
+            if nome_build is None or h2_element is None or not nome_build.text:
+                continue  # Pula entradas inválidas
+
+            nome = nome_build.text.strip()
+            chave = nome.lower()  # Normaliza o nome da build
+            if chave not in builds:
+                names.append(nome)
+            builds[chave] = {slot: _text(h2_element, slot) for slot in SLOTS}
+            categories[chave] = category
+
+    return BuildCatalog(builds, names, categories, version)
+
+
+class CatalogService:
+    """Mantém o catálogo atual, recarregando quando o mtime (e o hash) do XML mudam."""
+
+    def __init__(self, path="builds.xml", cache_path=None):
+        self.path = path
+        self.cache_path = cache_path if cache_path is not None else path + ".cache"
+        self.reloads = 0
+        self._catalog = None
+        self._mtime = None
+
+    def get(self):
+        try:
+            mtime = os.stat(self.path).st_mtime_ns
+        except OSError as e:
+            if self._catalog is None:
+                raise
+            print(f"[ERRO] Não foi possível verificar {self.path}, mantendo o catálogo atual: {e}")
+            return self._catalog
+        if mtime != self._mtime:
+            self._reload(mtime)
+        return self._catalog
+
+    def _reload(self, mtime):
+        with open(self.path, "rb") as f:
+            source = f.read()
+        version = hashlib.sha256(source).hexdigest()
+        self._mtime = mtime
+        if self._catalog is not None and self._catalog.version == version:
+            return  # Só o mtime mudou (ex: checkout), o conteúdo é o mesmo
+
+        catalog = self._load_cache(version)
+        if catalog is None:
+            try:
+                catalog = parse_builds(source, version)
+            except SyntaxError as e:  # ET.ParseError
+                if self._catalog is None:
+                    raise
+                print(f"[ERRO] builds.xml inválido, mantendo o catálogo anterior: {e}")
+                return
+            self._write_cache(catalog)
+        self._catalog = catalog
+        self.reloads += 1
+        print(f"[LOG] Catálogo de builds carregado: {len(catalog)} builds (versão {version[:12]}).")
+
+    def _load_cache(self, version):
+        try:
+            with open(self.cache_path, "rb") as f:
+                data = pickle.load(f)
+        except (OSError, pickle.UnpicklingError, EOFError, AttributeError, ValueError):
+            return None
+        if not isinstance(data, dict) or data.get("format") != CACHE_FORMAT or data.get("version") != version:
+            return None
+        return BuildCatalog(data["builds"], data["names"], data["categories"], version)
+
+    def _write_cache(self, catalog):
+        tmp_path = self.cache_path + ".tmp"
+        try:
+            with open(tmp_path, "wb") as f:
+                pickle.dump(catalog.to_cache(), f, protocol=pickle.HIGHEST_PROTOCOL)
+            os.replace(tmp_path, self.cache_path)
+        except OSError as e:
+            print(f"[ERRO] Não foi possível gravar o cache do catálogo: {e}")
@@ -0,0 +1,75 @@
+"""Sincronização dos comandos slash só quando a definição deles muda.
+
+O tree.sync() é uma chamada global com limite de uso baixo. Aqui a árvore
+de comandos é serializada e um hash dela fica salvo em disco; o sync só
+acontece quando o hash muda (ou quando forçado). Por padrão os comandos são
+registrados no servidor (instantâneo e com limite próprio) e a lista global
+é esvaziada uma única vez, para não aparecerem duplicados.
+"""
+
+import hashlib
+import json
+import os
+
+GLOBAL_SCOPE = "global"
+
+
+def command_payload(tree, guild=None):
+    payload = []
+    for command in tree.get_commands(guild=guild):
+        try:
+            payload.append(command.to_dict(tree))  # discord.py >= 2.4
+        except TypeError:
+            payload.append(command.to_dict())
+    payload.sort(key=lambda data: (data.get("type", 1), data["name"]))
+    return payload
+
+
+def payload_hash(payload):
+    serialized = json.dumps(payload, sort_keys=True, separators=(",", ":"), ensure_ascii=False)
+    return hashlib.sha256(serialized.encode("utf-8")).hexdigest()
+
+
+def load_hashes(path):
+    try:
+        with open(path, encoding="utf-8") as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+
+def save_hashes(path, hashes):
+    tmp_path = path + ".tmp"
+    try:
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(hashes, f, indent=2)
+        os.replace(tmp_path, path)
+    except OSError as e:
+        print(f"[ERRO] Não foi possível salvar o hash dos comandos: {e}")
+
+
+async def _sync_scope(tree, hashes, scope, guild, force):
+    digest = payload_hash(command_payload(tree, guild=guild))
+    if not force and hashes.get(scope) == digest:
+        print(f"[LOG] Comandos ({scope}) sem alterações, sync ignorado.")
+        return False
+    synced = await tree.sync(guild=guild)
+    hashes[scope] = digest
+    print(f"[LOG] Comandos sincronizados ({scope}): {len(synced)}")
+    return True
+
+
+async def sync_commands(tree, guild=None, path="command_sync.json", force=False):
+    """Sincroniza os comandos no servidor `guild` (ou globalmente se None), só se mudaram."""
+    hashes = load_hashes(path)
+    try:
+        if guild is None:
+            await _sync_scope(tree, hashes, GLOBAL_SCOPE, None, force)
+        else:
+            tree.copy_global_to(guild=guild)
+            await _sync_scope(tree, hashes, str(guild.id), guild, force)
+            # Os comandos agora vivem no servidor: esvazia a lista global (uma vez só)
+            tree.clear_commands(guild=None)
+            await _sync_scope(tree, hashes, GLOBAL_SCOPE, None, force)
+    finally:
+        save_hashes(path, hashes)
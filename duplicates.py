@@ -0,0 +1,190 @@
+"""Detecção de prints repetidas entre mortes, por hash perceptual.
+
+Cada print arquivada recebe um dHash de 64 bits (diferença de brilho entre
+pixels vizinhos numa miniatura 9x8 em tons de cinza), que muda pouco com
+recompressão ou redimensionamento. O cálculo roda num pool de threads, uma
+vez por imagem: o hash fica guardado pelo nome do objeto do arquivo, que já
+é o sha256 do conteúdo.
+
+Os hashes ficam em disco (um JSON por linha) e, em memória, numa BK-tree
+pela distância de Hamming, então achar as prints parecidas com uma nova não
+compara com todas as outras.
+
+Uma morte apagada sai do índice (discard), para a mesma print postada de
+novo não ser apontada como repetida de uma mensagem que não existe mais.
+
+O Pillow é opcional: sem ele a detecção fica desligada. Ele só é importado
+no primeiro hash, fora da inicialização do bot.
+"""
+
+import asyncio
+import importlib.util
+import json
+import os
+from concurrent.futures import ThreadPoolExecutor
+
+DUPLICATES_PATH = os.environ.get("DUPLICATES_PATH", "phash.jsonl")
+# Distância de Hamming máxima para considerar duas prints a mesma
+MAX_DISTANCE = 6
+# Threads calculando hashes
+HASH_WORKERS = 2
+
+
+def dhash(path, size=8):
+    """dHash de 64 bits da imagem em `path`."""
+    from PIL import Image
+
+    with Image.open(path) as image:
+        image = image.convert("L").resize((size + 1, size), Image.LANCZOS)
+        pixels = list(image.getdata())
+    value = 0
+    for row in range(size):
+        for col in range(size):
+            left = pixels[row * (size + 1) + col]
+            right = pixels[row * (size + 1) + col + 1]
+            value = (value << 1) | (left > right)
+    return value
+
+
+def hamming(a, b):
+    return bin(a ^ b).count("1")
+
+
+class BKTree:
+    """Árvore BK de hashes: cada filho fica na aresta da sua distância até o pai."""
+
+    def __init__(self):
+        self._root = None
+        self.size = 0
+
+    def add(self, value, item):
+        self.size += 1
+        if self._root is None:
+            self._root = [value, [item], {}]
+            return
+        node = self._root
+        while True:
+            distance = hamming(value, node[0])
+            if distance == 0:
+                node[1].append(item)
+                return
+            child = node[2].get(distance)
+            if child is None:
+                node[2][distance] = [value, [item], {}]
+                return
+            node = child
+
+    def search(self, value, max_distance):
+        """[(distância, item)] a no máximo `max_distance` de `value`."""
+        found = []
+        stack = [self._root] if self._root is not None else []
+        while stack:
+            node = stack.pop()
+            distance = hamming(value, node[0])
+            if distance <= max_distance:
+                found.extend((distance, item) for item in node[1])
+            # Desigualdade triangular: só os filhos nessa faixa podem estar perto
+            for edge, child in node[2].items():
+                if distance - max_distance <= edge <= distance + max_distance:
+                    stack.append(child)
+        return found
+
+
+class DuplicateIndex:
+    def __init__(self, path=DUPLICATES_PATH, max_distance=MAX_DISTANCE, workers=HASH_WORKERS):
+        self.path = path
+        self.max_distance = max_distance
+        self.hashed = 0
+        self.failed = 0
+        self._workers = workers
+        self._executor = None
+        self._loaded = False
+        # nome do objeto -> hash; message_id -> (channel_id, hash)
+        self._hashes = {}
+        self._claims = {}
+        self._tree = BKTree()
+
+    @property
+    def available(self):
+        # find_spec só procura o pacote, sem importar o Pillow
+        return importlib.util.find_spec("PIL") is not None
+
+    def _load(self):
+        if self._loaded:
+            return
+        self._loaded = True
+        try:
+            with open(self.path, encoding="utf-8") as f:
+                for line in f:
+                    try:
+                        record = json.loads(line)
+                    except ValueError:
+                        continue  # Linha incompleta de um crash no meio da escrita
+                    if record.get("d"):
+                        self._claims.pop(record["m"], None)
+                    else:
+                        self._insert(record["m"], record["c"], record["o"], record["h"])
+        except FileNotFoundError:
+            pass
+
+    def _append(self, record):
+        try:
+            with open(self.path, "a", encoding="utf-8") as f:
+                f.write(json.dumps(record, separators=(",", ":")) + "\n")
+        except OSError as e:
+            print(f"[ERRO] Não foi possível gravar o índice de prints: {e}")
+
+    def _insert(self, message_id, channel_id, name, value):
+        if message_id in self._claims:
+            return
+        self._hashes[name] = value
+        self._claims[message_id] = (channel_id, value)
+        self._tree.add(value, message_id)
+
+    async def add(self, message_id, channel_id, name, path):
+        """Indexa a print arquivada de uma morte, calculando o hash só se a imagem for nova."""
+        if not self.available:
+            return
+        self._load()
+        if message_id in self._claims:
+            return
+        value = self._hashes.get(name)
+        if value is None:
+            if self._executor is None:
+                self._executor = ThreadPoolExecutor(max_workers=self._workers, thread_name_prefix="phash")
+            try:
+                value = await asyncio.get_running_loop().run_in_executor(self._executor, dhash, path)
+            except Exception as e:
+                self.failed += 1
+                print(f"[ERRO] Não foi possível calcular o hash da print {name}: {e}")
+                return
+            self.hashed += 1
+        self._insert(message_id, channel_id, name, value)
+        self._append({"m": message_id, "c": channel_id, "o": name, "h": value})
+
+    def discard(self, message_id):
+        """Tira a print de uma morte apagada do índice."""
+        self._load()
+        # O nó da BK-tree continua lá; duplicates_of ignora mensagens sem claim
+        if self._claims.pop(message_id, None) is not None:
+            self._append({"m": message_id, "d": 1})
+
+    def duplicates_of(self, message_id):
+        """[(channel_id, message_id, distância)] das outras mortes com print parecida, da mais antiga."""
+        self._load()
+        claim = self._claims.get(message_id)
+        if claim is None:
+            return []
+        matches = []
+        for distance, other_id in self._tree.search(claim[1], self.max_distance):
+            if other_id != message_id and other_id in self._claims:
+                matches.append((self._claims[other_id][0], other_id, distance))
+        matches.sort(key=lambda match: match[1])
+        return matches
+
+    def size(self):
+        return len(self._claims)
+
+    def close(self):
+        if self._executor is not None:
+            self._executor.shutdown(wait=False)
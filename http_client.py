@@ -0,0 +1,26 @@
+"""Sessão aiohttp compartilhada pelos clientes HTTP do bot (API do Albion, downloads)."""
+
+import aiohttp
+
+# Timeout padrão das chamadas externas, em segundos
+DEFAULT_TIMEOUT = 15
+
+_session = None
+
+
+def get_session():
+    """Retorna a sessão compartilhada, criando-a no primeiro uso (precisa de um event loop rodando)."""
+    global _session
+    if _session is None or _session.closed:
+        _session = aiohttp.ClientSession(
+            timeout=aiohttp.ClientTimeout(total=DEFAULT_TIMEOUT),
+            connector=aiohttp.TCPConnector(limit=20, ttl_dns_cache=300),
+        )
+    return _session
+
+
+async def close_session():
+    global _session
+    if _session is not None and not _session.closed:
+        await _session.close()
+    _session = None
@@ -0,0 +1,107 @@
+"""Registro dos relatórios gerados em segundo plano.
+
+Cada canal pode ter no máximo um job em andamento. Os jobs concluídos ficam
+guardados (até HISTORY_SIZE) para consulta.
+"""
+
+import asyncio
+import itertools
+import time
+from collections import deque
+
+from metrics import REPORT_JOB_SECONDS
+
+# Quantos jobs concluídos ficam guardados para consulta
+HISTORY_SIZE = 20
+# Intervalo mínimo entre edições da mensagem de progresso, em segundos
+PROGRESS_INTERVAL = 2.0
+
+RUNNING = "em andamento"
+DONE = "concluído"
+FAILED = "falhou"
+
+
+class ReportJob:
+    def __init__(self, job_id, channel_id, channel_name, requested_by):
+        self.job_id = job_id
+        self.channel_id = channel_id
+        self.channel_name = channel_name
+        self.requested_by = requested_by
+        self.status = RUNNING
+        self.stage = "iniciando"
+        self.pages = 0
+        self.messages = 0
+        self.error = None
+        # Link da mensagem com os arquivos, quando o job termina com sucesso
+        self.result_url = None
+        self.started_at = time.time()
+        self.finished_at = None
+        self.task = None
+        self._last_progress = 0.0
+
+    def elapsed(self):
+        end = self.finished_at if self.finished_at is not None else time.time()
+        return end - self.started_at
+
+    def should_report(self):
+        """True se já passou tempo suficiente desde a última atualização de progresso."""
+        now = time.monotonic()
+        if now - self._last_progress < PROGRESS_INTERVAL:
+            return False
+        self._last_progress = now
+        return True
+
+    def describe(self):
+        text = f"#{self.job_id} {self.channel_name}: {self.status} ({self.stage})"
+        if self.pages:
+            text += f", {self.pages} páginas / {self.messages} mensagens"
+        text += f", {self.elapsed():.0f}s, pedido por {self.requested_by}"
+        if self.error:
+            text += f" - erro: {self.error}"
+        return text
+
+
+class JobRegistry:
+    def __init__(self, history_size=HISTORY_SIZE):
+        self._ids = itertools.count(1)
+        self._running = {}
+        self._finished = deque(maxlen=history_size)
+
+    def running_for(self, channel_id):
+        return self._running.get(channel_id)
+
+    def reserve(self, channel_id, channel_name, requested_by):
+        """Registra um job para o canal, ou retorna None se já houver um em andamento."""
+        if channel_id in self._running:
+            return None
+        job = ReportJob(next(self._ids), channel_id, channel_name, requested_by)
+        self._running[channel_id] = job
+        return job
+
+    def run(self, job, coro):
+        job.task = asyncio.create_task(self._run(job, coro))
+        return job.task
+
+    async def _run(self, job, coro):
+        try:
+            await coro
+        except Exception as e:
+            print(f"[ERRO] Job de relatório #{job.job_id} falhou: {e}")
+            self.finish(job, error=e)
+            return
+        self.finish(job)
+
+    def finish(self, job, error=None):
+        if self._running.get(job.channel_id) is job:
+            del self._running[job.channel_id]
+        job.status = FAILED if error is not None else DONE
+        job.error = str(error) if error is not None else None
+        job.finished_at = time.time()
+        REPORT_JOB_SECONDS.observe(job.elapsed(), job.status)
+        self._finished.appendleft(job)
+
+    def active(self):
+        return list(self._running.values())
+
+    def recent(self):
+        return list(self._finished)
@@ -0,0 +1,195 @@
+"""Mortes dos membros da guilda, lidas do feed de eventos da API do Albion.
+
+O poller pagina o feed (/events?guildId=..., do mais recente para o mais
+antigo) só até chegar ao cursor salvo (o maior EventId já visto) e ignora
+eventos repetidos pelo EventId, já que as páginas andam enquanto novos
+eventos chegam. Só as mortes de membros da guilda são guardadas, por até
+RETENTION_DAYS.
+
+Cada jogador tem uma lista de horários de morte ordenada, então confirmar a
+morte de uma print é um bisect na janela em volta do horário da mensagem.
+O estado (cursor + mortes) fica em disco, em kill_events.json.
+"""
+
+import bisect
+import datetime
+import json
+import os
+import time
+
+from http_client import get_session
+from metrics import ALBION_API_ERRORS, ALBION_API_SECONDS
+
+KILL_EVENTS_PATH = os.environ.get("KILL_EVENTS_PATH", "kill_events.json")
+# Maior página aceita pela API e maior offset que ela responde
+PAGE_SIZE = 51
+MAX_OFFSET = 1000
+# Mortes mais antigas que isso são descartadas
+RETENTION_DAYS = 14
+# Janela em volta do horário da mensagem: a print vem depois da morte (com folga para relógios)
+MATCH_BEFORE = datetime.timedelta(hours=3)
+MATCH_AFTER = datetime.timedelta(minutes=10)
+
+KILLBOARD_URL = "https://albiononline.com/killboard/kill/{}"
+
+
+def parse_timestamp(value):
+    """'2024-05-01T21:03:12.1234567Z' -> datetime em UTC (a API manda até 7 casas decimais)."""
+    value = value.rstrip("Z")
+    if "." in value:
+        seconds, fraction = value.split(".", 1)
+        value = f"{seconds}.{fraction[:6]}"
+    return datetime.datetime.fromisoformat(value).replace(tzinfo=datetime.timezone.utc)
+
+
+class PlayerDeaths:
+    __slots__ = ("times", "event_ids")
+
+    def __init__(self):
+        # Ordenadas pelo horário; event_ids[i] é o evento de times[i]
+        self.times = []
+        self.event_ids = []
+
+    def add(self, moment, event_id):
+        index = bisect.bisect(self.times, moment)
+        self.times.insert(index, moment)
+        self.event_ids.insert(index, event_id)
+
+    def between(self, start, end):
+        """Índices das mortes entre start e end."""
+        return range(bisect.bisect_left(self.times, start), bisect.bisect_right(self.times, end))
+
+
+class KillFeed:
+    def __init__(self, api_base, guild_id, path=KILL_EVENTS_PATH, retention_days=RETENTION_DAYS):
+        self.url = f"{api_base.rstrip('/')}/events"
+        self.guild_id = guild_id
+        self.path = path
+        self.retention = datetime.timedelta(days=retention_days)
+        self.cursor = None
+        self.polls = 0
+        self.events_seen = 0
+        self.last_poll = None
+        self._deaths = {}
+        self._events = {}
+        self._loaded = False
+
+    def __len__(self):
+        return len(self._events)
+
+    def _load(self):
+        if self._loaded:
+            return
+        self._loaded = True
+        try:
+            with open(self.path, encoding="utf-8") as f:
+                data = json.load(f)
+        except FileNotFoundError:
+            return
+        except ValueError as e:
+            print(f"[ERRO] {self.path} corrompido, recomeçando o feed de mortes: {e}")
+            return
+        self.cursor = data.get("cursor")
+        for event_id, name, moment in data.get("deaths", ()):
+            self._add(event_id, name, datetime.datetime.fromisoformat(moment))
+
+    def _add(self, event_id, name, moment):
+        if event_id in self._events:
+            return False
+        self._events[event_id] = (name, moment)
+        self._deaths.setdefault(name.casefold(), PlayerDeaths()).add(moment, event_id)
+        return True
+
+    def snapshot(self):
+        return {
+            "cursor": self.cursor,
+            "deaths": [[event_id, name, moment.isoformat()] for event_id, (name, moment) in self._events.items()],
+        }
+
+    def save(self):
+        """Grava o estado de forma atômica. Pode rodar fora do event loop."""
+        tmp_path = self.path + ".tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(self.snapshot(), f, ensure_ascii=False, separators=(",", ":"))
+        os.replace(tmp_path, self.path)
+
+    async def _fetch_page(self, offset):
+        start = time.monotonic()
+        params = {"guildId": self.guild_id, "limit": PAGE_SIZE, "offset": offset}
+        try:
+            async with get_session().get(self.url, params=params) as response:
+                response.raise_for_status()
+                return await response.json(content_type=None)
+        except Exception:
+            ALBION_API_ERRORS.inc(1, "events")
+            raise
+        finally:
+            ALBION_API_SECONDS.observe(time.monotonic() - start, "events")
+
+    async def poll(self):
+        """Busca os eventos novos desde o cursor. Retorna quantas mortes da guilda foram adicionadas."""
+        self._load()
+        added = 0
+        newest = self.cursor
+        offset = 0
+        while offset <= MAX_OFFSET:
+            page = await self._fetch_page(offset)
+            if not page:
+                break
+            reached_cursor = False
+            for event in page:
+                event_id = event["EventId"]
+                if self.cursor is not None and event_id <= self.cursor:
+                    reached_cursor = True
+                    continue
+                self.events_seen += 1
+                newest = event_id if newest is None else max(newest, event_id)
+                victim = event.get("Victim") or {}
+                if victim.get("GuildId") == self.guild_id and victim.get("Name"):
+                    added += self._add(event_id, victim["Name"], parse_timestamp(event["TimeStamp"]))
+            if reached_cursor or len(page) < PAGE_SIZE:
+                break
+            offset += PAGE_SIZE
+        self.cursor = newest
+        self.polls += 1
+        self.last_poll = time.time()
+        self._prune()
+        return added
+
+    def _prune(self):
+        cutoff = datetime.datetime.now(datetime.timezone.utc) - self.retention
+        expired = [event_id for event_id, (_, moment) in self._events.items() if moment < cutoff]
+        if not expired:
+            return
+        for event_id in expired:
+            del self._events[event_id]
+        for key in list(self._deaths):
+            deaths = self._deaths[key]
+            keep = [(moment, event_id) for moment, event_id in zip(deaths.times, deaths.event_ids) if moment >= cutoff]
+            if not keep:
+                del self._deaths[key]
+            elif len(keep) != len(deaths.times):
+                deaths.times = [moment for moment, _ in keep]
+                deaths.event_ids = [event_id for _, event_id in keep]
+
+    def match(self, entries):
+        """message_id -> EventId da morte que confirma cada print, cada evento usado uma vez só."""
+        self._load()
+        used = set()
+        matches = {}
+        for entry in sorted(entries, key=lambda entry: entry.message_id):
+            deaths = self._deaths.get(entry.nick.casefold())
+            if deaths is None:
+                continue
+            best = None
+            for index in deaths.between(entry.created_at - MATCH_BEFORE, entry.created_at + MATCH_AFTER):
+                event_id = deaths.event_ids[index]
+                if event_id in used:
+                    continue
+                gap = abs((entry.created_at - deaths.times[index]).total_seconds())
+                if best is None or gap < best[0]:
+                    best = (gap, event_id)
+            if best is not None:
+                used.add(best[1])
+                matches[entry.message_id] = best[1]
+        return matches
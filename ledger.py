@@ -0,0 +1,451 @@
+"""Ledger de regear por tópico, mantido ao vivo pelos eventos do gateway.
+
+Cada tópico de regear tem um RegearLedger com as mortes postadas (mensagens
+com texto + print). Os eventos de mensagem e reação atualizam o ledger na
+hora, então fechar o regear só lê o que já está montado em vez de baixar
+todo o histórico do canal.
+
+O ledger também é salvo em disco (um JSON por tópico) junto com o ID da
+última mensagem processada. Um ledger carregado do disco, ou que estava em
+memória numa reconexão sem RESUME, fica `stale`: edições, remoções e
+reações feitas enquanto o bot estava fora não aparecem num `history(after=...)`.
+O primeiro sync continua partindo do checkpoint, mas começa RESCAN_WINDOW
+antes dele e reconcilia as mortes dessa janela (rescan); mudanças offline em
+mortes mais antigas que a janela só são vistas com LEDGER_RESCAN_HOURS=0, que
+relê o tópico inteiro. As aprovações e as decisões de /aprovar e /negar
+salvas no snapshot são mantidas, a menos que as reações tenham mudado.
+"""
+
+import asyncio
+import datetime
+import json
+import os
+
+from approvals import EMOJI_STATUS, Approval, approval_from_reactions, status_from_reactions
+
+# Época dos snowflakes do Discord (2015-01-01), em milissegundos
+DISCORD_EPOCH = 1420070400000
+
+# Diretório dos snapshots em disco
+LEDGER_DIR = os.environ.get("LEDGER_DIR", "ledgers")
+# Quanto do histórico antes do checkpoint um ledger stale relê (0 relê o tópico inteiro)
+RESCAN_WINDOW = datetime.timedelta(hours=float(os.environ.get("LEDGER_RESCAN_HOURS", 48)))
+
+
+class LedgerEntry:
+    __slots__ = ("message_id", "created_at", "nick", "content", "link", "reactions")
+
+    def __init__(self, message_id, created_at, nick, content, link, reactions=None):
+        self.message_id = message_id
+        self.created_at = created_at
+        self.nick = nick
+        self.content = content
+        self.link = link
+        # Mapeia emoji -> quantidade, na ordem em que as reações apareceram
+        self.reactions = reactions if reactions is not None else {}
+
+    def to_json(self):
+        return [self.message_id, self.created_at.isoformat(), self.nick, self.content, self.link, self.reactions]
+
+    @classmethod
+    def from_json(cls, data):
+        message_id, created_at, nick, content, link, reactions = data
+        return cls(message_id, datetime.datetime.fromisoformat(created_at), nick, content, link, reactions)
+
+
+def _now():
+    return datetime.datetime.now(datetime.timezone.utc)
+
+
+def snowflake_time(snowflake_id):
+    timestamp = ((snowflake_id >> 22) + DISCORD_EPOCH) / 1000
+    return datetime.datetime.fromtimestamp(timestamp, tz=datetime.timezone.utc)
+
+
+def time_snowflake(moment):
+    """Menor snowflake possível no instante `moment` (para usar como `after`)."""
+    return max(int(moment.timestamp() * 1000) - DISCORD_EPOCH, 0) << 22
+
+
+def message_nick(message):
+    """Nick de quem postou a morte: no /morte a mensagem é do bot, em nome de quem usou o comando."""
+    if message.author.bot:
+        # interaction_metadata no discord.py 2.4+, interaction nas versões anteriores
+        interaction = getattr(message, "interaction_metadata", None) or getattr(message, "interaction", None)
+        if interaction is not None:
+            # O user da interação não traz o apelido do servidor (o nick do Albion, definido no /register)
+            member = message.guild.get_member(interaction.user.id) if message.guild else None
+            return (member or interaction.user).display_name
+    return message.author.display_name
+
+
+def entry_from_message(message):
+    """Cria uma LedgerEntry a partir de uma mensagem, ou None se não for uma morte."""
+    if not message.content or not message.attachments:
+        return None
+    reactions = {}
+    for reaction in message.reactions:
+        reactions[str(reaction.emoji)] = reaction.count
+    return LedgerEntry(
+        message_id=message.id,
+        created_at=message.created_at,
+        nick=message_nick(message),
+        content=message.content.strip().lower(),
+        link=message.attachments[0].url,
+        reactions=reactions,
+    )
+
+
+class RegearLedger:
+    def __init__(self, channel_id, seeded=False):
+        self.channel_id = channel_id
+        # seeded indica se o ledger está em dia com o histórico nesta execução do bot
+        self.seeded = seeded
+        # stale: o estado veio do disco ou de antes de uma reconexão e precisa de um rescan completo
+        self.stale = False
+        self.entries = {}
+        # Checkpoint: ID da última mensagem do histórico já processada
+        self.last_message_id = None
+        self.dirty = False
+        # Evita que dois relatórios busquem o histórico do mesmo tópico ao mesmo tempo
+        self.sync_lock = asyncio.Lock()
+        # Reações de mensagens que ainda não são mortes (ex: sem print ainda)
+        self._pending_reactions = {}
+        # message_id -> Approval; a versão muda a cada alteração de aprovação
+        self.approvals = {}
+        self.approvals_version = 0
+        # message_id -> Approval das decisões de /aprovar e /negar, que valem quando as reações saem
+        self.reviews = {}
+        # Mensagens alteradas por eventos ao vivo durante um rescan (o histórico delas pode estar velho)
+        self._touched = None
+        # Muda a cada morte adicionada, editada ou removida
+        self.entries_version = 0
+        # As versões só valem nesta instância do ledger (não vão para o snapshot)
+        self.epoch = os.urandom(8).hex()
+
+    def add_message(self, message):
+        # A mensagem inicial do tópico tem o mesmo ID do tópico e nunca entra no relatório
+        if message.id == self.channel_id:
+            return
+        self._touch(message.id)
+        self.dirty = True
+        self.entries_version += 1
+        if self.seeded:
+            # Só avança o checkpoint quando não há buraco entre o histórico e os eventos ao vivo
+            self._advance(message.id)
+        entry = entry_from_message(message)
+        if entry is None:
+            self.entries.pop(message.id, None)
+            return
+        pending = self._pending_reactions.pop(message.id, None)
+        if pending and not entry.reactions:
+            entry.reactions = pending
+        self.entries[message.id] = entry
+        if message.id not in self.approvals:
+            # Reações que chegaram com a mensagem (histórico), sem eventos de quem reagiu
+            self._set_approval(message.id, approval_from_reactions(entry.reactions))
+
+    def update_message(self, message_id, data, member_nick=None):
+        """Aplica um payload parcial de edição (RawMessageUpdateEvent.data).
+
+        member_nick(user_id) devolve o apelido no servidor de quem usou o /morte, se conhecido.
+        """
+        self._touch(message_id)
+        self.dirty = True
+        self.entries_version += 1
+        entry = self.entries.get(message_id)
+        content = data.get("content")
+        attachments = data.get("attachments")
+        if entry is None:
+            # A edição pode transformar uma mensagem comum em uma morte
+            if not content or not attachments or "author" not in data:
+                return
+            invoker = (data.get("interaction_metadata") or {}).get("user")
+            author = invoker or data["author"]
+            # Numa resposta do /morte o "member" é o próprio bot
+            member = {} if invoker else data.get("member") or {}
+            nick = member.get("nick")
+            if invoker and member_nick is not None:
+                nick = member_nick(int(invoker["id"]))
+            nick = nick or author.get("global_name") or author.get("username")
+            self.entries[message_id] = LedgerEntry(
+                message_id=message_id,
+                created_at=snowflake_time(message_id),
+                nick=nick,
+                content=content.strip().lower(),
+                link=attachments[0]["url"],
+                reactions=self._pending_reactions.pop(message_id, {}),
+            )
+            return
+        if content is not None:
+            if not content.strip():
+                self.remove_message(message_id)
+                return
+            entry.content = content.strip().lower()
+        if attachments is not None:
+            if not attachments:
+                self.remove_message(message_id)
+                return
+            entry.link = attachments[0]["url"]
+
+    def remove_message(self, message_id):
+        self._touch(message_id)
+        self.dirty = True
+        self.entries_version += 1
+        self.entries.pop(message_id, None)
+        self._pending_reactions.pop(message_id, None)
+        self.reviews.pop(message_id, None)
+        self._set_approval(message_id, None)
+
+    def add_reaction(self, message_id, emoji, user_id=None, user_name=None, at=None):
+        target = self._reactions_for(message_id)
+        target[emoji] = target.get(emoji, 0) + 1
+        status = EMOJI_STATUS.get(emoji)
+        if status is not None:
+            # A última decisão vale, com quem reagiu e quando
+            self._set_approval(message_id, Approval(status, user_id, user_name, at or _now()))
+
+    def remove_reaction(self, message_id, emoji, user_id=None):
+        target = self._reactions_for(message_id)
+        count = target.get(emoji, 0) - 1
+        if count > 0:
+            target[emoji] = count
+        else:
+            target.pop(emoji, None)
+        approval = self.approvals.get(message_id)
+        if approval is None or EMOJI_STATUS.get(emoji) != approval.status:
+            return
+        if count <= 0:
+            self._set_approval(message_id, self._approval_without_event(message_id, target))
+        elif user_id is not None and user_id == approval.user_id:
+            # A reação de quem aprovou saiu, mas a de outra pessoa continua
+            self._set_approval(message_id, Approval(approval.status))
+
+    def clear_reactions(self, message_id, emoji=None):
+        target = self._reactions_for(message_id)
+        if emoji is None:
+            target.clear()
+        else:
+            target.pop(emoji, None)
+        approval = self.approvals.get(message_id)
+        if approval is not None and (emoji is None or EMOJI_STATUS.get(emoji) == approval.status):
+            self._set_approval(message_id, self._approval_without_event(message_id, target))
+
+    def review(self, message_ids, status, user_id, user_name, at=None):
+        """Aprova ou nega várias mortes de uma vez. Retorna quantas mudaram de estado."""
+        at = at or _now()
+        changed = 0
+        for message_id in message_ids:
+            if message_id not in self.entries:
+                continue
+            current = self.approvals.get(message_id)
+            if current is None or current.status != status:
+                changed += 1
+            approval = Approval(status, user_id, user_name, at)
+            self.reviews[message_id] = approval
+            self._set_approval(message_id, approval)
+        return changed
+
+    def _approval_without_event(self, message_id, reactions):
+        """Estado quando a reação que decidia saiu: o das reações restantes ou, sem elas, o de /aprovar e /negar."""
+        return approval_from_reactions(reactions) or self.reviews.get(message_id)
+
+    def _set_approval(self, message_id, approval):
+        if approval is None:
+            if self.approvals.pop(message_id, None) is None:
+                return
+        else:
+            self.approvals[message_id] = approval
+        self.approvals_version += 1
+        self.dirty = True
+
+    def _reactions_for(self, message_id):
+        self._touch(message_id)
+        self.dirty = True
+        entry = self.entries.get(message_id)
+        if entry is not None:
+            return entry.reactions
+        return self._pending_reactions.setdefault(message_id, {})
+
+    def _touch(self, message_id):
+        if self._touched is not None:
+            self._touched.add(message_id)
+
+    def _advance(self, message_id):
+        if self.last_message_id is None or message_id > self.last_message_id:
+            self.last_message_id = message_id
+
+    def seed(self, messages):
+        """Incorpora o histórico desde o checkpoint. Mensagens já vistas ao vivo são reaproveitadas."""
+        for message in messages:
+            self._advance(message.id)
+            if message.id not in self.entries:
+                self.add_message(message)
+        self.seeded = True
+        self.dirty = True
+
+    def history_start(self):
+        """ID depois do qual o próximo sync lê o histórico, ou None para ler o tópico inteiro.
+
+        Em dia, o ledger só precisa do que veio depois do checkpoint. Stale, ele
+        relê também a janela RESCAN_WINDOW antes do checkpoint.
+        """
+        if self.last_message_id is None:
+            return None
+        if not self.stale:
+            return self.last_message_id
+        if not RESCAN_WINDOW:
+            return None
+        return time_snowflake(snowflake_time(self.last_message_id) - RESCAN_WINDOW)
+
+    def mark_stale(self):
+        """O ledger pode ter perdido eventos: o próximo sync faz um rescan."""
+        self.seeded = False
+        self.stale = True
+
+    def begin_rescan(self):
+        self._touched = set()
+
+    def begin_sync(self):
+        """Começa um sync com o histórico. Retorna (rescan, after_id) para o history() e o finish_sync."""
+        rescan = self.stale
+        if rescan:
+            self.begin_rescan()
+        return rescan, self.history_start()
+
+    def finish_sync(self, messages, rescan, after_id):
+        if rescan:
+            self.rescan(messages, after_id)
+        else:
+            self.seed(messages)
+
+    def rescan(self, messages, after=None):
+        """Reconcilia as mortes com o histórico do tópico depois do ID `after` (None: o tópico inteiro).
+
+        Mortes apagadas somem, textos e prints editados são atualizados e,
+        se as reações mudaram, a aprovação é recalculada. Mortes anteriores a
+        `after` e mensagens alteradas ao vivo desde o begin_rescan ficam como estão.
+        """
+        touched = self._touched or set()
+        self._touched = None
+        seen = set()
+        for message in messages:
+            self._advance(message.id)
+            if message.id == self.channel_id or message.id in touched:
+                continue
+            entry = entry_from_message(message)
+            if entry is None:
+                if message.id in self.entries:
+                    self.remove_message(message.id)
+                continue
+            seen.add(message.id)
+            old = self.entries.get(message.id)
+            self.entries[message.id] = entry
+            if old is None:
+                if message.id not in self.approvals:
+                    self._set_approval(message.id, approval_from_reactions(entry.reactions))
+            elif status_from_reactions(old.reactions) != status_from_reactions(entry.reactions):
+                # As reações mudaram com o bot fora: valem mais que o estado salvo
+                self._set_approval(message.id, self._approval_without_event(message.id, entry.reactions))
+        for message_id in [message_id for message_id in self.entries if message_id not in seen]:
+            if message_id not in touched and (after is None or message_id > after):
+                self.remove_message(message_id)
+        self.entries_version += 1
+        self.stale = False
+        self.seeded = True
+        self.dirty = True
+
+    def to_snapshot(self):
+        return {
+            "channel_id": self.channel_id,
+            "last_message_id": self.last_message_id,
+            "entries": [entry.to_json() for entry in self.entries.values()],
+            "approvals": [[message_id] + approval.to_json() for message_id, approval in self.approvals.items()],
+            "reviews": [[message_id] + approval.to_json() for message_id, approval in self.reviews.items()],
+        }
+
+    @classmethod
+    def from_snapshot(cls, data):
+        # Um ledger carregado do disco não viu o que mudou enquanto o bot estava fora
+        ledger = cls(data["channel_id"], seeded=False)
+        ledger.stale = True
+        ledger.last_message_id = data["last_message_id"]
+        for raw_entry in data["entries"]:
+            entry = LedgerEntry.from_json(raw_entry)
+            ledger.entries[entry.message_id] = entry
+        if "approvals" in data:
+            for message_id, *raw_approval in data["approvals"]:
+                ledger.approvals[message_id] = Approval.from_json(raw_approval)
+        else:
+            # Snapshot anterior ao índice de aprovações: parte das reações salvas
+            for entry in ledger.entries.values():
+                approval = approval_from_reactions(entry.reactions)
+                if approval is not None:
+                    ledger.approvals[entry.message_id] = approval
+        for message_id, *raw_approval in data.get("reviews", ()):
+            ledger.reviews[message_id] = Approval.from_json(raw_approval)
+        return ledger
+
+    def entries_before(self, moment):
+        """Mortes registradas antes de `moment`, da mais antiga para a mais recente."""
+        entries = [entry for entry in self.entries.values() if entry.created_at < moment]
+        entries.sort(key=lambda entry: entry.message_id)
+        return entries
+
+
+# Ledgers ativos, indexados pelo ID do tópico
+ledgers = {}
+
+
+def get_ledger(channel_id):
+    return ledgers.get(channel_id)
+
+
+def snapshot_path(channel_id):
+    return os.path.join(LEDGER_DIR, f"{channel_id}.json")
+
+
+def load_ledger(channel_id):
+    try:
+        with open(snapshot_path(channel_id), encoding="utf-8") as f:
+            return RegearLedger.from_snapshot(json.load(f))
+    except FileNotFoundError:
+        return None
+    except (ValueError, KeyError, TypeError) as e:
+        print(f"[ERRO] Snapshot do ledger {channel_id} corrompido, ignorando: {e}")
+        return None
+
+
+def write_snapshot(channel_id, snapshot):
+    """Grava o snapshot de forma atômica. Pode rodar fora do event loop."""
+    os.makedirs(LEDGER_DIR, exist_ok=True)
+    path = snapshot_path(channel_id)
+    tmp_path = path + ".tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump(snapshot, f, ensure_ascii=False, separators=(",", ":"))
+    os.replace(tmp_path, path)
+
+
+def ensure_ledger(channel_id, seeded=False):
+    ledger = ledgers.get(channel_id)
+    if ledger is None:
+        ledger = load_ledger(channel_id)
+        if ledger is None:
+            ledger = RegearLedger(channel_id, seeded=seeded)
+        ledgers[channel_id] = ledger
+    return ledger
+
+
+def mark_all_stale():
+    for ledger in ledgers.values():
+        ledger.mark_stale()
+
+
+def take_dirty_snapshots():
+    """Retorna (channel_id, snapshot) dos ledgers alterados desde o último salvamento."""
+    snapshots = []
+    for ledger in ledgers.values():
+        if ledger.dirty:
+            ledger.dirty = False
+            snapshots.append((ledger.channel_id, ledger.to_snapshot()))
+    return snapshots
@@ -0,0 +1,171 @@
+"""Monitor do atraso do event loop e profiler sob demanda.
+
+Uma tarefa no loop marca um "batimento" a cada INTERVAL segundos e mede o
+atraso em relação ao esperado. Uma thread separada confere os batimentos:
+se o loop ficar parado por mais de STALL_THRESHOLD, ela registra a pilha do
+código que está bloqueando o loop (que não conseguiria se reportar sozinho).
+
+O Profiler liga o cProfile, ou uma amostragem de pilhas feita pela thread,
+por N segundos e devolve o arquivo gerado.
+"""
+
+import asyncio
+import cProfile
+import io
+import marshal
+import sys
+import threading
+import time
+import traceback
+from collections import Counter
+
+from metrics import registry
+
+# Intervalo entre batimentos do loop, em segundos
+INTERVAL = 0.25
+# Tempo parado a partir do qual a pilha do loop é registrada, em segundos
+STALL_THRESHOLD = 1.0
+# Intervalo entre amostras do profiler por amostragem, em segundos
+SAMPLE_INTERVAL = 0.005
+# Limite de duração de um perfil, em segundos
+MAX_PROFILE_SECONDS = 120
+
+LOOP_LAG = registry.histogram(
+    "regear_event_loop_lag_seconds", "Atraso do event loop em relação ao agendado",
+    buckets=(0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5))
+LOOP_STALLS = registry.counter("regear_event_loop_stalls_total", "Vezes em que o event loop ficou parado")
+
+
+class LoopWatchdog:
+    def __init__(self, interval=INTERVAL, threshold=STALL_THRESHOLD):
+        self.interval = interval
+        self.threshold = threshold
+        self.max_lag = 0.0
+        self.last_lag = 0.0
+        self.stalls = 0
+        self.last_stall = None
+        self.loop_thread_id = None
+        self._heartbeat = time.monotonic()
+        self._task = None
+        self._thread = None
+        self._stop = threading.Event()
+
+    def start(self):
+        if self._task is not None:
+            return
+        self.loop_thread_id = threading.get_ident()
+        self._heartbeat = time.monotonic()
+        self._task = asyncio.get_running_loop().create_task(self._beat())
+        self._thread = threading.Thread(target=self._watch, name="loop-watchdog", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        if self._task is not None:
+            self._task.cancel()
+            self._task = None
+
+    async def _beat(self):
+        while True:
+            expected = time.monotonic() + self.interval
+            await asyncio.sleep(self.interval)
+            now = time.monotonic()
+            lag = max(0.0, now - expected)
+            self.last_lag = lag
+            self.max_lag = max(self.max_lag, lag)
+            LOOP_LAG.observe(lag)
+            self._heartbeat = now
+
+    def _watch(self):
+        reported = False
+        while not self._stop.wait(self.interval):
+            stalled = time.monotonic() - self._heartbeat
+            if stalled <= self.threshold:
+                reported = False
+                continue
+            if reported:
+                continue  # Uma pilha por travamento
+            reported = True
+            frame = sys._current_frames().get(self.loop_thread_id)
+            stack = "".join(traceback.format_stack(frame)) if frame is not None else "(pilha indisponível)"
+            self.stalls += 1
+            LOOP_STALLS.inc()
+            self.last_stall = {"at": time.time(), "stalled_s": round(stalled, 3), "stack": stack}
+            print(f"[ERRO] Event loop parado há {stalled:.1f}s. Pilha do código bloqueando o loop:\n{stack}")
+
+    def stats(self):
+        return {
+            "last_lag_s": round(self.last_lag, 4),
+            "max_lag_s": round(self.max_lag, 4),
+            "stalls": self.stalls,
+            "last_stall": self.last_stall,
+        }
+
+
+class ProfilerBusy(Exception):
+    pass
+
+
+class Profiler:
+    """Gera um perfil do event loop por alguns segundos (um de cada vez)."""
+
+    MODES = ("cprofile", "sample")
+
+    def __init__(self, watchdog):
+        self.watchdog = watchdog
+        self._lock = asyncio.Lock()
+
+    async def run(self, seconds, mode="cprofile"):
+        """Retorna (nome do arquivo, conteúdo em bytes)."""
+        if mode not in self.MODES:
+            raise ValueError(f"Modo de profiler desconhecido: {mode}")
+        if self._lock.locked():
+            raise ProfilerBusy("Já existe um perfil em andamento")
+        seconds = max(1, min(seconds, MAX_PROFILE_SECONDS))
+        async with self._lock:
+            if mode == "cprofile":
+                return await self._run_cprofile(seconds)
+            return await self._run_sampler(seconds)
+
+    async def _run_cprofile(self, seconds):
+        # O cProfile mede a thread onde foi ligado: aqui, a do event loop
+        profile = cProfile.Profile()
+        profile.enable()
+        try:
+            await asyncio.sleep(seconds)
+        finally:
+            profile.disable()
+        profile.create_stats()
+        # Mesmo formato do dump_stats (abre com pstats/snakeviz)
+        return "perfil.prof", marshal.dumps(profile.stats)
+
+    async def _run_sampler(self, seconds):
+        thread_id = self.watchdog.loop_thread_id or threading.get_ident()
+        samples = Counter()
+        stop = threading.Event()
+
+        def sample():
+            while not stop.wait(SAMPLE_INTERVAL):
+                frame = sys._current_frames().get(thread_id)
+                if frame is None:
+                    continue
+                stack = []
+                while frame is not None:
+                    code = frame.f_code
+                    stack.append(f"{code.co_name} ({code.co_filename}:{frame.f_lineno})")
+                    frame = frame.f_back
+                samples[";".join(reversed(stack))] += 1
+
+        thread = threading.Thread(target=sample, name="loop-sampler", daemon=True)
+        thread.start()
+        try:
+            await asyncio.sleep(seconds)
+        finally:
+            stop.set()
+            await asyncio.to_thread(thread.join)
+
+        # Formato "pilhas dobradas" (flamegraph.pl / speedscope)
+        output = io.StringIO()
+        for stack, count in samples.most_common():
+            output.write(f"{stack} {count}\n")
+        return "perfil.folded", output.getvalue().encode("utf-8")
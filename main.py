@@ -1,22 +1,78 @@
+import startup  # Primeiro import: mede o tempo gasto com os demais
 import discord
 from discord.ext import commands, tasks
 from discord import app_commands
+import asyncio
 import datetime
-import os
-import xml.etree.ElementTree as ET
 import io
+import os
+import re
+import signal
+import sqlite3
 from aiohttp import web
-import requests
+from archive import AttachmentArchive
+from build_index import canonical_build, regear_instructions, suggest_builds
+from catalog import CatalogService
+from command_sync import sync_commands
+from duplicates import DuplicateIndex
+from http_client import close_session
+from jobs import JobRegistry
+from kill_events import KILLBOARD_URL, KillFeed
+from matcher import matcher_stats
+from approvals import APPROVED, DENIED
+from report import (
+    BATCH_REPORT_HEADERS, COMPRESSIONS, REPORT_HEADERS, build_report, close_files, merge_reports, report_sources,
+    write_report_files,
+)
+from report_cache import CachedReport, ReportCache, report_key
+from member_ops import MemberOpQueue
+from loop_watchdog import LoopWatchdog, Profiler, ProfilerBusy
+from metrics import COMMAND_SECONDS, HISTORY_PAGES, MESSAGES_PROCESSED, hit_ratio, install_rate_limit_counter, registry
+from ledger import ensure_ledger, get_ledger, ledgers, mark_all_stale, take_dirty_snapshots, write_snapshot
+from nickstore import NickStore
+from prices import PriceClient
+from recorder import EventRecorder
+from reconcile import DiscordMember, is_suspicious, plan_roster_changes
+from roster import RosterClient
+from warehouse import Warehouse, deaths_from_report
+
+startup.mark("imports")
 
 # --- Constants ---
-REPORT_CHANNEL_ID = 1345553404432482335
-MESSAGE_CHANNEL_ID = REPORT_CHANNEL_ID
-TOPIC_CHANNEL_ID = 1343388028793651281
+# Os IDs podem ser trocados por variáveis de ambiente para rodar o mesmo bot em outro servidor
+REPORT_CHANNEL_ID = int(os.environ.get("REPORT_CHANNEL_ID", 1345553404432482335))
+MESSAGE_CHANNEL_ID = int(os.environ.get("MESSAGE_CHANNEL_ID", REPORT_CHANNEL_ID))
+TOPIC_CHANNEL_ID = int(os.environ.get("TOPIC_CHANNEL_ID", 1343388028793651281))
 PORT = int(os.environ.get("PORT", 10000))
+MAX_CONCURRENT_THREADS = 4  # Tópicos lidos em paralelo no relatório em lote
+KILL_FEED_MINUTES = float(os.environ.get("KILL_FEED_MINUTES", 2))  # 0 desativa a confirmação pelo feed de mortes
+ROSTER_SYNC_HOURS = float(os.environ.get("ROSTER_SYNC_HOURS", 0))  # 0 desativa a sincronização automática
+COMMAND_SYNC_SCOPE = os.environ.get("COMMAND_SYNC_SCOPE", "guild")  # guild ou global
+FORCE_COMMAND_SYNC = os.environ.get("FORCE_COMMAND_SYNC") == "1"
+DEBUG_TOKEN = os.environ.get("DEBUG_TOKEN")  # Libera /debug/* no servidor HTTP (desligado se vazio)
+PUBLIC_URL = os.environ.get("PUBLIC_URL") or os.environ.get("RENDER_EXTERNAL_URL")  # Endereço do servidor HTTP
+ARCHIVE_WAIT_SECONDS = 30  # Quanto o relatório espera as prints que ainda estão baixando
+ROSTER_PROGRESS_SECONDS = 30  # Intervalo entre as atualizações de progresso do /sync_roster
+# O token de uma interação vale 15 minutos; com margem, depois disso as respostas vão para o canal
+INTERACTION_TOKEN_LIFETIME = datetime.timedelta(minutes=14)
+RECORD_EVENTS = os.environ.get("RECORD_EVENTS")  # Arquivo para gravar eventos (ver benchmarks/replay.py)
+REPORT_COMPRESSION = os.environ.get("REPORT_COMPRESSION", "auto")  # auto, none, gzip ou zip
 GUILD_ID = 'B5-Vz8JfSjiTd-mS2fJ3BQ'  # ID da guilda no Albion Online
-MEMBER_ROLE_ID = 1341584969469792287  # ID do cargo de Membro no Discord
-ALBION_API_URL = f'https://gameinfo.albiononline.com/api/gameinfo/guilds/{GUILD_ID}/members'
-ID_DO_SERVIDOR_DISCORD = 1341574057761443840
+MEMBER_ROLE_ID = int(os.environ.get("MEMBER_ROLE_ID", 1341584969469792287))  # ID do cargo de Membro no Discord
+ALBION_API_BASE = os.environ.get("ALBION_API_BASE", "https://gameinfo.albiononline.com/api/gameinfo")  # Ver benchmarks/albion_stub.py
+ALBION_API_URL = f'{ALBION_API_BASE}/guilds/{GUILD_ID}/members'
+ID_DO_SERVIDOR_DISCORD = int(os.environ.get("ID_DO_SERVIDOR_DISCORD", 1341574057761443840))
+
+# Grupos de comandos que podem ser ligados por FEATURES (ex: FEATURES=regear para só o regear)
+FEATURE_COMMANDS = {
+    "regear": ("criar_relatorio", "relatorio_semana", "relatorios", "criar_regear", "morte", "aprovar", "negar",
+               "historico"),
+    "registro": ("register", "unregister", "sync_roster"),
+    "admin": ("mensagem", "profile"),
+}
+FEATURES = {
+    feature.strip() for feature in os.environ.get("FEATURES", ",".join(FEATURE_COMMANDS)).split(",") if feature.strip()
+}
 
 # --- Discord Bot Setup ---
 intents = discord.Intents.default()
@@ -25,159 +81,516 @@ intents.message_content = True
 intents.guilds = True
 intents.members = True
 
-# Dicionário para armazenar nicks registrados (mapeia ID do usuário para nick)
-registered_nicks = {}
+# Nicks registrados (ID do usuário <-> nick), persistidos em NICKS_PATH (registrados.txt por padrão)
+registered_nicks = NickStore()
 
 class MyBot(discord.Client):
     def __init__(self):
         super().__init__(intents=intents)
         self.tree = app_commands.CommandTree(self)
 
-    async def on_ready(self):
-        print(f'Bot {self.user} está online!')
+    async def setup_hook(self):
+        # Roda uma vez por processo (o on_ready repete a cada reconexão)
+        for feature, names in FEATURE_COMMANDS.items():
+            if feature not in FEATURES:
+                for name in names:
+                    self.tree.remove_command(name)
+        guild = discord.Object(id=ID_DO_SERVIDOR_DISCORD) if COMMAND_SYNC_SCOPE == "guild" else None
         try:
-            await self.tree.sync()  # Sincroniza os comandos slash
-            print("Comandos sincronizados com sucesso.")
+            await sync_commands(self.tree, guild=guild, force=FORCE_COMMAND_SYNC)
         except Exception as e:
             print(f"Erro ao sincronizar comandos: {e}")
 
 bot = MyBot()
 
-# --- Helper Functions ---
-def load_builds():
-    tree = ET.parse("builds.xml")
-    root = tree.getroot()
-    builds = {}
+# Catálogo de builds compartilhado por todos os comandos
+build_catalog = CatalogService("builds.xml")
+
+# Relatórios sendo gerados em segundo plano (no máximo um por canal)
+report_jobs = JobRegistry()
+roster_followers = set()  # Tarefas que acompanham um /sync_roster aplicado (referência para não serem coletadas)
+
+# Relatórios já gerados, indexados pelo estado do tópico e do catálogo
+report_cache = ReportCache()
+
+# Hashes perceptuais das prints, para achar a mesma print em mais de uma morte
+duplicate_index = DuplicateIndex()
 
-    for build in root.findall(".//build"):
-        for set_element in build.findall("set"):
-            nome_build = set_element.find("NomeBuild")
-            h2_element = set_element.find("h2")
+async def index_archived_print(message_id, channel_id, name):
+    await duplicate_index.add(message_id, channel_id, name, attachment_archive.object_path(name))
 
-            if nome_build is None or h2_element is None or nome_build.text is None:
-                continue  # Pula entradas inválidas
+# Cópia local das prints, baixadas assim que as mortes chegam
+attachment_archive = AttachmentArchive(public_url=PUBLIC_URL, on_archived=index_archived_print)
 
-            nome = nome_build.text.strip().lower()  # Normaliza o nome da build
+# Gravador de eventos para reprodução offline (desligado por padrão)
+recorder = EventRecorder(RECORD_EVENTS) if RECORD_EVENTS else None
 
-            itens = {
-                "Arma": h2_element.find("Arma").text.strip() if h2_element.find("Arma") is not None and h2_element.find("Arma").text else "-",
-                "Secundaria": h2_element.find("Secundaria").text.strip() if h2_element.find("Secundaria") is not None and h2_element.find("Secundaria").text else "-",
-                "Elmo": h2_element.find("Elmo").text.strip() if h2_element.find("Elmo") is not None and h2_element.find("Elmo").text else "-",
-                "Peito": h2_element.find("Peito").text.strip() if h2_element.find("Peito") is not None and h2_element.find("Peito").text else "-",
-                "Bota": h2_element.find("Bota").text.strip() if h2_element.find("Bota") is not None and h2_element.find("Bota").text else "-",
-                "Capa": h2_element.find("Capa").text.strip() if h2_element.find("Capa") is not None and h2_element.find("Capa").text else "-",
-            }
+# Monitor do event loop e profiler sob demanda
+loop_watchdog = LoopWatchdog()
+profiler = Profiler(loop_watchdog)
 
-            builds[nome] = itens  # Salva a build corretamente
+# Fila das alterações de cargo/nick/expulsão, com retry e journal em disco
+member_ops = MemberOpQueue("member_ops.log")
 
-    print("Builds carregadas:", builds)  # Depuração
-    return builds
+# Lista de membros da guilda no Albion, com cache e requisições compartilhadas
+albion_roster = RosterClient(ALBION_API_URL)
 
+# Preços dos itens das builds (só com item_ids.json), atualizados em segundo plano
+price_client = PriceClient()
+
+# Mortes dos membros da guilda no feed de eventos do Albion, para confirmar as prints
+kill_feed = KillFeed(ALBION_API_BASE, GUILD_ID)
+
+# Histórico dos regears fechados (SQLite), para as consultas de /historico e /historico/*
+warehouse = Warehouse()
+
+# --- Helper Functions ---
 def truncate(value, limit=1024):
     return value[: limit - 3] + "..." if len(value) > limit else value
 
-def format_for_spreadsheet(report_data):
-    headers = "Data;Nick;Build;Link;Emoji;Build_Registrada"
-    rows = [f'{row[0]};{row[1]};"{row[2]}";{row[3]};{row[4]};{row[5]}' for row in report_data]
-    return f"{headers}\n" + "\n".join(rows)
-
-def format_purchase_report(purchase_data):
-    headers = "Categoria;Item;Quantidade"
-    rows = []
-    for category, items in purchase_data.items():
-        for item, count in items.items():
-            rows.append(f'{category};{item};{count}')
-    return f"{headers}\n" + "\n".join(rows)
-
-async def send_long_message(channel, content, filename="relatorio.txt"):
-    max_length = 2000
-    if len(content) <= max_length:
-        await channel.send(f"```{content}```")
-    else:
-        file = io.BytesIO(content.encode('utf-8'))
-        await channel.send(file=discord.File(file, filename))
+def report_compression():
+    return REPORT_COMPRESSION if REPORT_COMPRESSION in COMPRESSIONS else "auto"
 
-def get_emoji_status(reactions):
-    for reaction in reactions:
-        if str(reaction.emoji) == '✅':
-            return 'V'
-        elif str(reaction.emoji) == '❌':
-            return 'X'
-    return '-'
+async def send_report_files(channel, report_data, purchase_data, headers=REPORT_HEADERS, cache_key=None, prices=None):
+    """Envia os arquivos do relatório; com cache_key, também os guarda no cache e retorna o CachedReport."""
+    sources = report_sources(report_data, purchase_data, headers, prices)
+    # Escreve os arquivos fora do event loop e envia tudo numa única mensagem
+    files = await asyncio.to_thread(write_report_files, sources, report_compression())
+    try:
+        message = await channel.send(files=[discord.File(fileobj, filename) for filename, fileobj in files])
+        if cache_key is None:
+            return None
+        try:
+            return await asyncio.to_thread(report_cache.store, cache_key, files, len(report_data), message.jump_url)
+        except OSError as e:
+            print(f"[ERRO] Não foi possível guardar o relatório no cache: {e}")
+            # Os arquivos já foram enviados; só não ficam disponíveis para o próximo pedido
+            return CachedReport(cache_key, len(report_data), message.jump_url, [], discord.utils.utcnow().timestamp())
+    finally:
+        close_files(files)
 
-# --- Comandos Slash ---
-@bot.tree.command(name="criar_relatorio", description="Cria um relatório de regear.")
-async def criar_relatorio(interaction: discord.Interaction):
-    messages = [message async for message in interaction.channel.history(limit=None)]  # Pega todas as mensagens do canal
-
-    # Ordena as mensagens do mais antigo para o mais recente
-    messages.reverse()  
-    
-    # Filtra apenas as mensagens enviadas antes do comando
-    messages = [msg for msg in messages if msg.created_at < interaction.created_at]
-    
-    # Pega a última mensagem antes do comando ser executado
-    last_message = messages[-1] if messages else None
-
-    if len(messages) < 2:
-        embed = discord.Embed(
-            title="Erro ao gerar relatório",
-            description="Não há mensagens suficientes para gerar o relatório.",
-            color=discord.Color.red()
-        )
-        await interaction.response.send_message(embed=embed, ephemeral=True)
+async def ensure_cached_report_posted(channel, report):
+    """Garante que a mensagem do relatório em cache ainda existe; se foi apagada, reenvia os arquivos do cache."""
+    try:
+        await channel.fetch_message(int(report.message_url.rsplit("/", 1)[-1]))
         return
+    except discord.NotFound:
+        pass
+    message = await channel.send(files=[discord.File(path, filename) for filename, path in report_cache.file_paths(report)])
+    await asyncio.to_thread(report_cache.update_message, report, message.jump_url)
 
-    builds = load_builds()
-    report_data = []
-    purchase_data = {key: {} for key in ['Arma', 'Secundaria', 'Elmo', 'Peito', 'Bota', 'Capa']}
+def nick_taken_embed():
+    return discord.Embed(
+        title="Erro no registro",
+        description="Este nick já foi registrado por outro membro. Se esse for seu nick, contate um administrador.",
+        color=discord.Color.red()
+    )
 
-    for message in messages[1:]:
-        if not message.content or not message.attachments:
-            continue
+async def send_private(interaction, embed):
+    """Resposta só para quem usou o comando depois de um defer público.
 
-        timestamp = (message.created_at - datetime.timedelta(hours=3)).strftime('%Y-%m-%d %H:%M:%S')
-        nick = message.author.display_name
-        content = message.content.strip().lower()
-        attachment_links = [att.url for att in message.attachments]
-        link = attachment_links[0] if attachment_links else "-"
-        emoji_status = get_emoji_status(message.reactions)
+    O primeiro followup substitui o "pensando..." e herda a visibilidade do defer, então ele é apagado antes.
+    """
+    try:
+        await interaction.delete_original_response()
+    except discord.HTTPException as e:
+        print(f"[ERRO] Não foi possível apagar a resposta pendente: {e}")
+    await interaction.followup.send(embed=embed, ephemeral=True)
 
-        build_registrada = "Sim" if content.lower().strip() in builds else "Não"
-        report_data.append([timestamp, nick, content, link, emoji_status, build_registrada])
+def ledger_for_channel(channel_id):
+    # Só acompanha tópicos de regear (ou canais que já tiveram relatório)
+    if "regear" not in FEATURES:
+        return None
+    ledger = get_ledger(channel_id)
+    if ledger is None:
+        channel = bot.get_channel(channel_id)
+        if channel is not None and getattr(channel, "parent_id", None) == TOPIC_CHANNEL_ID:
+            ledger = ensure_ledger(channel_id)
+    return ledger
 
-        content_normalized = content.lower().strip()  # Normaliza a build antes da busca
-        if content_normalized in builds:
-            for category, item in builds[content_normalized].items():
-                if item and item != "-":
-                    purchase_data[category][item] = purchase_data[category].get(item, 0) + 1
+def archive_entries(ledger, message_ids):
+    for message_id in message_ids:
+        entry = ledger.entries.get(message_id)
+        if entry is not None:
+            attachment_archive.prefetch(entry.message_id, entry.link, ledger.channel_id)
 
-    report_data.sort(key=lambda x: x[0])
+async def archived_links(entries):
+    """Links das prints arquivadas, esperando um pouco pelas que ainda estão baixando (e sendo indexadas)."""
+    await attachment_archive.wait([entry.message_id for entry in entries], ARCHIVE_WAIT_SECONDS)
+    return attachment_archive.links_for(entries)
 
-    if not report_data:
-        embed = discord.Embed(
-            title="Erro ao gerar relatório",
-            description="Nenhuma mensagem válida encontrada para gerar o relatório.",
-            color=discord.Color.red()
-        )
-        await interaction.response.send_message(embed=embed, ephemeral=True)
+def confirmed_deaths(entries):
+    """message_id -> link do killboard da morte que confirma a print (None com o feed desligado)."""
+    if KILL_FEED_MINUTES <= 0:
+        return None
+    return {message_id: KILLBOARD_URL.format(event_id) for message_id, event_id in kill_feed.match(entries).items()}
+
+def duplicate_claims(entries):
+    """message_id -> links das outras mortes com a mesma print (no máximo 3)."""
+    claims = {}
+    for entry in entries:
+        matches = duplicate_index.duplicates_of(entry.message_id)
+        if matches:
+            claims[entry.message_id] = " ".join(
+                f"https://discord.com/channels/{ID_DO_SERVIDOR_DISCORD}/{channel_id}/{message_id}"
+                for channel_id, message_id, _ in matches[:3]
+            )
+    return claims
+
+def guild_nick(user_id):
+    """Apelido do membro no servidor (o nick do Albion depois do /register), ou None se não estiver no cache."""
+    guild = bot.get_guild(ID_DO_SERVIDOR_DISCORD)
+    member = guild.get_member(user_id) if guild else None
+    return member.display_name if member else None
+
+async def save_ledgers():
+    # Serializa no loop (estado consistente) e grava em disco numa thread
+    for channel_id, snapshot in take_dirty_snapshots():
+        try:
+            await asyncio.to_thread(write_snapshot, channel_id, snapshot)
+        except OSError as e:
+            print(f"[ERRO] Falha ao salvar o ledger {channel_id}: {e}")
+
+@tasks.loop(seconds=60)
+async def flush_ledgers():
+    await save_ledgers()
+
+# --- Eventos do Ledger de Regear ---
+@bot.event
+async def on_thread_create(thread):
+    if "regear" in FEATURES and thread.parent_id == TOPIC_CHANNEL_ID:
+        ensure_ledger(thread.id, seeded=True)  # Tópico novo, não há histórico anterior
+        if recorder:
+            recorder.thread_created(thread.id)
+
+@bot.event
+async def on_message(message):
+    ledger = ledger_for_channel(message.channel.id)
+    if ledger:
+        ledger.add_message(message)
+        archive_entries(ledger, [message.id])
+        MESSAGES_PROCESSED.inc(1, "gateway")
+        if recorder:
+            recorder.message(message)
+
+@bot.event
+async def on_raw_message_edit(payload):
+    ledger = ledger_for_channel(payload.channel_id)
+    if ledger:
+        ledger.update_message(payload.message_id, payload.data, guild_nick)
+        archive_entries(ledger, [payload.message_id])
+        if recorder:
+            recorder.edit(payload.channel_id, payload.message_id, payload.data, guild_nick)
+
+@bot.event
+async def on_raw_message_delete(payload):
+    ledger = ledger_for_channel(payload.channel_id)
+    if ledger:
+        ledger.remove_message(payload.message_id)
+        # Uma print repostada depois de apagar a morte não é repetida
+        duplicate_index.discard(payload.message_id)
+        if recorder:
+            recorder.delete(payload.channel_id, [payload.message_id])
+
+@bot.event
+async def on_raw_bulk_message_delete(payload):
+    ledger = ledger_for_channel(payload.channel_id)
+    if ledger:
+        for message_id in payload.message_ids:
+            ledger.remove_message(message_id)
+            duplicate_index.discard(message_id)
+        if recorder:
+            recorder.delete(payload.channel_id, payload.message_ids)
+
+@bot.event
+async def on_raw_reaction_add(payload):
+    ledger = ledger_for_channel(payload.channel_id)
+    if ledger:
+        user_name = payload.member.display_name if payload.member else None
+        ledger.add_reaction(payload.message_id, str(payload.emoji), payload.user_id, user_name)
+        if recorder:
+            recorder.reaction("reaction_add", payload.channel_id, payload.message_id, str(payload.emoji),
+                              payload.user_id, user_name)
+
+@bot.event
+async def on_raw_reaction_remove(payload):
+    ledger = ledger_for_channel(payload.channel_id)
+    if ledger:
+        ledger.remove_reaction(payload.message_id, str(payload.emoji), payload.user_id)
+        if recorder:
+            recorder.reaction("reaction_remove", payload.channel_id, payload.message_id, str(payload.emoji),
+                              payload.user_id)
+
+@bot.event
+async def on_raw_reaction_clear(payload):
+    ledger = ledger_for_channel(payload.channel_id)
+    if ledger:
+        ledger.clear_reactions(payload.message_id)
+        if recorder:
+            recorder.reaction("reaction_clear", payload.channel_id, payload.message_id)
+
+@bot.event
+async def on_raw_reaction_clear_emoji(payload):
+    ledger = ledger_for_channel(payload.channel_id)
+    if ledger:
+        ledger.clear_reactions(payload.message_id, str(payload.emoji))
+        if recorder:
+            recorder.reaction("reaction_clear", payload.channel_id, payload.message_id, str(payload.emoji))
+
+async def show_job_progress(interaction, job):
+    if not job.should_report():
         return
+    try:
+        await interaction.edit_original_response(content=f"Gerando relatório... {job.describe()}")
+    except discord.HTTPException as e:
+        print(f"[ERRO] Não foi possível atualizar o progresso do relatório: {e}")
 
-    spreadsheet_format = format_for_spreadsheet(report_data)
-    purchase_report = format_purchase_report(purchase_data)
+async def report_error(interaction, description):
+    embed = discord.Embed(
+        title="Erro ao gerar relatório",
+        description=description,
+        color=discord.Color.red()
+    )
+    await interaction.edit_original_response(content=None, embed=embed)
 
-    report_channel = bot.get_channel(REPORT_CHANNEL_ID)
-    if report_channel:
-        await send_long_message(report_channel, spreadsheet_format, filename="relatorio.txt")
-        await send_long_message(report_channel, purchase_report, filename="relatorio_compra.txt")
+async def sync_ledger(channel, job=None, on_progress=None):
+    """Deixa o ledger do canal em dia, buscando só o histórico depois do checkpoint.
 
+    Um ledger stale (carregado do disco ou de antes de uma reconexão) começa um pouco antes do checkpoint para pegar
+    edições, remoções e reações recentes perdidas (ver ledger.RESCAN_WINDOW).
+    """
+    ledger = ensure_ledger(channel.id)
+    async with ledger.sync_lock:
+        if ledger.seeded:
+            return ledger
+        # Tudo na primeira vez; depois só o que chegou após o checkpoint (e a janela do rescan) e então só eventos
+        rescan, after_id = ledger.begin_sync()
+        after = discord.Object(id=after_id) if after_id else None
+        messages = []
+        async for message in channel.history(limit=None, after=after):
+            messages.append(message)
+            if job:
+                job.messages += 1
+            if len(messages) % 100 == 0:  # Cada página da API traz 100 mensagens
+                if job:
+                    job.pages += 1
+                if recorder:
+                    recorder.history_page(channel.id, after_id, messages[-100:])
+                if on_progress:
+                    await on_progress()
+        if recorder and len(messages) % 100:
+            recorder.history_page(channel.id, after_id, messages[-(len(messages) % 100):])
+        ledger.finish_sync(messages, rescan, after_id)
+        archive_entries(ledger, [message.id for message in messages])
+        HISTORY_PAGES.inc(len(messages) // 100 + 1)  # A última página (parcial ou vazia) também é uma requisição
+        MESSAGES_PROCESSED.inc(len(messages), "history")
+    await save_ledgers()
+    return ledger
+
+async def run_report_job(interaction, job):
+    try:
+        job.stage = "baixando histórico"
+        ledger = await sync_ledger(interaction.channel, job, lambda: show_job_progress(interaction, job))
+
+        if recorder:
+            recorder.report(interaction.channel.id, interaction.created_at)
+
+        # Apenas as mortes enviadas antes do comando, da mais antiga para a mais recente
+        entries = ledger.entries_before(interaction.created_at)
+        if not entries:
+            await report_error(interaction, "Não há mensagens suficientes para gerar o relatório.")
+            return
+
+        report_channel = bot.get_channel(REPORT_CHANNEL_ID)
+        if not report_channel:
+            await report_error(interaction, "Canal de relatórios não encontrado.")
+            return
+
+        job.stage = "arquivando prints"
+        links = await archived_links(entries)
+        duplicates = duplicate_claims(entries)
+        confirmations = confirmed_deaths(entries)
+        prices = await price_client.get()  # Tabela inteira de uma vez, nunca um item por requisição
+        catalog = build_catalog.get()
+        variant = (
+            report_compression(), len(links), sorted(duplicates.items()),
+            sorted(confirmations.items()) if confirmations is not None else None,
+            prices.version if prices is not None else None, *REPORT_HEADERS,
+        )
+        key = report_key(interaction.channel.id, ledger, catalog, variant)
+
+        async def create_report():
+            job.stage = "montando relatório"
+            report_data, purchase_data = build_report(
+                entries, catalog, ledger.approvals, links, duplicates, confirmations)
+            if not report_data:
+                return None
+            job.stage = "enviando arquivos"
+            report = await send_report_files(report_channel, report_data, purchase_data, cache_key=key, prices=prices)
+            job.stage = "gravando histórico"
+            try:
+                # Fechar o mesmo tópico de novo substitui o registro anterior
+                await asyncio.to_thread(
+                    warehouse.record_regear, interaction.channel.id, interaction.channel.name,
+                    interaction.created_at, deaths_from_report(report_data), purchase_data, prices)
+            except sqlite3.Error as e:
+                print(f"[ERRO] Não foi possível gravar o regear no histórico: {e}")
+            return report
+
+        # Se nada mudou desde o último relatório do tópico, reaproveita o que já foi enviado
+        report, cached = await report_cache.get_or_create(key, create_report)
+        if report is None:
+            await report_error(interaction, "Nenhuma mensagem válida encontrada para gerar o relatório.")
+            return
+        if cached:
+            job.stage = "reaproveitando relatório"
+            await ensure_cached_report_posted(report_channel, report)
+        job.result_url = report.message_url
+
+        description = "O relatório foi gerado com sucesso."
+        if cached:
+            description = f"Nada mudou desde o último relatório: {report.message_url}"
         confirmation_embed = discord.Embed(
             title="REGEAR CLOSED!",
-            description="O relatório foi gerado com sucesso.",
+            description=description,
             color=discord.Color.red()
         )
-        await interaction.response.send_message(embed=confirmation_embed)
-        
+        await interaction.followup.send(embed=confirmation_embed)
+        job.stage = f"{report.rows} mortes" + (" (cache)" if cached else "")
+        await interaction.edit_original_response(content=f"Relatório concluído: {report.rows} mortes.")
+    except Exception:
+        await report_error(interaction, "Ocorreu um erro ao gerar o relatório. Tente novamente mais tarde.")
+        raise
+
+async def regear_threads(days):
+    """Tópicos de regear criados nos últimos `days` dias (ativos e arquivados)."""
+    topic_channel = bot.get_channel(TOPIC_CHANNEL_ID)
+    if topic_channel is None:
+        return []
+    since = discord.utils.utcnow() - datetime.timedelta(days=days)
+    threads = {
+        thread.id: thread for thread in topic_channel.threads
+        if discord.utils.snowflake_time(thread.id) >= since
+    }
+    async for thread in topic_channel.archived_threads(limit=None):
+        # A lista vem do arquivamento mais recente para o mais antigo
+        if thread.archive_timestamp < since:
+            break
+        if discord.utils.snowflake_time(thread.id) >= since:
+            threads[thread.id] = thread
+    return sorted(threads.values(), key=lambda thread: thread.id)
+
+async def run_batch_report_job(interaction, job, days):
+    try:
+        job.stage = "listando tópicos"
+        threads = await regear_threads(days)
+        if not threads:
+            await report_error(interaction, f"Nenhum tópico de regear encontrado nos últimos {days} dias.")
+            return
+
+        catalog = build_catalog.get()
+        semaphore = asyncio.Semaphore(MAX_CONCURRENT_THREADS)
+        done = 0
+
+        async def thread_report(thread):
+            nonlocal done
+            # Limita quantos tópicos buscam histórico ao mesmo tempo (o discord.py cuida dos 429 por rota)
+            async with semaphore:
+                ledger = await sync_ledger(thread, job, lambda: show_job_progress(interaction, job))
+            entries = ledger.entries_before(interaction.created_at)
+            links = await archived_links(entries)
+            report_data, purchase_data = build_report(
+                entries, catalog, ledger.approvals, links, duplicate_claims(entries), confirmed_deaths(entries))
+            done += 1
+            job.stage = f"{done}/{len(threads)} tópicos"
+            await show_job_progress(interaction, job)
+            return thread.name, report_data, purchase_data
+
+        job.stage = f"0/{len(threads)} tópicos"
+        reports = await asyncio.gather(*(thread_report(thread) for thread in threads))
+        report_data, purchase_data = merge_reports(reports)
+        if not report_data:
+            await report_error(interaction, "Nenhuma mensagem válida encontrada para gerar o relatório.")
+            return
+
+        report_channel = bot.get_channel(REPORT_CHANNEL_ID)
+        if not report_channel:
+            await report_error(interaction, "Canal de relatórios não encontrado.")
+            return
+
+        job.stage = "enviando arquivos"
+        await send_report_files(report_channel, report_data, purchase_data, headers=BATCH_REPORT_HEADERS,
+                                prices=await price_client.get())
+
+        confirmation_embed = discord.Embed(
+            title="Relatório consolidado gerado!",
+            description=f"{len(report_data)} mortes em {len(threads)} regears dos últimos {days} dias.",
+            color=discord.Color.green()
+        )
+        await interaction.followup.send(embed=confirmation_embed)
+        await interaction.edit_original_response(content=f"Relatório consolidado concluído: {len(threads)} tópicos.")
+    except Exception:
+        await report_error(interaction, "Ocorreu um erro ao gerar o relatório. Tente novamente mais tarde.")
+        raise
+
+# --- Comandos Slash ---
+@bot.tree.command(name="criar_relatorio", description="Cria um relatório de regear.")
+async def criar_relatorio(interaction: discord.Interaction):
+    job = report_jobs.reserve(interaction.channel.id, getattr(interaction.channel, "name", "-"), interaction.user.display_name)
+    if job is None:
+        running = report_jobs.running_for(interaction.channel.id)
+        embed = discord.Embed(
+            title="Relatório em andamento",
+            description=f"Já existe um relatório sendo gerado neste canal.\n{running.describe()}",
+            color=discord.Color.orange()
+        )
+        await interaction.response.send_message(embed=embed, ephemeral=True)
+        # Em vez de gerar de novo, espera o relatório em andamento e manda o link dele
+        if running.task is not None:
+            await asyncio.wait({running.task})
+            if running.result_url:
+                await interaction.followup.send(f"Relatório concluído: {running.result_url}", ephemeral=True)
+        return
+
+    # Responde na hora (prazo de 3s da interação) e gera o relatório em segundo plano
+    try:
+        await interaction.response.send_message(f"Gerando relatório... {job.describe()}", ephemeral=True)
+    except Exception as e:
+        report_jobs.finish(job, error=e)
+        raise
+    report_jobs.run(job, run_report_job(interaction, job))
+
+@bot.tree.command(name="relatorio_semana", description="Gera um relatório consolidado dos regears recentes.")
+@app_commands.describe(dias="Quantos dias para trás incluir (padrão: 7)")
+async def relatorio_semana(interaction: discord.Interaction, dias: app_commands.Range[int, 1, 31] = 7):
+    # O lote usa o ID do canal de tópicos, então só roda um relatório consolidado por vez
+    job = report_jobs.reserve(TOPIC_CHANNEL_ID, f"regears dos últimos {dias} dias", interaction.user.display_name)
+    if job is None:
+        running = report_jobs.running_for(TOPIC_CHANNEL_ID)
+        embed = discord.Embed(
+            title="Relatório em andamento",
+            description=f"Já existe um relatório consolidado sendo gerado.\n{running.describe()}",
+            color=discord.Color.orange()
+        )
+        await interaction.response.send_message(embed=embed, ephemeral=True)
+        return
+
+    try:
+        await interaction.response.send_message(f"Gerando relatório... {job.describe()}", ephemeral=True)
+    except Exception as e:
+        report_jobs.finish(job, error=e)
+        raise
+    report_jobs.run(job, run_batch_report_job(interaction, job, dias))
+
+@bot.tree.command(name="relatorios", description="Mostra os relatórios em andamento e os mais recentes.")
+async def relatorios(interaction: discord.Interaction):
+    active = report_jobs.active()
+    recent = report_jobs.recent()[:10]
+    embed = discord.Embed(title="Relatórios", color=discord.Color.blue())
+    embed.add_field(name="Em andamento", value=truncate("\n".join(job.describe() for job in active) or "-"), inline=False)
+    embed.add_field(name="Recentes", value=truncate("\n".join(job.describe() for job in recent) or "-"), inline=False)
+    await interaction.response.send_message(embed=embed, ephemeral=True)
+
 @bot.tree.command(name="criar_regear", description="Cria um regear de ZvZ.")
 @app_commands.describe(nome_regear="Ex: REGEAR 01/01 23UTC")
 async def criar_regear(interaction: discord.Interaction, nome_regear: str):
@@ -192,7 +605,7 @@ async def criar_regear(interaction: discord.Interaction, nome_regear: str):
 
     embed = discord.Embed(
         title=nome_regear,  # Alterado de mensagem para nome_regear
-        description="**Copie sua build conforme abaixo, e cole junto com a print do regear!**\n**Se você morreu mais de uma vez, repita o processo para as demais mortes!**\n\n**Não coloque 2 prints em 1 mensagem.**\n\n__Se você tiver a tag \"Core\" escreva junto com a build__\n\nEx: **Segadeira Core**\n\nGolem\nMaça 1H Clapper\nMartelo 1H\nMaça 1H\nMaça Pesada\nEquilibrio\nPara Tempo\nSilence\nDanacao\nExecrado\nLocus\nArvore\nJurador\nOculto\nEntalhada\nQueda Santa\nPostulento\nQuebra Reinos\nCaça Espiritos\nMaos Infernais\nSegadeira\nCravadas\nUrsinas\nAstral\nPrisma",
+        description=regear_instructions(build_catalog.get()),
         color=discord.Color.blue()
     )
     embed.set_footer(text=f"Regear criado por {interaction.user.display_name}")
@@ -214,8 +627,142 @@ async def criar_regear(interaction: discord.Interaction, nome_regear: str):
             color=discord.Color.red()
         )
         await interaction.response.send_message(embed=error_embed, ephemeral=True)
-    
-@bot.tree.command(name="mensagem", description="Envia uma mensagem no canal usando bot.")
+
+@bot.tree.command(name="morte", description="Registra uma morte no regear com a build e a print.")
+@app_commands.describe(build="Build que você estava usando", imagem="Print da morte")
+async def morte(interaction: discord.Interaction, build: str, imagem: discord.Attachment):
+    if getattr(interaction.channel, "parent_id", None) != TOPIC_CHANNEL_ID:
+        await interaction.response.send_message("Use este comando dentro do tópico do regear.", ephemeral=True)
+        return
+
+    catalog = build_catalog.get()
+    name = canonical_build(catalog, build)
+    if name is None:
+        suggestions = ", ".join(suggest_builds(catalog, build, limit=5)) or "-"
+        embed = discord.Embed(
+            title="Build não encontrada",
+            description=f"A build \"{truncate(build, 100)}\" não está no catálogo.\nSugestões: {suggestions}",
+            color=discord.Color.red()
+        )
+        await interaction.response.send_message(embed=embed, ephemeral=True)
+        return
+    if not (imagem.content_type or "").startswith("image/"):
+        await interaction.response.send_message("Envie a print da morte como imagem.", ephemeral=True)
+        return
+
+    # Baixar e reenviar a print pode passar do prazo de 3s da interação
+    await interaction.response.defer()
+    # A mensagem chega ao ledger pelo on_message, em nome de quem usou o comando
+    await interaction.followup.send(content=name, file=await imagem.to_file())
+
+@morte.autocomplete("build")
+async def morte_build_autocomplete(interaction: discord.Interaction, current: str):
+    return [app_commands.Choice(name=name, value=name) for name in suggest_builds(build_catalog.get(), current)]
+
+async def review_deaths(interaction, status, nick, mensagens, pendentes):
+    """Aprova ou nega de uma vez as mortes do tópico: as indicadas, as do nick ou todas as pendentes."""
+    if getattr(interaction.channel, "parent_id", None) != TOPIC_CHANNEL_ID:
+        await interaction.response.send_message("Use este comando dentro do tópico do regear.", ephemeral=True)
+        return
+    if not nick and not mensagens and not pendentes:
+        # Sem filtro o comando alteraria o tópico inteiro: só com a confirmação explícita
+        await interaction.response.send_message(
+            "Indique um nick, as mensagens ou use pendentes:True para marcar todas as mortes pendentes.",
+            ephemeral=True)
+        return
+    # Um tópico que ainda não está em dia pode precisar buscar o histórico
+    await interaction.response.defer(ephemeral=True, thinking=True)
+    ledger = await sync_ledger(interaction.channel)
+
+    entries = ledger.entries_before(interaction.created_at)
+    if mensagens:
+        # Aceita IDs ou links de mensagens; IDs que não são mortes do tópico são ignorados
+        wanted = {int(message_id) for message_id in re.findall(r"\d{15,21}", mensagens)}
+        entries = [entry for entry in entries if entry.message_id in wanted]
+    if nick:
+        entries = [entry for entry in entries if entry.nick.casefold() == nick.strip().casefold()]
+    if not mensagens and not nick:
+        entries = [entry for entry in entries if entry.message_id not in ledger.approvals]
+
+    message_ids = [entry.message_id for entry in entries]
+    changed = ledger.review(message_ids, status, interaction.user.id, interaction.user.display_name)
+    if recorder and message_ids:
+        recorder.review(interaction.channel.id, message_ids, status, interaction.user.id, interaction.user.display_name)
+    # Grava na hora: decisões em lote não podem esperar o flush periódico
+    await save_ledgers()
+    action = "aprovadas" if status == APPROVED else "negadas"
+    print(f"[LOG] {interaction.user} marcou {len(message_ids)} mortes como {action} em {interaction.channel.id}")
+    await interaction.followup.send(f"{len(message_ids)} mortes {action} ({changed} mudaram de estado).", ephemeral=True)
+
+@bot.tree.command(name="aprovar", description="Aprova várias mortes do regear de uma vez.")
+@app_commands.describe(nick="Só as mortes deste jogador", mensagens="IDs ou links das mensagens",
+                       pendentes="Sem nick nem mensagens: marca todas as mortes pendentes do tópico")
+@app_commands.checks.has_permissions(manage_messages=True)
+async def aprovar(interaction: discord.Interaction, nick: str = None, mensagens: str = None, pendentes: bool = False):
+    await review_deaths(interaction, APPROVED, nick, mensagens, pendentes)
+
+@bot.tree.command(name="negar", description="Nega várias mortes do regear de uma vez.")
+@app_commands.describe(nick="Só as mortes deste jogador", mensagens="IDs ou links das mensagens",
+                       pendentes="Sem nick nem mensagens: marca todas as mortes pendentes do tópico")
+@app_commands.checks.has_permissions(manage_messages=True)
+async def negar(interaction: discord.Interaction, nick: str = None, mensagens: str = None, pendentes: bool = False):
+    await review_deaths(interaction, DENIED, nick, mensagens, pendentes)
+
+@aprovar.error
+@negar.error
+async def review_error(interaction: discord.Interaction, error):
+    if isinstance(error, app_commands.errors.MissingPermissions):
+        print(f"[ERRO] {interaction.user} tentou aprovar/negar mortes sem permissão.")
+        error_embed = discord.Embed(
+            title="Permissão negada",
+            description="Você não tem permissão para executar este comando.",
+            color=discord.Color.red()
+        )
+        await interaction.response.send_message(embed=error_embed, ephemeral=True)
+
+def format_silver(value):
+    return f"{value:,}".replace(",", ".") if value is not None else "-"
+
+@bot.tree.command(name="historico", description="Consulta o histórico dos regears fechados.")
+@app_commands.describe(build="Mortes por mês com esta build", nick="Mortes recentes deste jogador",
+                       meses="Quantos meses para trás incluir (padrão: 1, o mês atual)")
+async def historico(interaction: discord.Interaction, build: str = None, nick: str = None,
+                    meses: app_commands.Range[int, 1, 24] = 1):
+    embed = discord.Embed(title=f"Histórico de regears ({meses} {'mês' if meses == 1 else 'meses'})",
+                          color=discord.Color.blue())
+    if build:
+        name = canonical_build(build_catalog.get(), build)
+        if name is None:
+            await interaction.response.send_message(f"Build não encontrada no catálogo: {build}", ephemeral=True)
+            return
+        # O histórico guarda a chave do catálogo (nome em minúsculas), como a coluna Build_Catalogo
+        months = await asyncio.to_thread(warehouse.build_deaths, name.lower(), meses)
+        lines = [f"{month}: {deaths} mortes" for month, deaths in months]
+        embed.add_field(name=name, value=truncate("\n".join(lines) or "Nenhuma morte registrada."), inline=False)
+    if nick:
+        deaths = await asyncio.to_thread(warehouse.player_deaths, nick, meses)
+        lines = [f"{died_at} | {build_name} | {status} | {regear}" for died_at, build_name, status, regear in deaths]
+        embed.add_field(name=nick, value=truncate("\n".join(lines) or "Nenhuma morte registrada."), inline=False)
+    if not build and not nick:
+        builds = await asyncio.to_thread(warehouse.top_builds, meses)
+        players = await asyncio.to_thread(warehouse.top_players, meses)
+        regears = await asyncio.to_thread(warehouse.recent_regears, 5)
+        embed.add_field(name="Builds que mais morreram",
+                        value=truncate("\n".join(f"{name}: {total}" for name, total in builds) or "-"), inline=True)
+        embed.add_field(name="Jogadores que mais morreram",
+                        value=truncate("\n".join(f"{name}: {total}" for name, total in players) or "-"), inline=True)
+        embed.add_field(
+            name="Últimos regears",
+            value=truncate("\n".join(f"{name} ({closed_at}): {deaths} mortes, custo {format_silver(cost)}"
+                                     for _, name, closed_at, deaths, cost in regears) or "-"),
+            inline=False)
+    await interaction.response.send_message(embed=embed, ephemeral=True)
+
+@historico.autocomplete("build")
+async def historico_build_autocomplete(interaction: discord.Interaction, current: str):
+    return [app_commands.Choice(name=name, value=name) for name in suggest_builds(build_catalog.get(), current)]
+
+@bot.tree.command(name="mensagem",description="Envia uma mensagem no canal usando bot.")
 @app_commands.describe(texto="mensagem.")
 async def mensagem(interaction: discord.Interaction, texto: str):
     # Verifica se o usuário tem permissão de administrador
@@ -233,26 +780,19 @@ async def mensagem(interaction: discord.Interaction, texto: str):
 @app_commands.describe(nick="Seu nome no Albion Online")
 async def register(interaction: discord.Interaction, nick: str):
     print(f"[LOG] Comando /register acionado por {interaction.user} com nick: {nick}")
-    
+    # A fila de alterações e a lista da guilda podem passar do prazo de 3 s da resposta
+    await interaction.response.defer(ephemeral=False, thinking=True)
+
     try:
         # Verifica se o nick já está registrado por outro membro no Discord
-        if nick in registered_nicks.values():
+        owner = registered_nicks.owner_of(nick)
+        if owner is not None and owner != interaction.user.id:
             print(f"[LOG] Tentativa de registro com nick já usado: {nick}")
-            embed = discord.Embed(
-                title="Erro no registro",
-                description="Este nick já foi registrado por outro membro. Se esse for seu nick, contate um administrador.",
-                color=discord.Color.red()
-            )
-            await interaction.response.send_message(embed=embed, ephemeral=True)
+            await send_private(interaction, nick_taken_embed())
             return
 
-        # Verifica se o jogador está na guilda no Albion Online
-        response = requests.get(ALBION_API_URL)
-        response.raise_for_status()
-        members = response.json()
-        print("[LOG] Lista de membros da guilda obtida com sucesso.")
-
-        player = next((m for m in members if m['Name'] == nick), None)
+        # Verifica se o jogador está na guilda no Albion Online (sem bloquear o event loop)
+        player = await albion_roster.find(nick)
         if not player:
             print(f"[LOG] O usuário {nick} não foi encontrado na guilda.")
             embed = discord.Embed(
@@ -260,25 +800,40 @@ async def register(interaction: discord.Interaction, nick: str):
                 description=f"O {nick} não está na guilda Ethereal, ou a API do Albion ainda não está atualizada",
                 color=discord.Color.red()
             )
-            await interaction.response.send_message(embed=embed, ephemeral=False)
+            await interaction.followup.send(embed=embed)
             return
 
+        nick = player  # Usa a grafia oficial do nome no jogo
+
         # Atribui o cargo de Membro e renomeia o usuário
         member = interaction.guild.get_member(interaction.user.id)
         if member:
             print(f"[LOG] Usuário {interaction.user} encontrado no servidor.")
             role = interaction.guild.get_role(MEMBER_ROLE_ID)
             if role:
-                await member.add_roles(role)
-                await member.edit(nick=nick)
-                registered_nicks[interaction.user.id] = nick  # Salva o nick como registrado
+                # Reserva o nick antes das chamadas à API, para dois registros simultâneos não pegarem o mesmo nick
+                previous_nick = registered_nicks.nick_of(interaction.user.id)
+                if not registered_nicks.register(interaction.user.id, nick):
+                    print(f"[LOG] Tentativa de registro com nick já usado: {nick}")
+                    await send_private(interaction, nick_taken_embed())
+                    return
+                try:
+                    # Cargo e nick vão juntos num único PATCH pela fila de alterações
+                    await member_ops.submit(member.id, add_roles=[role.id], nick=nick, reason="Registro pelo comando /register")
+                except Exception:
+                    # Desfaz a reserva se o Discord recusar a alteração
+                    if previous_nick is None:
+                        registered_nicks.unregister(interaction.user.id)
+                    else:
+                        registered_nicks.register(interaction.user.id, previous_nick)
+                    raise
                 print(f"[LOG] Cargo atribuído e nome alterado para {nick}.")
                 embed = discord.Embed(
                     title="Registro bem-sucedido!",
                     description=f"Registrado com sucesso! Bem-vindo, {nick}.",
                     color=discord.Color.green()
                 )
-                await interaction.response.send_message(embed=embed, ephemeral=False)
+                await interaction.followup.send(embed=embed)
             else:
                 print("[ERRO] Cargo de Membro não encontrado.")
                 embed = discord.Embed(
@@ -286,7 +841,7 @@ async def register(interaction: discord.Interaction, nick: str):
                     description="Cargo de Membro não encontrado.",
                     color=discord.Color.red()
                 )
-                await interaction.response.send_message(embed=embed, ephemeral=True)
+                await send_private(interaction, embed)
         else:
             print("[ERRO] Usuário não encontrado no servidor.")
             embed = discord.Embed(
@@ -294,7 +849,7 @@ async def register(interaction: discord.Interaction, nick: str):
                 description="Erro ao encontrar seu usuário no servidor.",
                 color=discord.Color.red()
             )
-            await interaction.response.send_message(embed=embed, ephemeral=True)
+            await send_private(interaction, embed)
     except Exception as e:
         print(f"[ERRO] Erro no comando /register: {e}")
         embed = discord.Embed(
@@ -302,33 +857,30 @@ async def register(interaction: discord.Interaction, nick: str):
             description="Ocorreu um erro ao processar seu registro. Tente novamente mais tarde.",
             color=discord.Color.red()
         )
-        await interaction.response.send_message(embed=embed, ephemeral=True)
+        await send_private(interaction, embed)
 
 @bot.tree.command(name="unregister", description="Remove um membro do servidor.")
 @app_commands.describe(member="Membro a ser removido")
 @app_commands.checks.has_permissions(administrator=True)  # Apenas administradores podem executar!
 async def unregister(interaction: discord.Interaction, member: discord.Member):
     print(f"[LOG] Comando /unregister acionado por {interaction.user} para remover {member.name}")
-    
+    # A fila de alterações pode estar cheia (ex: depois de um /sync_roster)
+    await interaction.response.defer(ephemeral=False, thinking=True)
+
     try:
-        # Remove todas as roles do membro
-        await member.edit(roles=[])
-        print(f"[LOG] Todas as tags removidas do membro {member.name}")
-        
-        # Expulsa o membro do servidor
-        await member.kick(reason="Removido manualmente pelo comando /unregister")
-        print(f"[LOG] {member.name} foi expulso do servidor.")
+        # Remove todas as roles e expulsa o membro (a fila junta as duas alterações)
+        await member_ops.submit(member.id, clear_roles=True, kick="Removido manualmente pelo comando /unregister")
+        print(f"[LOG] {member.name} teve as tags removidas e foi expulso do servidor.")
         
         # Remove o nick da lista de registrados
-        if member.id in registered_nicks:
-            del registered_nicks[member.id]
+        registered_nicks.unregister(member.id)
         
         confirmation_embed = discord.Embed(
             title="Membro removido",
             description=f"{member.name} foi removido do servidor e suas tags foram apagadas.",
             color=discord.Color.green()
         )
-        await interaction.response.send_message(embed=confirmation_embed, ephemeral=False)
+        await interaction.followup.send(embed=confirmation_embed)
     except Exception as e:
         print(f"[ERRO] Erro ao remover {member.name}: {e}")
         error_embed = discord.Embed(
@@ -336,7 +888,7 @@ async def unregister(interaction: discord.Interaction, member: discord.Member):
             description="Erro ao tentar remover o membro. Contate um administrador.",
             color=discord.Color.red()
         )
-        await interaction.response.send_message(embed=error_embed, ephemeral=True)
+        await send_private(interaction, error_embed)
 
 # Mensagem de erro se um usuário sem permissão tentar usar /unregister
 @unregister.error
@@ -351,13 +903,353 @@ async def unregister_error(interaction: discord.Interaction, error):
         await interaction.response.send_message(embed=error_embed, ephemeral=False)
 
 
+async def reconcile_roster(guild, apply):
+    """Compara a guilda do Albion com os membros do Discord e aplica só as alterações necessárias.
+
+    Retorna (plano, suspeito, enviadas), com enviadas = [(ID do membro, future da fila)] (ver wait_roster_changes).
+    """
+    role = guild.get_role(MEMBER_ROLE_ID)
+    if role is None:
+        raise RuntimeError("Cargo de Membro não encontrado")
+    roster = await albion_roster.refresh()  # Uma única requisição para a lista inteira
+    if not len(roster):
+        raise RuntimeError("A API do Albion devolveu uma lista de membros vazia")
+
+    members = [
+        DiscordMember(member.id, member.display_name, member.nick, member.get_role(role.id) is not None)
+        for member in guild.members if not member.bot
+    ]
+    plan = plan_roster_changes(members, roster, dict(registered_nicks.items()))
+    role_holders = sum(1 for member in members if member.has_role)
+    suspicious = is_suspicious(plan, role_holders)
+
+    submitted = []
+    if apply and not suspicious:
+        # A fila junta cargo + nick do mesmo membro num único PATCH e respeita os limites da API
+        for member_id in plan.remove_role:
+            submitted.append((member_id, member_ops.submit(
+                member_id, remove_roles=[role.id], reason="Não está mais na guilda do Albion")))
+        for member_id in plan.add_role:
+            submitted.append((member_id, member_ops.submit(
+                member_id, add_roles=[role.id], reason="Está na guilda do Albion")))
+        for member_id, nick in plan.rename.items():
+            submitted.append((member_id, member_ops.submit(
+                member_id, nick=nick, reason="Nick corrigido pela sincronização")))
+    return plan, suspicious, submitted
+
+async def wait_roster_changes(submitted, on_progress=None):
+    """Espera as alterações enviadas à fila, chamando on_progress(concluídas, falhas) a cada ROSTER_PROGRESS_SECONDS.
+
+    Retorna as falhas = [(ID do membro, exceção)].
+    """
+    pending = {future: member_id for member_id, future in submitted}
+    failures = []
+    while pending:
+        finished, _ = await asyncio.wait(pending, timeout=ROSTER_PROGRESS_SECONDS)
+        for future in finished:
+            member_id = pending.pop(future)
+            error = asyncio.CancelledError() if future.cancelled() else future.exception()
+            if error is not None:
+                print(f"[ERRO] Sincronização: falha ao alterar o membro {member_id}: {error}")
+                failures.append((member_id, error))
+        if pending and on_progress:
+            await on_progress(len(submitted) - len(pending), failures)
+    return failures
+
+def roster_progress_embed(plan, done, total, failures):
+    if done < total:
+        description = f"Aplicando: {plan.summary()}.\n{done}/{total} alterações concluídas"
+        if failures:
+            description += f", {len(failures)} falharam"
+        description += "."
+        color = discord.Color.blue()
+    elif failures:
+        description = (f"Alterações aplicadas: {plan.summary()}.\n"
+                       f"{len(failures)} falharam: " + ", ".join(f"<@{member_id}>" for member_id, _ in failures))
+        color = discord.Color.orange()
+    else:
+        description = f"Alterações aplicadas: {plan.summary()}."
+        color = discord.Color.green()
+    return discord.Embed(title="Sincronização da guilda", description=truncate(description, 4096), color=color)
+
+async def follow_roster_changes(interaction, message, plan, submitted):
+    """Atualiza a mensagem do /sync_roster com o progresso e o resultado das alterações.
+
+    Uma limpeza grande pode passar do prazo do token da interação: aí o resultado é postado no canal.
+    """
+    async def show(done, failures):
+        embed = roster_progress_embed(plan, done, len(submitted), failures)
+        if discord.utils.utcnow() - interaction.created_at < INTERACTION_TOKEN_LIFETIME:
+            try:
+                await message.edit(embed=embed)
+                return
+            except discord.HTTPException as e:
+                print(f"[ERRO] Não foi possível atualizar o progresso do /sync_roster: {e}")
+        if done == len(submitted):
+            await interaction.channel.send(content=interaction.user.mention, embed=embed)
+
+    try:
+        failures = await wait_roster_changes(submitted, show)
+        await show(len(submitted), failures)
+    except Exception as e:
+        print(f"[ERRO] Erro ao acompanhar o /sync_roster: {e}")
+
+@bot.tree.command(name="sync_roster", description="Sincroniza os cargos com a lista de membros da guilda no Albion.")
+@app_commands.describe(aplicar="Aplica as alterações (padrão: só mostra o que mudaria)")
+@app_commands.checks.has_permissions(administrator=True)  # Apenas administradores podem executar!
+async def sync_roster(interaction: discord.Interaction, aplicar: bool = False):
+    print(f"[LOG] Comando /sync_roster acionado por {interaction.user} (aplicar={aplicar})")
+    await interaction.response.defer(ephemeral=True, thinking=True)
+    try:
+        plan, suspicious, submitted = await reconcile_roster(interaction.guild, aplicar)
+    except Exception as e:
+        print(f"[ERRO] Erro no comando /sync_roster: {e}")
+        embed = discord.Embed(
+            title="Erro na sincronização",
+            description="Não foi possível sincronizar com a guilda do Albion. Tente novamente mais tarde.",
+            color=discord.Color.red()
+        )
+        await interaction.followup.send(embed=embed, ephemeral=True)
+        return
+
+    if suspicious:
+        description = f"Nada foi aplicado: a sincronização removeria cargos demais ({plan.summary()})."
+        embed = discord.Embed(title="Sincronização da guilda", description=description, color=discord.Color.orange())
+    elif aplicar:
+        # O plano sai na hora; a fila aplica cerca de 10 alterações a cada 10 s, então o resultado vem depois
+        embed = roster_progress_embed(plan, 0, len(submitted), [])
+    else:
+        description = f"Simulação: {plan.summary()}.\nUse `aplicar: True` para aplicar."
+        embed = discord.Embed(title="Sincronização da guilda", description=description, color=discord.Color.blue())
+    message = await interaction.followup.send(embed=embed, ephemeral=True, wait=True)
+    if submitted:
+        task = asyncio.create_task(follow_roster_changes(interaction, message, plan, submitted))
+        roster_followers.add(task)
+        task.add_done_callback(roster_followers.discard)
+
+@sync_roster.error
+async def sync_roster_error(interaction: discord.Interaction, error):
+    if isinstance(error, app_commands.errors.MissingPermissions):
+        print(f"[ERRO] {interaction.user} tentou usar /sync_roster sem permissão.")
+        error_embed = discord.Embed(
+            title="Permissão negada",
+            description="Você não tem permissão para executar este comando.",
+            color=discord.Color.red()
+        )
+        await interaction.response.send_message(embed=error_embed, ephemeral=True)
+
+@tasks.loop(hours=6)
+async def scheduled_roster_sync():
+    guild = bot.get_guild(ID_DO_SERVIDOR_DISCORD)
+    if guild is None:
+        return
+    try:
+        plan, suspicious, submitted = await reconcile_roster(guild, apply=True)
+        failures = await wait_roster_changes(submitted)
+    except Exception as e:
+        print(f"[ERRO] Erro na sincronização automática da guilda: {e}")
+        return
+    if suspicious:
+        print(f"[ERRO] Sincronização automática ignorada, removeria cargos demais: {plan.summary()}")
+    else:
+        print(f"[LOG] Sincronização automática da guilda: {plan.summary()}, {len(failures)} falhas")
+
+@tasks.loop(minutes=2)
+async def poll_kill_feed():
+    try:
+        added = await kill_feed.poll()
+    except Exception as e:
+        print(f"[ERRO] Falha ao buscar o feed de mortes do Albion: {e}")
+        return
+    try:
+        await asyncio.to_thread(kill_feed.save)
+    except OSError as e:
+        print(f"[ERRO] Falha ao salvar o feed de mortes: {e}")
+    if added:
+        print(f"[LOG] Feed de mortes: {added} mortes novas da guilda.")
+
+@bot.tree.command(name="profile", description="Gera um perfil do bot por alguns segundos.")
+@app_commands.describe(segundos="Duração do perfil (1-120)", modo="cprofile (padrão) ou sample")
+@app_commands.choices(modo=[
+    app_commands.Choice(name="cprofile", value="cprofile"),
+    app_commands.Choice(name="sample", value="sample"),
+])
+@app_commands.checks.has_permissions(administrator=True)  # Apenas administradores podem executar!
+async def profile(interaction: discord.Interaction, segundos: app_commands.Range[int, 1, 120] = 10,
+                  modo: app_commands.Choice[str] = None):
+    mode = modo.value if modo else "cprofile"
+    print(f"[LOG] Comando /profile acionado por {interaction.user} ({mode}, {segundos}s)")
+    await interaction.response.defer(ephemeral=True, thinking=True)
+    try:
+        filename, data = await profiler.run(segundos, mode)
+    except ProfilerBusy:
+        await interaction.followup.send("Já existe um perfil em andamento.", ephemeral=True)
+        return
+    stats = loop_watchdog.stats()
+    await interaction.followup.send(
+        f"Perfil de {segundos}s ({mode}). Atraso máximo do loop: {stats['max_lag_s']}s, travamentos: {stats['stalls']}.",
+        file=discord.File(io.BytesIO(data), filename),
+        ephemeral=True,
+    )
+
+@profile.error
+async def profile_error(interaction: discord.Interaction, error):
+    if isinstance(error, app_commands.errors.MissingPermissions):
+        print(f"[ERRO] {interaction.user} tentou usar /profile sem permissão.")
+        error_embed = discord.Embed(
+            title="Permissão negada",
+            description="Você não tem permissão para executar este comando.",
+            color=discord.Color.red()
+        )
+        await interaction.response.send_message(embed=error_embed, ephemeral=True)
+
+# --- Métricas ---
+@bot.event
+async def on_app_command_completion(interaction: discord.Interaction, command):
+    COMMAND_SECONDS.observe((discord.utils.utcnow() - interaction.created_at).total_seconds(), command.name)
+
+def register_metrics():
+    registry.counter_callback("regear_catalog_reloads_total", "Recargas do catálogo de builds", lambda: build_catalog.reloads)
+    registry.gauge_callback(
+        "regear_catalog_builds", "Builds no catálogo atual",
+        lambda: len(build_catalog.get()) if build_catalog.reloads else None)
+    registry.gauge_callback(
+        "regear_cache_hit_ratio", "Fração das consultas servidas do cache",
+        lambda: {
+            ("roster",): hit_ratio(albion_roster.hits, albion_roster.misses),
+            ("matcher",): hit_ratio(*matcher_stats()),
+            ("report",): hit_ratio(report_cache.hits, report_cache.misses),
+        },
+        labels=("cache",))
+    registry.counter_callback(
+        "regear_archive_attachments_total", "Prints arquivadas",
+        lambda: {
+            ("downloaded",): attachment_archive.downloaded,
+            ("duplicate",): attachment_archive.duplicates,
+            ("failed",): attachment_archive.failed,
+        },
+        labels=("result",))
+    registry.gauge_callback("regear_print_hashes", "Prints no índice de repetidas", duplicate_index.size)
+    registry.counter_callback(
+        "regear_print_hash_total", "Hashes perceptuais calculados",
+        lambda: {("hashed",): duplicate_index.hashed, ("failed",): duplicate_index.failed},
+        labels=("result",))
+    registry.counter_callback("regear_price_fetches_total", "Buscas da tabela de preços", lambda: price_client.fetches)
+    registry.counter_callback("regear_warehouse_writes_total", "Regears gravados no histórico", lambda: warehouse.recorded)
+    registry.gauge_callback("regear_kill_feed_deaths", "Mortes da guilda guardadas do feed de eventos", lambda: len(kill_feed))
+    registry.counter_callback("regear_kill_feed_events_total", "Eventos novos lidos do feed", lambda: kill_feed.events_seen)
+    registry.gauge_callback("regear_kill_feed_last_poll_timestamp", "Horário da última leitura do feed",
+                            lambda: kill_feed.last_poll)
+    registry.gauge_callback("regear_archive_pending", "Prints baixando ou na fila", attachment_archive.pending_count)
+    registry.gauge_callback("regear_ledgers", "Tópicos de regear acompanhados em memória", lambda: len(ledgers))
+    registry.gauge_callback("regear_report_jobs_running", "Jobs de relatório em andamento", lambda: len(report_jobs.active()))
+    registry.gauge_callback("regear_member_ops_pending", "Alterações de membros na fila", member_ops.pending_count)
+    registry.counter_callback(
+        "regear_member_ops_total", "Alterações de membros processadas",
+        lambda: {("applied",): member_ops.applied, ("failed",): member_ops.failed, ("retried",): member_ops.retries},
+        labels=("result",))
+    registry.gauge_callback(
+        "regear_startup_seconds", "Segundos desde o início do processo até cada etapa da inicialização",
+        lambda: {(phase,): seconds for phase, seconds in startup.phases.items()},
+        labels=("phase",))
+    registry.gauge_callback("regear_process_resident_bytes", "Memória residente do processo", startup.resident_memory_bytes)
+
+register_metrics()
+install_rate_limit_counter()
+
 # --- Servidor HTTP Simples ---
 async def handle(request):
     return web.Response(text="Alive")
 
+async def handle_metrics(request):
+    return web.Response(text=registry.render(), content_type="text/plain", charset="utf-8",
+                        headers={"X-Prometheus-Format": "0.0.4"})
+
+async def handle_archive(request):
+    name = request.match_info["name"]
+    # Só nomes de objetos do arquivo (<sha256>.<ext>), nunca caminhos
+    if not re.fullmatch(r"[0-9a-f]{64}\.[a-z]{3,4}", name):
+        raise web.HTTPNotFound()
+    path = attachment_archive.object_path(name)
+    if not os.path.exists(path):
+        raise web.HTTPNotFound()
+    return web.FileResponse(path, headers={"Cache-Control": "public, max-age=31536000, immutable"})
+
+def query_int(request, name, default, maximum):
+    try:
+        value = int(request.query.get(name, default))
+    except ValueError:
+        raise web.HTTPBadRequest(text=f"{name} deve ser um número")
+    if not 1 <= value <= maximum:
+        raise web.HTTPBadRequest(text=f"{name} deve estar entre 1 e {maximum}")
+    return value
+
+async def handle_history_builds(request):
+    months = query_int(request, "meses", 1, 120)
+    limit = query_int(request, "limite", 10, 100)
+    rows = await asyncio.to_thread(warehouse.top_builds, months, limit)
+    return web.json_response([{"build": build, "mortes": total} for build, total in rows])
+
+async def handle_history_build(request):
+    months = query_int(request, "meses", 12, 120)
+    rows = await asyncio.to_thread(warehouse.build_deaths, request.match_info["build"].lower(), months)
+    return web.json_response([{"mes": month, "mortes": deaths} for month, deaths in rows])
+
+async def handle_history_players(request):
+    months = query_int(request, "meses", 1, 120)
+    limit = query_int(request, "limite", 10, 100)
+    rows = await asyncio.to_thread(warehouse.top_players, months, limit)
+    return web.json_response([{"nick": nick, "mortes": total} for nick, total in rows])
+
+async def handle_history_player(request):
+    months = query_int(request, "meses", 1, 120)
+    limit = query_int(request, "limite", 20, 500)
+    rows = await asyncio.to_thread(warehouse.player_deaths, request.match_info["nick"], months, limit)
+    return web.json_response([
+        {"data": died_at, "build": build, "status": status, "regear": regear} for died_at, build, status, regear in rows
+    ])
+
+async def handle_history_regears(request):
+    limit = query_int(request, "limite", 10, 100)
+    rows = await asyncio.to_thread(warehouse.recent_regears, limit)
+    return web.json_response([
+        {"id": str(regear_id), "nome": name, "fechado_em": closed_at, "mortes": deaths, "custo": cost}
+        for regear_id, name, closed_at, deaths, cost in rows
+    ])
+
+def debug_authorized(request):
+    return bool(DEBUG_TOKEN) and request.headers.get("Authorization") == f"Bearer {DEBUG_TOKEN}"
+
+async def handle_debug_loop(request):
+    if not debug_authorized(request):
+        raise web.HTTPNotFound()
+    return web.json_response(loop_watchdog.stats())
+
+async def handle_debug_profile(request):
+    if not debug_authorized(request):
+        raise web.HTTPNotFound()
+    try:
+        seconds = int(request.query.get("seconds", 10))
+        filename, data = await profiler.run(seconds, request.query.get("mode", "cprofile"))
+    except ValueError as e:
+        raise web.HTTPBadRequest(text=str(e))
+    except ProfilerBusy as e:
+        raise web.HTTPConflict(text=str(e))
+    return web.Response(body=data, content_type="application/octet-stream",
+                        headers={"Content-Disposition": f'attachment; filename="{filename}"'})
+
 async def start_http_server():
     app = web.Application()
     app.router.add_get('/', handle)
+    app.router.add_get('/metrics', handle_metrics)
+    app.router.add_get('/arquivo/{name}', handle_archive)
+    app.router.add_get('/historico/builds', handle_history_builds)
+    app.router.add_get('/historico/builds/{build}', handle_history_build)
+    app.router.add_get('/historico/jogadores', handle_history_players)
+    app.router.add_get('/historico/jogadores/{nick}', handle_history_player)
+    app.router.add_get('/historico/regears', handle_history_regears)
+    app.router.add_get('/debug/loop', handle_debug_loop)
+    app.router.add_get('/debug/profile', handle_debug_profile)
     runner = web.AppRunner(app)
     await runner.setup()
     site = web.TCPSite(runner, '0.0.0.0', PORT)
@@ -368,16 +1260,46 @@ async def start_http_server():
 @bot.event
 async def on_ready():
     print(f'Bot {bot.user} está online!')
-    try:
-        synced = await bot.tree.sync()  # Sincroniza os comandos slash
-        print(f"Comandos sincronizados: {len(synced)}")
-    except Exception as e:
-        print(f"Erro ao sincronizar comandos: {e}")
+    # on_ready vem depois de um IDENTIFY (um RESUME chama on_resumed): os eventos do intervalo se perderam,
+    # e o checkpoint não pode avançar por cima deles
+    mark_all_stale()
+    if recorder:
+        recorder.ready()
+    if "ready" not in startup.phases:
+        startup.mark("ready")
+        print(f"[LOG] {startup.summary()} (recursos: {', '.join(sorted(FEATURES))})")
+    if not flush_ledgers.is_running():
+        flush_ledgers.start()
+    if "regear" in FEATURES and KILL_FEED_MINUTES > 0 and not poll_kill_feed.is_running():
+        poll_kill_feed.change_interval(minutes=KILL_FEED_MINUTES)
+        poll_kill_feed.start()
+    if "registro" in FEATURES:
+        member_ops.start(lambda: bot.get_guild(ID_DO_SERVIDOR_DISCORD))
+        if ROSTER_SYNC_HOURS > 0 and not scheduled_roster_sync.is_running():
+            scheduled_roster_sync.change_interval(hours=ROSTER_SYNC_HOURS)
+            scheduled_roster_sync.start()
 
 async def main():
+    # O catálogo, a lista da guilda e os nicks registrados só são carregados no primeiro uso
+    if not duplicate_index.available:
+        print("[LOG] Pillow não instalado: a detecção de prints repetidas está desligada.")
+    loop_watchdog.start()
     await start_http_server()
-    await bot.start(os.environ.get('token'))
+    startup.mark("http")
+    try:
+        # No redeploy o processo recebe SIGTERM: fecha o bot para salvar os ledgers antes de sair
+        asyncio.get_running_loop().add_signal_handler(signal.SIGTERM, lambda: asyncio.create_task(bot.close()))
+    except NotImplementedError:
+        pass  # Windows
+    try:
+        await bot.start(os.environ.get('token'))
+    finally:
+        await save_ledgers()
+        await close_session()
+        duplicate_index.close()
+        warehouse.close()
+        if recorder:
+            recorder.close()
 
 if __name__ == '__main__':
-    import asyncio
     asyncio.run(main())
@@ -0,0 +1,150 @@
+"""Reconhecimento tolerante a erros dos nomes de build digitados nas mortes.
+
+Os nomes são normalizados (sem acento, sem a tag "Core", espaços colapsados)
+e indexados por trigramas. Uma consulta busca primeiro o nome exato
+normalizado e, se não achar, compara por distância de edição só com os
+candidatos que compartilham mais trigramas.
+
+Tokens com dígitos (mão "1h"/"2h", tier "t8", encantamento "3" de ".3")
+não entram na tolerância: "Martelo 2H" é outra arma, não um erro de
+digitação de "Martelo 1H". Só são comparados os candidatos com os mesmos
+tokens numéricos.
+"""
+
+import re
+import unicodedata
+from collections import namedtuple
+
+# Confiança mínima para considerar uma build como registrada
+MIN_CONFIDENCE = 0.75
+# Quantos candidatos do índice de trigramas são comparados por distância de edição
+MAX_CANDIDATES = 8
+# Limite de consultas memoizadas por matcher
+MEMO_SIZE = 10000
+
+MatchResult = namedtuple("MatchResult", ["build", "confidence"])
+NO_MATCH = MatchResult(None, 0.0)
+
+_NON_WORD = re.compile(r"[^a-z0-9]+")
+# "1 h" -> "1h", para o espaço não virar um token numérico diferente
+_SPLIT_HANDS = re.compile(r"\b(\d) h\b")
+
+
+def normalize(text):
+    """'  Maça 1H  CORE' -> 'maca 1h'"""
+    folded = unicodedata.normalize("NFKD", text.lower())
+    folded = "".join(ch for ch in folded if not unicodedata.combining(ch))
+    tokens = [token for token in _NON_WORD.split(folded) if token and token != "core"]
+    return _SPLIT_HANDS.sub(r"\1h", " ".join(tokens))
+
+
+def numeric_tokens(key):
+    """Tokens com dígitos de um nome normalizado, que precisam bater exatamente."""
+    return tuple(sorted(token for token in key.split() if any(ch.isdigit() for ch in token)))
+
+
+def trigrams(text):
+    padded = f"  {text} "
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+
+def levenshtein(a, b, limit):
+    """Distância de edição entre a e b, interrompida quando passa de `limit`."""
+    if abs(len(a) - len(b)) > limit:
+        return limit + 1
+    previous = list(range(len(b) + 1))
+    for i, ca in enumerate(a, 1):
+        current = [i]
+        best = i
+        for j, cb in enumerate(b, 1):
+            cost = previous[j - 1] + (ca != cb)
+            value = min(previous[j] + 1, current[j - 1] + 1, cost)
+            current.append(value)
+            if value < best:
+                best = value
+        if best > limit:
+            return limit + 1
+        previous = current
+    return previous[-1]
+
+
+class BuildMatcher:
+    def __init__(self, names, min_confidence=MIN_CONFIDENCE):
+        # names: chaves do catálogo (nome da build em minúsculas)
+        self.min_confidence = min_confidence
+        self._exact = {}
+        self._keys = []
+        self._numbers = []
+        self._postings = {}
+        for name in names:
+            key = normalize(name)
+            if not key or key in self._exact:
+                continue
+            self._exact[key] = name
+            index = len(self._keys)
+            self._keys.append(key)
+            self._numbers.append(numeric_tokens(key))
+            for gram in trigrams(key):
+                self._postings.setdefault(gram, []).append(index)
+        # Memoiza consultas: num regear o mesmo texto se repete centenas de vezes
+        self._memo = {}
+        self.hits = 0
+        self.misses = 0
+
+    def match(self, text):
+        result = self._memo.get(text)
+        if result is not None:
+            self.hits += 1
+        else:
+            self.misses += 1
+            if len(self._memo) >= MEMO_SIZE:
+                self._memo.clear()
+            result = self._memo[text] = self._match(text)
+        return result
+
+    def _match(self, text):
+        key = normalize(text)
+        if not key:
+            return NO_MATCH
+        name = self._exact.get(key)
+        if name is not None:
+            return MatchResult(name, 1.0)
+
+        numbers = numeric_tokens(key)
+        counts = {}
+        for gram in trigrams(key):
+            for index in self._postings.get(gram, ()):
+                if self._numbers[index] == numbers:
+                    counts[index] = counts.get(index, 0) + 1
+        candidates = sorted(counts, key=counts.get, reverse=True)[:MAX_CANDIDATES]
+
+        best = NO_MATCH
+        for index in candidates:
+            candidate = self._keys[index]
+            longest = max(len(key), len(candidate))
+            limit = int(longest * (1 - self.min_confidence))
+            distance = levenshtein(key, candidate, limit)
+            if distance > limit:
+                continue
+            confidence = 1 - distance / longest
+            if confidence > best.confidence:
+                best = MatchResult(self._exact[candidate], confidence)
+        return best
+
+
+_matchers = {}
+
+
+def matcher_for(catalog):
+    """Matcher do catálogo atual, reconstruído só quando a versão do catálogo muda."""
+    matcher = _matchers.get(catalog.version)
+    if matcher is None:
+        _matchers.clear()
+        matcher = _matchers[catalog.version] = BuildMatcher(catalog.builds)
+    return matcher
+
+
+def matcher_stats():
+    """(acertos, falhas) do cache de consultas do matcher atual."""
+    matcher = next(iter(_matchers.values()), None)
+    return (matcher.hits, matcher.misses) if matcher else (0, 0)
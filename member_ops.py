@@ -0,0 +1,293 @@
+"""Fila central das alterações de membros (cargos, nick e expulsões).
+
+Pedidos para o mesmo membro que ainda não foram aplicados são juntados numa
+única alteração: cargos e nick viram um só PATCH. Cada rota tem seu próprio
+balde de requisições e erros 429/5xx são repetidos com backoff. Quem pede
+recebe um Future que é resolvido quando a alteração for aplicada.
+
+Os pedidos pendentes ficam num journal append-only (member_ops.log), então
+uma limpeza interrompida por um crash continua de onde parou.
+"""
+
+import asyncio
+import json
+import os
+import random
+import time
+
+import discord
+
+from metrics import HTTP_429
+
+# Tentativas por alteração antes de desistir
+MAX_ATTEMPTS = 5
+# Backoff base entre tentativas, em segundos
+BACKOFF_BASE = 1.0
+# (requisições, período em segundos) por rota
+ROUTE_LIMITS = {
+    "member_edit": (10, 10.0),
+    "member_kick": (5, 5.0),
+}
+
+# Marca "nick não alterado" (None significa remover o apelido)
+UNSET = object()
+
+
+class MemberOp:
+    """Alteração pendente de um membro, já com os pedidos juntados."""
+
+    def __init__(self, member_id):
+        self.member_id = member_id
+        self.seqs = []
+        self.add_roles = set()
+        self.remove_roles = set()
+        self.clear_roles = False
+        self.nick = UNSET
+        self.kick_reason = None
+        self.reason = None
+        self.futures = []
+
+    def merge(self, add_roles=(), remove_roles=(), clear_roles=False, nick=UNSET, kick=None, reason=None):
+        if clear_roles:
+            self.clear_roles = True
+            self.add_roles.clear()
+            self.remove_roles.clear()
+        for role_id in add_roles:
+            self.add_roles.add(role_id)
+            self.remove_roles.discard(role_id)
+        for role_id in remove_roles:
+            self.remove_roles.add(role_id)
+            self.add_roles.discard(role_id)
+        if nick is not UNSET:
+            self.nick = nick
+        if kick is not None:
+            self.kick_reason = kick
+        if reason is not None:
+            self.reason = reason
+
+    def edit_kwargs(self, member):
+        """Argumentos do member.edit que cobrem todas as alterações de cargo e nick."""
+        kwargs = {}
+        if self.clear_roles or self.add_roles or self.remove_roles:
+            current = {role.id for role in member.roles if not role.is_default()}
+            base = set() if self.clear_roles else current
+            wanted = (base | self.add_roles) - self.remove_roles
+            if wanted != current:
+                kwargs["roles"] = [discord.Object(id=role_id) for role_id in sorted(wanted)]
+        if self.nick is not UNSET and self.nick != member.nick:
+            kwargs["nick"] = self.nick
+        return kwargs
+
+
+def _op_record(seq, member_id, add_roles, remove_roles, clear_roles, nick, kick, reason):
+    record = {"seq": seq, "member_id": member_id}
+    if add_roles:
+        record["add_roles"] = list(add_roles)
+    if remove_roles:
+        record["remove_roles"] = list(remove_roles)
+    if clear_roles:
+        record["clear_roles"] = True
+    if nick is not UNSET:
+        record["nick"] = nick
+    if kick is not None:
+        record["kick"] = kick
+    if reason is not None:
+        record["reason"] = reason
+    return record
+
+
+class RouteBucket:
+    """Balde simples de requisições por rota, com pausa quando a API devolve Retry-After."""
+
+    def __init__(self, limit, period):
+        self.limit = limit
+        self.period = period
+        self._sent = []
+        self._paused_until = 0.0
+        self._lock = asyncio.Lock()
+
+    def pause(self, seconds):
+        self._paused_until = max(self._paused_until, time.monotonic() + seconds)
+
+    async def acquire(self):
+        async with self._lock:
+            while True:
+                now = time.monotonic()
+                if now < self._paused_until:
+                    await asyncio.sleep(self._paused_until - now)
+                    continue
+                self._sent = [sent for sent in self._sent if now - sent < self.period]
+                if len(self._sent) < self.limit:
+                    self._sent.append(now)
+                    return
+                await asyncio.sleep(self.period - (now - self._sent[0]))
+
+
+class MemberOpQueue:
+    def __init__(self, journal_path="member_ops.log"):
+        self.journal_path = journal_path
+        self.applied = 0
+        self.failed = 0
+        self.retries = 0
+        self._get_guild = None
+        self._pending = {}
+        self._queue = asyncio.Queue()
+        self._worker_task = None
+        self._seq = 0
+        self._buckets = {route: RouteBucket(*limits) for route, limits in ROUTE_LIMITS.items()}
+
+    def pending_count(self):
+        return len(self._pending)
+
+    def start(self, get_guild):
+        """Inicia os workers e retoma os pedidos que ficaram no journal."""
+        if self._worker_task is not None:
+            return
+        self._get_guild = get_guild
+        for record in self._load_journal():
+            self._enqueue(record, journal=False)
+        self._compact_journal()
+        # Um único worker: as alterações de um mesmo membro nunca são aplicadas fora de ordem.
+        # O ritmo é dado pelos baldes de cada rota, não pelo número de workers.
+        self._worker_task = asyncio.create_task(self._worker())
+        if self._pending:
+            print(f"[LOG] Retomando {len(self._pending)} alterações de membros pendentes.")
+
+    def submit(self, member_id, add_roles=(), remove_roles=(), clear_roles=False, nick=UNSET, kick=None, reason=None):
+        """Agenda uma alteração e retorna um Future resolvido quando ela for aplicada."""
+        self._seq += 1
+        record = _op_record(self._seq, member_id, add_roles, remove_roles, clear_roles, nick, kick, reason)
+        future = asyncio.get_running_loop().create_future()
+        self._enqueue(record, future=future)
+        return future
+
+    def _enqueue(self, record, future=None, journal=True):
+        if journal:
+            self._append_journal(record)
+        self._seq = max(self._seq, record["seq"])
+        member_id = record["member_id"]
+        op = self._pending.get(member_id)
+        if op is None:
+            op = self._pending[member_id] = MemberOp(member_id)
+            self._queue.put_nowait(member_id)
+        op.seqs.append(record["seq"])
+        op.merge(
+            add_roles=record.get("add_roles", ()),
+            remove_roles=record.get("remove_roles", ()),
+            clear_roles=record.get("clear_roles", False),
+            nick=record.get("nick", UNSET),
+            kick=record.get("kick"),
+            reason=record.get("reason"),
+        )
+        if future is not None:
+            op.futures.append(future)
+
+    async def _worker(self):
+        while True:
+            member_id = await self._queue.get()
+            # A partir daqui novos pedidos para o membro entram numa nova alteração
+            op = self._pending.pop(member_id, None)
+            if op is None:
+                continue
+            try:
+                await self._apply_with_retry(op)
+            except Exception as e:
+                self.failed += 1
+                print(f"[ERRO] Falha ao alterar o membro {member_id}: {e}")
+                self._resolve(op, error=e)
+            else:
+                self.applied += 1
+                self._resolve(op)
+
+    def _resolve(self, op, error=None):
+        self._append_journal({"done": op.seqs})
+        for future in op.futures:
+            if future.done():
+                continue
+            if error is not None:
+                future.set_exception(error)
+            else:
+                future.set_result(None)
+
+    async def _apply_with_retry(self, op):
+        for attempt in range(1, MAX_ATTEMPTS + 1):
+            try:
+                return await self._apply(op)
+            except discord.HTTPException as e:
+                if e.status == 429:
+                    HTTP_429.inc()
+                retryable = e.status == 429 or e.status >= 500
+                if not retryable or attempt == MAX_ATTEMPTS:
+                    raise
+                self.retries += 1
+                delay = BACKOFF_BASE * 2 ** (attempt - 1) + random.uniform(0, BACKOFF_BASE)
+                retry_after = e.response.headers.get("Retry-After") if e.response is not None else None
+                if retry_after:
+                    delay = max(delay, float(retry_after))
+                    for bucket in self._buckets.values():
+                        bucket.pause(float(retry_after))
+                print(f"[LOG] Erro {e.status} ao alterar o membro {op.member_id}, nova tentativa em {delay:.1f}s.")
+                await asyncio.sleep(delay)
+
+    async def _apply(self, op):
+        guild = self._get_guild()
+        if guild is None:
+            raise RuntimeError("Servidor do Discord indisponível")
+        member = guild.get_member(op.member_id)
+        if member is None:
+            member = await guild.fetch_member(op.member_id)
+
+        if op.kick_reason is not None:
+            # Quem é expulso perde cargos e apelido, então o PATCH seria redundante
+            await self._buckets["member_kick"].acquire()
+            await member.kick(reason=op.kick_reason)
+            return
+
+        kwargs = op.edit_kwargs(member)
+        if kwargs:
+            await self._buckets["member_edit"].acquire()
+            await member.edit(reason=op.reason, **kwargs)
+
+    def _load_journal(self):
+        records = {}
+        try:
+            with open(self.journal_path, encoding="utf-8") as f:
+                for line in f:
+                    try:
+                        record = json.loads(line)
+                    except ValueError:
+                        continue  # Linha incompleta de um crash no meio da escrita
+                    if "done" in record:
+                        for seq in record["done"]:
+                            records.pop(seq, None)
+                    else:
+                        records[record["seq"]] = record
+        except FileNotFoundError:
+            pass
+        return [records[seq] for seq in sorted(records)]
+
+    def _append_journal(self, record):
+        try:
+            with open(self.journal_path, "a", encoding="utf-8") as f:
+                f.write(json.dumps(record, separators=(",", ":")) + "\n")
+        except OSError as e:
+            print(f"[ERRO] Não foi possível gravar o journal de membros: {e}")
+
+    def _compact_journal(self):
+        # Reescreve o journal só com o que ainda está pendente
+        records = []
+        for op in self._pending.values():
+            record = _op_record(
+                op.seqs[-1], op.member_id, sorted(op.add_roles), sorted(op.remove_roles),
+                op.clear_roles, op.nick, op.kick_reason, op.reason,
+            )
+            records.append(record)
+            op.seqs = [record["seq"]]
+        tmp_path = self.journal_path + ".tmp"
+        try:
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                for record in records:
+                    f.write(json.dumps(record, separators=(",", ":")) + "\n")
+            os.replace(tmp_path, self.journal_path)
+        except OSError as e:
+            print(f"[ERRO] Não foi possível compactar o journal de membros: {e}")
@@ -0,0 +1,167 @@
+"""Métricas no formato texto do Prometheus, servidas em /metrics.
+
+Implementação mínima sem dependências: contadores e histogramas são só
+somas em memória (o custo no caminho quente é uma soma e um bisect), e as
+métricas de outros módulos são lidas por callbacks apenas quando /metrics é
+consultado.
+"""
+
+import bisect
+import logging
+
+# Limites padrão dos histogramas de latência, em segundos
+LATENCY_BUCKETS = (0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, 120, 300)
+
+
+def _format_labels(names, values):
+    if not names:
+        return ""
+    pairs = ",".join(f'{name}="{_escape(str(value))}"' for name, value in zip(names, values))
+    return "{" + pairs + "}"
+
+
+def _escape(value):
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+class Counter:
+    kind = "counter"
+
+    def __init__(self, name, help_text, labels=()):
+        self.name = name
+        self.help_text = help_text
+        self.labels = tuple(labels)
+        # Sem labels, o contador aparece com 0 desde o início
+        self._values = {} if self.labels else {(): 0}
+
+    def inc(self, amount=1, *label_values):
+        self._values[label_values] = self._values.get(label_values, 0) + amount
+
+    def samples(self):
+        for label_values, value in self._values.items():
+            yield self.name, _format_labels(self.labels, label_values), value
+
+
+class Histogram:
+    kind = "histogram"
+
+    def __init__(self, name, help_text, labels=(), buckets=LATENCY_BUCKETS):
+        self.name = name
+        self.help_text = help_text
+        self.labels = tuple(labels)
+        self.buckets = tuple(buckets)
+        # label_values -> [contagem por bucket..., +Inf], soma
+        self._values = {}
+
+    def observe(self, value, *label_values):
+        state = self._values.get(label_values)
+        if state is None:
+            state = self._values[label_values] = [[0] * (len(self.buckets) + 1), 0.0]
+        state[0][bisect.bisect_left(self.buckets, value)] += 1
+        state[1] += value
+
+    def samples(self):
+        for label_values, (counts, total) in self._values.items():
+            cumulative = 0
+            for bound, count in zip(self.buckets + ("+Inf",), counts):
+                cumulative += count
+                labels = _format_labels(self.labels + ("le",), label_values + (bound,))
+                yield f"{self.name}_bucket", labels, cumulative
+            labels = _format_labels(self.labels, label_values)
+            yield f"{self.name}_sum", labels, total
+            yield f"{self.name}_count", labels, cumulative
+
+
+class CallbackMetric:
+    """Métrica cujo valor é lido de outro objeto só na hora da coleta."""
+
+    def __init__(self, name, help_text, kind, callback, labels=()):
+        self.name = name
+        self.help_text = help_text
+        self.kind = kind
+        self.labels = tuple(labels)
+        # callback retorna um número, ou um dict {valores dos labels: número}
+        self.callback = callback
+
+    def samples(self):
+        value = self.callback()
+        if isinstance(value, dict):
+            for label_values, sample in value.items():
+                if sample is not None:
+                    yield self.name, _format_labels(self.labels, label_values), sample
+        elif value is not None:
+            yield self.name, "", value
+
+
+class Registry:
+    def __init__(self):
+        self._metrics = []
+
+    def register(self, metric):
+        self._metrics.append(metric)
+        return metric
+
+    def counter(self, name, help_text, labels=()):
+        return self.register(Counter(name, help_text, labels))
+
+    def histogram(self, name, help_text, labels=(), buckets=LATENCY_BUCKETS):
+        return self.register(Histogram(name, help_text, labels, buckets))
+
+    def gauge_callback(self, name, help_text, callback, labels=()):
+        return self.register(CallbackMetric(name, help_text, "gauge", callback, labels))
+
+    def counter_callback(self, name, help_text, callback, labels=()):
+        return self.register(CallbackMetric(name, help_text, "counter", callback, labels))
+
+    def render(self):
+        lines = []
+        for metric in self._metrics:
+            try:
+                samples = list(metric.samples())
+            except Exception as e:
+                print(f"[ERRO] Falha ao coletar a métrica {metric.name}: {e}")
+                continue
+            lines.append(f"# HELP {metric.name} {metric.help_text}")
+            lines.append(f"# TYPE {metric.name} {metric.kind}")
+            for name, labels, value in samples:
+                lines.append(f"{name}{labels} {value}")
+        return "\n".join(lines) + "\n"
+
+
+def hit_ratio(hits, misses):
+    total = hits + misses
+    return hits / total if total else None
+
+
+class RateLimitLogCounter(logging.Handler):
+    """Conta os 429 que o discord.py registra no log (ele mesmo espera e repete a requisição)."""
+
+    def __init__(self, counter):
+        super().__init__(level=logging.WARNING)
+        self.counter = counter
+
+    def emit(self, record):
+        if "rate limited" in record.getMessage():
+            self.counter.inc()
+
+
+registry = Registry()
+
+COMMAND_SECONDS = registry.histogram(
+    "regear_command_duration_seconds", "Tempo entre a interação e o fim do comando slash", labels=("command",))
+REPORT_JOB_SECONDS = registry.histogram(
+    "regear_report_job_duration_seconds", "Duração dos jobs de relatório em segundo plano", labels=("status",))
+MESSAGES_PROCESSED = registry.counter(
+    "regear_messages_processed_total", "Mensagens processadas pelos ledgers de regear", labels=("source",))
+HISTORY_PAGES = registry.counter(
+    "regear_history_pages_total", "Páginas de histórico buscadas na API do Discord")
+HTTP_429 = registry.counter(
+    "regear_discord_429_total", "Respostas 429 (rate limit) recebidas da API do Discord")
+ALBION_API_SECONDS = registry.histogram(
+    "regear_albion_api_duration_seconds", "Duração das chamadas à API do Albion", labels=("endpoint",))
+ALBION_API_ERRORS = registry.counter(
+    "regear_albion_api_errors_total", "Erros nas chamadas à API do Albion", labels=("endpoint",))
+
+
+def install_rate_limit_counter():
+    logging.getLogger("discord.http").addHandler(RateLimitLogCounter(HTTP_429))
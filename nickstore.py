@@ -0,0 +1,114 @@
+"""Registro persistente dos nicks do Albion por usuário do Discord.
+
+Os registros ficam num log append-only (registrados.txt), uma linha por
+alteração: "<user_id>;<nick>" registra e "<user_id>;" remove. O arquivo é
+lido na primeira consulta e mantido em dois dicionários (usuário -> nick e
+nick em casefold -> usuário), então as consultas são O(1). Quando o log
+acumula muitas linhas obsoletas ele é compactado.
+
+O caminho vem de NICKS_PATH, para o log ficar num disco que sobreviva aos
+redeploys (fora do checkout do repositório).
+"""
+
+import os
+
+NICKS_PATH = os.environ.get("NICKS_PATH", "registrados.txt")
+
+
+class NickStore:
+    def __init__(self, path=NICKS_PATH):
+        self.path = path
+        self._by_user = None
+        self._by_nick = None
+        self._log_lines = 0
+
+    def _ensure_loaded(self):
+        if self._by_user is not None:
+            return
+        by_user = {}
+        lines = 0
+        try:
+            with open(self.path, encoding="utf-8") as f:
+                for line in f:
+                    line = line.rstrip("\n")
+                    if not line:
+                        continue
+                    user_id, sep, nick = line.partition(";")
+                    if not sep or not user_id.isdigit():
+                        print(f"[ERRO] Linha inválida em {self.path}: {line!r}")
+                        continue
+                    lines += 1
+                    if nick:
+                        by_user[int(user_id)] = nick
+                    else:
+                        by_user.pop(int(user_id), None)
+        except FileNotFoundError:
+            pass
+        self._by_user = by_user
+        self._by_nick = {nick.casefold(): user_id for user_id, nick in by_user.items()}
+        self._log_lines = lines
+        if lines > 2 * len(by_user) + 100:
+            self._compact()
+
+    def __len__(self):
+        self._ensure_loaded()
+        return len(self._by_user)
+
+    def nick_of(self, user_id):
+        self._ensure_loaded()
+        return self._by_user.get(user_id)
+
+    def owner_of(self, nick):
+        self._ensure_loaded()
+        return self._by_nick.get(nick.casefold())
+
+    def items(self):
+        self._ensure_loaded()
+        return list(self._by_user.items())
+
+    def register(self, user_id, nick):
+        """Registra o nick para o usuário. Retorna False se o nick já pertence a outro usuário."""
+        self._ensure_loaded()
+        owner = self._by_nick.get(nick.casefold())
+        if owner is not None and owner != user_id:
+            return False
+        # Grava no disco antes de alterar a memória: se a escrita falhar, nada muda
+        self._append(f"{user_id};{nick}")
+        previous = self._by_user.get(user_id)
+        if previous is not None:
+            self._by_nick.pop(previous.casefold(), None)
+        self._by_user[user_id] = nick
+        self._by_nick[nick.casefold()] = user_id
+        return True
+
+    def unregister(self, user_id):
+        """Remove o registro do usuário. Retorna o nick removido, ou None."""
+        self._ensure_loaded()
+        nick = self._by_user.get(user_id)
+        if nick is None:
+            return None
+        self._append(f"{user_id};")
+        del self._by_user[user_id]
+        self._by_nick.pop(nick.casefold(), None)
+        return nick
+
+    def _append(self, line):
+        with open(self.path, "a", encoding="utf-8") as f:
+            f.write(line + "\n")
+            f.flush()
+            os.fsync(f.fileno())
+        self._log_lines += 1
+
+    def _compact(self):
+        tmp_path = self.path + ".tmp"
+        try:
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                for user_id, nick in self._by_user.items():
+                    f.write(f"{user_id};{nick}\n")
+                f.flush()
+                os.fsync(f.fileno())
+            os.replace(tmp_path, self.path)
+        except OSError as e:
+            print(f"[ERRO] Não foi possível compactar {self.path}: {e}")
+            return
+        self._log_lines = len(self._by_user)
@@ -0,0 +1,182 @@
+"""Tabela de preços dos itens das builds, para estimar o custo de um regear.
+
+Os itens do catálogo têm nomes em português ("Cajado Runico"), então os
+preços dependem de um mapeamento nome -> ID do item no jogo (item_ids.json,
+ex: {"Arma/Cajado Runico": "T8_2H_SHAPESHIFTER_KEEPER"}). A chave leva a
+categoria do catálogo porque o mesmo nome é elmo e peitoral ("Soldado");
+uma chave só com o nome vale para qualquer categoria. O item_ids.json do
+repositório cobre os itens do builds.xml em T8.0; itens sem ID ficam sem
+preço.
+
+Todos os IDs são buscados de uma vez na API do Albion Online Data Project
+(em lotes de até MAX_IDS_PER_REQUEST por requisição), e a tabela fica em
+cache em disco (prices.json). Passado o TTL, a tabela antiga continua sendo
+usada enquanto uma atualização roda em segundo plano, como na lista de
+membros da guilda. O relatório nunca faz requisições por item.
+"""
+
+import asyncio
+import hashlib
+import json
+import os
+import time
+
+from http_client import get_session
+from metrics import ALBION_API_ERRORS, ALBION_API_SECONDS
+
+PRICES_API_BASE = os.environ.get("PRICES_API_BASE", "https://west.albion-online-data.com/api/v2/stats/prices")
+ITEM_IDS_PATH = os.environ.get("ITEM_IDS_PATH", "item_ids.json")
+PRICES_CACHE_PATH = os.environ.get("PRICES_CACHE_PATH", "prices.json")
+# Tempo em que a tabela é considerada atual, em segundos
+TTL_SECONDS = 6 * 3600
+# IDs por requisição (a API recebe os IDs na URL)
+MAX_IDS_PER_REQUEST = 100
+
+
+class PriceTable:
+    __slots__ = ("prices", "fetched_at", "mapping_version")
+
+    def __init__(self, prices, fetched_at, mapping_version):
+        # nome do item no catálogo -> preço em prata
+        self.prices = prices
+        # Horário (time.time) da busca, para o TTL sobreviver a restarts
+        self.fetched_at = fetched_at
+        self.mapping_version = mapping_version
+
+    def __len__(self):
+        return len(self.prices)
+
+    def get(self, item, category=None):
+        if category is not None:
+            price = self.prices.get(f"{category}/{item}")
+            if price is not None:
+                return price
+        return self.prices.get(item)
+
+    @property
+    def version(self):
+        return f"{self.mapping_version}:{self.fetched_at:.0f}"
+
+
+def best_prices(rows):
+    """ID do item -> menor preço de venda positivo entre as cidades."""
+    best = {}
+    for row in rows:
+        price = row.get("sell_price_min") or 0
+        item_id = row.get("item_id")
+        if item_id and price > 0 and (item_id not in best or price < best[item_id]):
+            best[item_id] = price
+    return best
+
+
+class PriceClient:
+    def __init__(self, api_base=PRICES_API_BASE, item_ids_path=ITEM_IDS_PATH, cache_path=PRICES_CACHE_PATH,
+                 ttl=TTL_SECONDS):
+        self.api_base = api_base.rstrip("/")
+        self.item_ids_path = item_ids_path
+        self.cache_path = cache_path
+        self.ttl = ttl
+        self.fetches = 0
+        self._item_ids = None
+        self._mapping_version = None
+        self._table = None
+        self._inflight = None
+
+    def item_ids(self):
+        """Mapeamento nome -> ID do item, lido uma vez (vazio se o arquivo não existir)."""
+        if self._item_ids is None:
+            try:
+                with open(self.item_ids_path, "rb") as f:
+                    source = f.read()
+                self._item_ids = json.loads(source)
+            except FileNotFoundError:
+                source = b""
+                self._item_ids = {}
+            except ValueError as e:
+                print(f"[ERRO] {self.item_ids_path} inválido, custos desligados: {e}")
+                source = b""
+                self._item_ids = {}
+            self._mapping_version = hashlib.sha256(source).hexdigest()[:12]
+        return self._item_ids
+
+    @property
+    def enabled(self):
+        return bool(self.item_ids())
+
+    def _load_cache(self):
+        try:
+            with open(self.cache_path, encoding="utf-8") as f:
+                data = json.load(f)
+            return PriceTable(data["prices"], data["fetched_at"], data["mapping_version"])
+        except FileNotFoundError:
+            return None
+        except (OSError, ValueError, KeyError) as e:
+            print(f"[ERRO] Cache de preços ilegível, ignorando: {e}")
+            return None
+
+    def _write_cache(self, table):
+        tmp_path = self.cache_path + ".tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump({"prices": table.prices, "fetched_at": table.fetched_at,
+                       "mapping_version": table.mapping_version}, f, ensure_ascii=False)
+        os.replace(tmp_path, self.cache_path)
+
+    async def get(self):
+        """Tabela atual, ou None sem mapeamento de itens. Só espera a API se não houver nenhuma tabela."""
+        if not self.enabled:
+            return None
+        if self._table is None:
+            table = await asyncio.to_thread(self._load_cache)
+            if table is not None and table.mapping_version == self._mapping_version:
+                self._table = table
+        if self._table is None:
+            try:
+                return await self.refresh()
+            except Exception as e:
+                print(f"[ERRO] Não foi possível buscar os preços: {e}")
+                return None
+        if time.time() - self._table.fetched_at > self.ttl:
+            # Expirou: usa a tabela atual e atualiza em segundo plano
+            self._start_refresh()
+        return self._table
+
+    async def refresh(self):
+        # shield: quem cancelar a própria espera não cancela a requisição dos outros
+        return await asyncio.shield(self._start_refresh())
+
+    def _start_refresh(self):
+        if self._inflight is None or self._inflight.done():
+            self._inflight = asyncio.create_task(self._fetch())
+        return self._inflight
+
+    async def _fetch(self):
+        self.fetches += 1
+        item_ids = self.item_ids()
+        ids = sorted(set(item_ids.values()))
+        start = time.monotonic()
+        rows = []
+        try:
+            session = get_session()
+            for offset in range(0, len(ids), MAX_IDS_PER_REQUEST):
+                chunk = ",".join(ids[offset:offset + MAX_IDS_PER_REQUEST])
+                async with session.get(f"{self.api_base}/{chunk}.json") as response:
+                    response.raise_for_status()
+                    rows.extend(await response.json(content_type=None))
+        except Exception as e:
+            ALBION_API_ERRORS.inc(1, "prices")
+            if self._table is None:
+                raise
+            print(f"[ERRO] Falha ao atualizar os preços, usando a tabela anterior: {e}")
+            return self._table
+        finally:
+            ALBION_API_SECONDS.observe(time.monotonic() - start, "prices")
+
+        by_id = best_prices(rows)
+        prices = {name: by_id[item_id] for name, item_id in item_ids.items() if item_id in by_id}
+        self._table = PriceTable(prices, time.time(), self._mapping_version)
+        try:
+            await asyncio.to_thread(self._write_cache, self._table)
+        except OSError as e:
+            print(f"[ERRO] Não foi possível gravar o cache de preços: {e}")
+        print(f"[LOG] Tabela de preços atualizada: {len(prices)}/{len(item_ids)} itens com preço.")
+        return self._table
@@ -0,0 +1,59 @@
+"""Comparação entre a lista de membros da guilda no Albion e os membros do Discord.
+
+Tudo é feito com conjuntos/dicionários em memória (lista do Albion baixada
+uma vez e membros do cache do gateway), e o resultado é só a lista de
+alterações necessárias. Nenhuma chamada à API é feita por membro para
+descobrir o que mudou.
+"""
+
+from collections import namedtuple
+
+# Se a sincronização fosse remover o cargo de mais que essa fração dos membros, algo está errado na API
+MAX_REMOVAL_RATIO = 0.5
+
+DiscordMember = namedtuple("DiscordMember", ["id", "name", "nick", "has_role"])
+
+
+class RosterPlan:
+    def __init__(self):
+        self.remove_role = []
+        self.add_role = []
+        self.rename = {}
+
+    def __len__(self):
+        return len(self.remove_role) + len(self.add_role) + len(self.rename)
+
+    def summary(self):
+        return (
+            f"{len(self.remove_role)} cargos a remover, {len(self.add_role)} cargos a devolver, "
+            f"{len(self.rename)} nicks a corrigir"
+        )
+
+
+def plan_roster_changes(members, roster, registered):
+    """Calcula as alterações de cargo e nick.
+
+    members: DiscordMember de todos os membros do servidor
+    roster: Roster com os membros da guilda no Albion
+    registered: dicionário ID do usuário -> nick registrado
+    """
+    plan = RosterPlan()
+    for member in members:
+        registered_nick = registered.get(member.id)
+        # Nome no jogo: o registrado pelo /register, ou o nome exibido no Discord
+        game_name = roster.find(registered_nick or member.name)
+        if member.has_role:
+            if game_name is None:
+                plan.remove_role.append(member.id)
+            elif registered_nick is not None and member.nick != game_name:
+                plan.rename[member.id] = game_name
+        elif registered_nick is not None and game_name is not None:
+            plan.add_role.append(member.id)
+            if member.nick != game_name:
+                plan.rename[member.id] = game_name
+    return plan
+
+
+def is_suspicious(plan, role_holders):
+    """True se o plano removeria o cargo de membros demais (ex: API do Albion devolveu lista parcial)."""
+    return role_holders > 0 and len(plan.remove_role) > role_holders * MAX_REMOVAL_RATIO
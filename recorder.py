@@ -0,0 +1,97 @@
+"""Gravação dos eventos do gateway e das páginas de histórico que o bot recebe.
+
+Ativada pela variável RECORD_EVENTS (caminho do arquivo). O arquivo é um
+JSON por linha compactado em gzip; benchmarks/replay.py reproduz a gravação
+offline. Só os campos que o bot usa são guardados.
+"""
+
+import gzip
+import json
+import time
+
+from ledger import message_nick
+
+# Eventos gravados entre cada flush do gzip
+FLUSH_EVERY = 100
+
+
+def serialize_message(message):
+    return {
+        "id": message.id,
+        "c": message.channel.id,
+        "at": message.created_at.isoformat(),
+        "a": message_nick(message),
+        "bot": message.author.bot,
+        "t": message.content,
+        "f": [attachment.url for attachment in message.attachments],
+        "r": [[str(reaction.emoji), reaction.count] for reaction in message.reactions],
+    }
+
+
+def serialize_edit(data):
+    # Só o que o ledger lê de um RawMessageUpdateEvent
+    kept = {}
+    if "content" in data:
+        kept["content"] = data["content"]
+    if "attachments" in data:
+        kept["attachments"] = [{"url": attachment["url"]} for attachment in data["attachments"]]
+    if "author" in data:
+        kept["author"] = {key: data["author"].get(key) for key in ("username", "global_name")}
+    if data.get("interaction_metadata"):
+        user = data["interaction_metadata"].get("user") or {}
+        kept["interaction_metadata"] = {"user": {key: user.get(key) for key in ("id", "username", "global_name")}}
+    if data.get("member"):
+        kept["member"] = {"nick": data["member"].get("nick")}
+    return kept
+
+
+class EventRecorder:
+    def __init__(self, path):
+        self.path = path
+        self.events = 0
+        self._started = time.monotonic()
+        self._file = gzip.open(path, "at", encoding="utf-8")
+
+    def _write(self, kind, **fields):
+        fields["k"] = kind
+        fields["dt"] = round(time.monotonic() - self._started, 3)
+        self._file.write(json.dumps(fields, ensure_ascii=False, separators=(",", ":")) + "\n")
+        self.events += 1
+        if self.events % FLUSH_EVERY == 0:
+            self._file.flush()
+
+    def ready(self):
+        # Depois de um IDENTIFY os ledgers ficam stale (ver mark_all_stale)
+        self._write("ready")
+
+    def thread_created(self, channel_id):
+        self._write("thread", c=channel_id)
+
+    def message(self, message):
+        self._write("message", m=serialize_message(message))
+
+    def edit(self, channel_id, message_id, data, member_nick=None):
+        fields = {"c": channel_id, "id": message_id, "d": serialize_edit(data)}
+        invoker = (data.get("interaction_metadata") or {}).get("user")
+        if invoker and member_nick is not None:
+            # Apelido no servidor de quem usou o /morte, que o replay não tem como consultar
+            fields["n"] = member_nick(int(invoker["id"]))
+        self._write("edit", **fields)
+
+    def delete(self, channel_id, message_ids):
+        self._write("delete", c=channel_id, ids=list(message_ids))
+
+    def reaction(self, kind, channel_id, message_id, emoji=None, user_id=None, user_name=None):
+        self._write(kind, c=channel_id, id=message_id, e=emoji, u=user_id, n=user_name)
+
+    def review(self, channel_id, message_ids, status, user_id, user_name):
+        self._write("review", c=channel_id, ids=list(message_ids), s=status, u=user_id, n=user_name)
+
+    def history_page(self, channel_id, after_id, messages):
+        self._write("history", c=channel_id, after=after_id, m=[serialize_message(message) for message in messages])
+
+    def report(self, channel_id, created_at):
+        self._write("report", c=channel_id, at=created_at.isoformat())
+
+    def close(self):
+        self._file.close()
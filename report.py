@@ -0,0 +1,197 @@
+"""Montagem dos dados do relatório de regear a partir das mortes do ledger.
+
+Os arquivos são escritos linha a linha (csv com ';' e aspas onde precisa)
+direto num buffer temporário que só vai para o disco quando passa de
+SPOOL_MAX_SIZE, e podem ser compactados em gzip ou zip. Antes do Python
+3.11 o SpooledTemporaryFile não é um IOBase (nem o TextIOWrapper nem o
+discord.File o aceitam), então nessas versões o buffer é um arquivo
+temporário comum.
+"""
+
+import csv
+import datetime
+import gzip
+import io
+import tempfile
+import zipfile
+
+from approvals import PENDING, approval_from_reactions
+from catalog import SLOTS
+from matcher import matcher_for
+
+REPORT_HEADERS = [
+    "Data", "Nick", "Build", "Link", "Emoji", "Build_Registrada", "Build_Catalogo", "Confianca",
+    "Aprovado_Por", "Aprovado_Em", "Print_Repetida", "Morte_Confirmada",
+]
+PURCHASE_HEADERS = ["Categoria", "Item", "Quantidade"]
+# Com a tabela de preços: custo por item, total por categoria e total do regear
+PRICED_PURCHASE_HEADERS = PURCHASE_HEADERS + ["Preco_Unitario", "Custo"]
+# Relatório consolidado: mesmas colunas + o nome do tópico de regear
+BATCH_REPORT_HEADERS = REPORT_HEADERS + ["Regear"]
+
+# Tamanho a partir do qual o buffer do arquivo vai para o disco
+SPOOL_MAX_SIZE = 1024 * 1024
+# Limite de upload do Discord (sem boost), em bytes
+UPLOAD_LIMIT = 8 * 1024 * 1024
+COMPRESSIONS = ("auto", "none", "gzip", "zip")
+
+
+def _local_time(moment):
+    return (moment - datetime.timedelta(hours=3)).strftime('%Y-%m-%d %H:%M:%S')
+
+
+def build_report(entries, catalog, approvals=None, links=None, duplicates=None, confirmations=None):
+    """Retorna (report_data, purchase_data) para as mortes em `entries`.
+
+    approvals é o índice do ledger (message_id -> Approval); sem ele, o
+    estado vem das reações de cada morte. links (message_id -> link) troca
+    o link do CDN pelo da print arquivada. duplicates (message_id -> texto)
+    aponta as outras mortes com a mesma print. confirmations (message_id ->
+    link do killboard) marca as mortes achadas no feed de eventos do Albion;
+    sem ele, a coluna fica "-".
+    """
+    matcher = matcher_for(catalog)
+    report_data = []
+    purchase_data = {key: {} for key in SLOTS}
+
+    for entry in entries:
+        timestamp = _local_time(entry.created_at)
+        if approvals is None:
+            approval = approval_from_reactions(entry.reactions)
+        else:
+            approval = approvals.get(entry.message_id)
+        emoji_status = approval.status if approval else PENDING
+        approved_by = (approval.user_name or "-") if approval else "-"
+        approved_at = _local_time(approval.at) if approval and approval.at else "-"
+
+        # Reconhece a build mesmo com acento, tag Core ou pequenos erros de digitação
+        match = matcher.match(entry.content)
+        build_registrada = "Sim" if match.build else "Não"
+        build_catalogo = match.build or "-"
+        confianca = f"{match.confidence:.2f}"
+        link = links.get(entry.message_id, entry.link) if links else entry.link
+        report_data.append([timestamp, entry.nick, entry.content, link, emoji_status,
+                            build_registrada, build_catalogo, confianca, approved_by, approved_at,
+                            duplicates.get(entry.message_id, "-") if duplicates else "-",
+                            confirmations.get(entry.message_id, "Não") if confirmations is not None else "-"])
+
+        if match.build:
+            for category, item in catalog.builds[match.build].items():
+                if item and item != "-":
+                    purchase_data[category][item] = purchase_data[category].get(item, 0) + 1
+
+    report_data.sort(key=lambda x: x[0])
+    return report_data, purchase_data
+
+
+def merge_reports(reports):
+    """Junta vários (nome do regear, report_data, purchase_data) num único relatório."""
+    merged_rows = []
+    merged_purchase = {key: {} for key in SLOTS}
+    for name, report_data, purchase_data in reports:
+        merged_rows.extend(row + [name] for row in report_data)
+        for category, items in purchase_data.items():
+            target = merged_purchase.setdefault(category, {})
+            for item, count in items.items():
+                target[item] = target.get(item, 0) + count
+    merged_rows.sort(key=lambda x: x[0])
+    return merged_rows, merged_purchase
+
+
+def iter_report_rows(report_data, headers=REPORT_HEADERS):
+    yield headers
+    yield from report_data
+
+
+def iter_purchase_rows(purchase_data, prices=None):
+    """Linhas do relatório de compra; com `prices` (PriceTable), também o custo em prata."""
+    if prices is None:
+        yield PURCHASE_HEADERS
+        for category, items in purchase_data.items():
+            for item, count in items.items():
+                yield [category, item, count]
+        return
+
+    yield PRICED_PURCHASE_HEADERS
+    total_count = total_cost = 0
+    for category, items in purchase_data.items():
+        category_count = category_cost = 0
+        for item, count in items.items():
+            price = prices.get(item, category)
+            cost = price * count if price is not None else None
+            category_count += count
+            category_cost += cost or 0
+            yield [category, item, count, price if price is not None else "-", cost if cost is not None else "-"]
+        if items:
+            yield [category, "Total", category_count, "", category_cost]
+        total_count += category_count
+        total_cost += category_cost
+    # Itens sem preço ficam fora dos totais
+    yield ["Total", "", total_count, "", total_cost]
+
+
+def report_sources(report_data, purchase_data, headers=REPORT_HEADERS, prices=None):
+    """Lista de (nome do arquivo, função que gera as linhas) dos relatórios de um regear."""
+    return [
+        ("relatorio.csv", lambda: iter_report_rows(report_data, headers)),
+        ("relatorio_compra.csv", lambda: iter_purchase_rows(purchase_data, prices)),
+    ]
+
+
+def _spool():
+    if issubclass(tempfile.SpooledTemporaryFile, io.IOBase):
+        return tempfile.SpooledTemporaryFile(max_size=SPOOL_MAX_SIZE)
+    return tempfile.TemporaryFile()
+
+
+def _write_csv(stream, rows):
+    text = io.TextIOWrapper(stream, encoding="utf-8", newline="")
+    csv.writer(text, delimiter=";").writerows(rows)
+    text.flush()
+    text.detach()  # Não fecha o stream de baixo
+
+
+def _size(fileobj):
+    size = fileobj.seek(0, io.SEEK_END)
+    fileobj.seek(0)
+    return size
+
+
+def close_files(files):
+    for _, fileobj in files:
+        fileobj.close()
+
+
+def write_report_files(sources, compression="auto"):
+    """Escreve os relatórios e retorna [(nome, arquivo)] prontos para upload.
+
+    "auto" só compacta (zip) quando os arquivos somados passam do limite de upload.
+    """
+    if compression == "auto":
+        files = write_report_files(sources, "none")
+        if sum(_size(fileobj) for _, fileobj in files) <= UPLOAD_LIMIT:
+            return files
+        close_files(files)
+        compression = "zip"
+
+    if compression == "zip":
+        spool = _spool()
+        with zipfile.ZipFile(spool, "w", compression=zipfile.ZIP_DEFLATED) as archive:
+            for filename, rows in sources:
+                with archive.open(filename, "w") as member:
+                    _write_csv(member, rows())
+        spool.seek(0)
+        return [("relatorio.zip", spool)]
+
+    files = []
+    for filename, rows in sources:
+        spool = _spool()
+        if compression == "gzip":
+            with gzip.GzipFile(filename=filename, mode="wb", fileobj=spool) as compressed:
+                _write_csv(compressed, rows())
+            filename += ".gz"
+        else:
+            _write_csv(spool, rows())
+        spool.seek(0)
+        files.append((filename, spool))
+    return files
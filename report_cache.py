@@ -0,0 +1,127 @@
+"""Cache dos relatórios gerados, endereçado pelo conteúdo de que dependem.
+
+A chave é o sha256 do estado do tópico (ID do canal, última mensagem,
+versões das mortes e das aprovações no ledger atual), da versão do catálogo
+e do formato dos arquivos. Se nada disso mudou, o relatório seria idêntico:
+o pedido repetido recebe o relatório já enviado em vez de gerar e subir os
+arquivos de novo.
+
+Cada relatório fica em REPORT_CACHE_DIR/<chave>/ (arquivos + meta.json).
+Pedidos simultâneos para a mesma chave compartilham uma única geração.
+"""
+
+import asyncio
+import hashlib
+import json
+import os
+import shutil
+import time
+
+REPORT_CACHE_DIR = os.environ.get("REPORT_CACHE_DIR", "report_cache")
+# Relatórios guardados em disco antes de apagar os mais antigos
+MAX_ENTRIES = 50
+
+META_FILE = "meta.json"
+
+
+def report_key(channel_id, ledger, catalog, variant=()):
+    """Chave do relatório de um tópico. `variant` distingue formatos (colunas, compressão)."""
+    state = [
+        channel_id, ledger.last_message_id, ledger.epoch, ledger.entries_version, ledger.approvals_version,
+        catalog.version, list(variant),
+    ]
+    return hashlib.sha256(json.dumps(state, separators=(",", ":")).encode()).hexdigest()
+
+
+class CachedReport:
+    def __init__(self, key, rows, message_url, filenames, created_at):
+        self.key = key
+        self.rows = rows
+        # Mensagem do canal de relatórios com os arquivos (None se não foi enviada)
+        self.message_url = message_url
+        self.filenames = filenames
+        self.created_at = created_at
+
+    def to_json(self):
+        return {"rows": self.rows, "message_url": self.message_url, "files": self.filenames, "created_at": self.created_at}
+
+
+class ReportCache:
+    def __init__(self, directory=REPORT_CACHE_DIR, max_entries=MAX_ENTRIES):
+        self.directory = directory
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+        self._inflight = {}
+
+    def _path(self, key, *parts):
+        return os.path.join(self.directory, key, *parts)
+
+    def get(self, key):
+        try:
+            with open(self._path(key, META_FILE), encoding="utf-8") as f:
+                data = json.load(f)
+            return CachedReport(key, data["rows"], data["message_url"], data["files"], data["created_at"])
+        except FileNotFoundError:
+            return None
+        except (OSError, ValueError, KeyError) as e:
+            print(f"[ERRO] Relatório em cache {key[:12]} ilegível, ignorando: {e}")
+            return None
+
+    def file_paths(self, report):
+        return [(filename, self._path(report.key, filename)) for filename in report.filenames]
+
+    def store(self, key, files, rows, message_url):
+        """Guarda os arquivos já escritos (nome, arquivo aberto). Roda fora do event loop."""
+        directory = self._path(key)
+        tmp_directory = directory + ".tmp"
+        shutil.rmtree(tmp_directory, ignore_errors=True)
+        os.makedirs(tmp_directory)
+        for filename, fileobj in files:
+            fileobj.seek(0)
+            with open(os.path.join(tmp_directory, filename), "wb") as f:
+                shutil.copyfileobj(fileobj, f)
+            fileobj.seek(0)
+        report = CachedReport(key, rows, message_url, [filename for filename, _ in files], time.time())
+        self._write_meta(tmp_directory, report)
+        shutil.rmtree(directory, ignore_errors=True)
+        os.replace(tmp_directory, directory)
+        self._evict()
+        return report
+
+    def update_message(self, report, message_url):
+        report.message_url = message_url
+        self._write_meta(self._path(report.key), report)
+
+    def _write_meta(self, directory, report):
+        tmp_path = os.path.join(directory, META_FILE + ".tmp")
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(report.to_json(), f)
+        os.replace(tmp_path, os.path.join(directory, META_FILE))
+
+    def _evict(self):
+        try:
+            keys = [name for name in os.listdir(self.directory) if not name.endswith(".tmp")]
+        except OSError:
+            return
+        if len(keys) <= self.max_entries:
+            return
+        keys.sort(key=lambda name: os.path.getmtime(os.path.join(self.directory, name)))
+        for name in keys[:len(keys) - self.max_entries]:
+            shutil.rmtree(os.path.join(self.directory, name), ignore_errors=True)
+
+    async def get_or_create(self, key, create):
+        """Relatório da chave: do cache, da geração em andamento ou de `create()` (uma vez só)."""
+        report = await asyncio.to_thread(self.get, key)
+        if report is not None:
+            self.hits += 1
+            return report, True
+        task = self._inflight.get(key)
+        if task is None:
+            self.misses += 1
+            task = self._inflight[key] = asyncio.create_task(create())
+            task.add_done_callback(lambda _: self._inflight.pop(key, None))
+            # Quem pediu primeiro é quem gera; os demais recebem o mesmo resultado
+            return await asyncio.shield(task), False
+        self.hits += 1
+        return await asyncio.shield(task), True
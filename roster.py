@@ -0,0 +1,110 @@
+"""Cliente assíncrono e com cache da lista de membros da guilda no Albion Online.
+
+A lista é baixada uma vez e reaproveitada por TTL_SECONDS. Quando expira, o
+valor antigo continua sendo servido enquanto uma atualização roda em segundo
+plano, e várias consultas simultâneas compartilham a mesma requisição
+(single-flight). Os nomes ficam num dicionário, então checar se alguém está
+na guilda é O(1).
+"""
+
+import asyncio
+import time
+
+from http_client import get_session
+from metrics import ALBION_API_ERRORS, ALBION_API_SECONDS
+
+# Tempo em que a lista é considerada atual, em segundos
+TTL_SECONDS = 300
+# Intervalo mínimo entre atualizações forçadas por um nick não encontrado
+MISS_REFRESH_SECONDS = 60
+
+
+class Roster:
+    __slots__ = ("members", "by_name", "fetched_at")
+
+    def __init__(self, members, fetched_at):
+        self.members = members
+        # Índice case-insensitive: nome em casefold -> nome oficial no jogo
+        self.by_name = {member["Name"].casefold(): member["Name"] for member in members}
+        self.fetched_at = fetched_at
+
+    def __len__(self):
+        return len(self.by_name)
+
+    def __contains__(self, nick):
+        return nick.casefold() in self.by_name
+
+    def find(self, nick):
+        """Nome oficial do jogador na guilda, ou None."""
+        return self.by_name.get(nick.casefold())
+
+    def names(self):
+        return set(self.by_name.values())
+
+
+class RosterClient:
+    def __init__(self, url, ttl=TTL_SECONDS):
+        self.url = url
+        self.ttl = ttl
+        self.fetches = 0
+        # Consultas servidas do cache / que precisaram esperar a API
+        self.hits = 0
+        self.misses = 0
+        self._roster = None
+        self._inflight = None
+
+    def _age(self):
+        return time.monotonic() - self._roster.fetched_at
+
+    async def get(self, max_age=None):
+        """Retorna a lista de membros, atualizando se for mais velha que `max_age` (padrão: TTL)."""
+        max_age = self.ttl if max_age is None else max_age
+        if self._roster is None:
+            self.misses += 1
+            return await self.refresh()
+        if self._age() > max_age:
+            if max_age < self.ttl:
+                # Pedido explícito de dados recentes: espera a atualização
+                self.misses += 1
+                return await self.refresh()
+            # Expirou: serve o valor atual e atualiza em segundo plano
+            self._start_refresh()
+        self.hits += 1
+        return self._roster
+
+    async def find(self, nick):
+        """Procura o nick na guilda; em caso de falha, força uma atualização (com limite de frequência)."""
+        roster = await self.get()
+        name = roster.find(nick)
+        if name is None and self._age() > MISS_REFRESH_SECONDS:
+            roster = await self.get(max_age=MISS_REFRESH_SECONDS)
+            name = roster.find(nick)
+        return name
+
+    async def refresh(self):
+        # shield: quem cancelar a própria espera não cancela a requisição dos outros
+        return await asyncio.shield(self._start_refresh())
+
+    def _start_refresh(self):
+        if self._inflight is None or self._inflight.done():
+            self._inflight = asyncio.create_task(self._fetch())
+        return self._inflight
+
+    async def _fetch(self):
+        self.fetches += 1
+        start = time.monotonic()
+        try:
+            async with get_session().get(self.url) as response:
+                response.raise_for_status()
+                members = await response.json(content_type=None)
+        except Exception as e:
+            ALBION_API_ERRORS.inc(1, "guild_members")
+            if self._roster is None:
+                raise
+            print(f"[ERRO] Falha ao atualizar a lista de membros, usando a anterior: {e}")
+            return self._roster
+        finally:
+            ALBION_API_SECONDS.observe(time.monotonic() - start, "guild_members")
+        self._roster = Roster(members, time.monotonic())
+        print(f"[LOG] Lista de membros da guilda atualizada: {len(self._roster)} membros.")
+        return self._roster
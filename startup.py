@@ -0,0 +1,64 @@
+"""Medidas da inicialização: tempo até cada etapa e memória residente.
+
+O tempo é contado desde o início do processo (lido de /proc), então inclui
+o próprio interpretador e os imports. Fora do Linux, conta desde o import
+deste módulo, que deve ser o primeiro do main.py.
+"""
+
+import os
+import time
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+_IMPORTED_AT = time.monotonic()
+
+# etapa -> segundos desde o início do processo, na ordem em que foram marcadas
+phases = {}
+
+
+def process_uptime():
+    """Segundos desde o início do processo."""
+    try:
+        with open("/proc/self/stat") as f:
+            # O nome do processo pode ter espaços, então os campos começam depois do ")"
+            fields = f.read().rsplit(")", 1)[1].split()
+        started = int(fields[19]) / os.sysconf("SC_CLK_TCK")
+        with open("/proc/uptime") as f:
+            uptime = float(f.read().split()[0])
+        return max(uptime - started, 0.0)
+    except (OSError, ValueError, IndexError):
+        return time.monotonic() - _IMPORTED_AT
+
+
+def resident_memory_bytes():
+    """Memória residente atual (RSS), ou o pico quando /proc não existe."""
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError, IndexError):
+        return peak_memory_bytes()
+
+
+def peak_memory_bytes():
+    if resource is None:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # ru_maxrss é em KiB no Linux e em bytes no macOS
+    return peak if os.uname().sysname == "Darwin" else peak * 1024
+
+
+def mark(phase):
+    """Registra quando a etapa terminou (só a primeira vez conta)."""
+    if phase not in phases:
+        phases[phase] = process_uptime()
+    return phases[phase]
+
+
+def summary():
+    steps = ", ".join(f"{phase} {seconds:.2f}s" for phase, seconds in phases.items())
+    rss = resident_memory_bytes()
+    memory = f"{rss / 2 ** 20:.1f} MiB" if rss is not None else "-"
+    return f"Inicialização: {steps}; memória residente {memory}"
@@ -0,0 +1,50 @@
+from build_index import BuildIndex, canonical_build, suggest_builds
+from catalog import BuildCatalog
+
+NAMES = ["Maça 1H", "Maça 1H Clapper", "Martelo 1H", "Clava Pesada", "Segadeira", "Golem"]
+
+
+def make_catalog(names=NAMES, version="v1"):
+    return BuildCatalog({name.lower(): {} for name in names}, names, {}, version)
+
+
+def test_prefix_of_the_whole_name_ranks_before_word_matches():
+    index = BuildIndex(["Maça 1H Clapper", "Clava Pesada", "Clap"])
+    # "Clava Pesada" e "Clap" começam com "cla"; "Maça 1H Clapper" só numa palavra do meio
+    assert index.complete("cla") == ["Clava Pesada", "Clap", "Maça 1H Clapper"]
+    assert index.complete("clap") == ["Clap", "Maça 1H Clapper"]
+
+
+def test_ties_keep_the_catalog_order():
+    index = BuildIndex(NAMES)
+    assert index.complete("ma") == ["Maça 1H", "Maça 1H Clapper", "Martelo 1H"]
+    assert index.complete("1h") == ["Maça 1H", "Maça 1H Clapper", "Martelo 1H"]
+
+
+def test_query_is_normalized():
+    index = BuildIndex(NAMES)
+    assert index.complete("  MACA 1 h ") == ["Maça 1H", "Maça 1H Clapper"]
+    assert index.complete("pesada") == ["Clava Pesada"]
+
+
+def test_limit_and_empty_query():
+    names = [f"Build {i:02d}" for i in range(40)]
+    index = BuildIndex(names)
+    assert index.complete("build") == names[:25]
+    assert index.complete("build", limit=3) == names[:3]
+    assert index.complete("") == names[:25]
+    assert index.complete("zzz") == []
+
+
+def test_suggest_falls_back_to_the_closest_build():
+    catalog = make_catalog()
+    assert suggest_builds(catalog, "seg") == ["Segadeira"]
+    assert suggest_builds(catalog, "segadera") == ["Segadeira"]  # Sem prefixo: a mais parecida
+    assert suggest_builds(catalog, "xyzw") == []
+
+
+def test_canonical_build_uses_the_catalog_spelling():
+    catalog = make_catalog(version="v2")
+    assert canonical_build(catalog, "maca 1h claper") == "Maça 1H Clapper"
+    assert canonical_build(catalog, "golem core") == "Golem"
+    assert canonical_build(catalog, "cajado qualquer") is None
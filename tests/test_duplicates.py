@@ -0,0 +1,61 @@
+import random
+
+from duplicates import BKTree, DuplicateIndex, hamming
+
+
+def test_hamming():
+    assert hamming(0b1011, 0b0001) == 2
+    assert hamming(0, 0) == 0
+
+
+def test_bk_tree_search_matches_brute_force():
+    rng = random.Random(7)
+    values = [rng.getrandbits(64) for _ in range(500)]
+    # Variações próximas de alguns hashes, como uma print recomprimida
+    values += [value ^ (1 << rng.randrange(64)) for value in values[:50]]
+    tree = BKTree()
+    for index, value in enumerate(values):
+        tree.add(value, index)
+    assert tree.size == len(values)
+
+    for query in values[:60] + [rng.getrandbits(64) for _ in range(20)]:
+        for max_distance in (0, 3, 6):
+            expected = sorted(
+                (hamming(query, value), index) for index, value in enumerate(values)
+                if hamming(query, value) <= max_distance
+            )
+            assert sorted(tree.search(query, max_distance)) == expected
+
+
+def test_bk_tree_keeps_identical_hashes_on_one_node():
+    tree = BKTree()
+    tree.add(42, "a")
+    tree.add(42, "b")
+    assert sorted(tree.search(42, 0)) == [(0, "a"), (0, "b")]
+
+
+def make_index(tmp_path, claims):
+    index = DuplicateIndex(str(tmp_path / "phash.jsonl"))
+    index._load()
+    for message_id, value in claims:
+        index._insert(message_id, 9, f"{value:016x}.png", value)
+        index._append({"m": message_id, "c": 9, "o": f"{value:016x}.png", "h": value})
+    return index
+
+
+def test_duplicates_of_finds_close_hashes(tmp_path):
+    index = make_index(tmp_path, [(1, 0b1111), (2, 0b1110), (3, 0xFFFF_0000_FFFF)])
+    assert index.duplicates_of(2) == [(9, 1, 1)]
+    assert index.duplicates_of(3) == []
+    assert index.duplicates_of(99) == []
+
+
+def test_discard_removes_claim_and_persists(tmp_path):
+    index = make_index(tmp_path, [(1, 0b1111), (2, 0b1110)])
+    index.discard(1)
+    assert index.duplicates_of(2) == []
+    assert index.size() == 1
+
+    reloaded = DuplicateIndex(index.path)
+    assert reloaded.duplicates_of(2) == []
+    assert reloaded.size() == 1
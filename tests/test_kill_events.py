@@ -0,0 +1,118 @@
+import asyncio
+import datetime
+import types
+
+from kill_events import PAGE_SIZE, KillFeed, parse_timestamp
+
+GUILD_ID = "guilda"
+NOW = datetime.datetime.now(datetime.timezone.utc).replace(microsecond=0)
+
+
+def event(event_id, victim, moment, guild_id=GUILD_ID):
+    return {
+        "EventId": event_id,
+        "TimeStamp": moment.strftime("%Y-%m-%dT%H:%M:%S.%f") + "0Z",
+        "Killer": {"Name": "Inimigo", "GuildId": "outra"},
+        "Victim": {"Name": victim, "GuildId": guild_id},
+    }
+
+
+class FakeApi:
+    """Feed paginado do mais recente para o mais antigo, como a API."""
+
+    def __init__(self):
+        self.events = []  # Do mais antigo para o mais recente
+        self.offsets = []
+
+    def add(self, count, start_id, guild_every=2):
+        for i in range(count):
+            event_id = start_id + i
+            guild_id = GUILD_ID if i % guild_every == 0 else "outra"
+            moment = NOW - datetime.timedelta(minutes=count - i)
+            self.events.append(event(event_id, f"Jogador{i % 5}", moment, guild_id))
+
+    async def fetch_page(self, offset):
+        self.offsets.append(offset)
+        newest_first = self.events[::-1]
+        return newest_first[offset:offset + PAGE_SIZE]
+
+
+def make_feed(tmp_path, api):
+    feed = KillFeed("http://api", GUILD_ID, path=str(tmp_path / "kill_events.json"))
+    feed._fetch_page = api.fetch_page
+    return feed
+
+
+def test_parse_timestamp_truncates_to_microseconds():
+    moment = parse_timestamp("2024-05-01T21:03:12.1234567Z")
+    assert moment == datetime.datetime(2024, 5, 1, 21, 3, 12, 123456, tzinfo=datetime.timezone.utc)
+
+
+def test_poll_pages_until_the_cursor(tmp_path):
+    api = FakeApi()
+    api.add(120, 1000)
+    feed = make_feed(tmp_path, api)
+
+    assert asyncio.run(feed.poll()) == 60
+    assert api.offsets == [0, PAGE_SIZE, 2 * PAGE_SIZE]
+    assert feed.cursor == 1119
+
+    api.offsets.clear()
+    api.add(4, 2000)
+    assert asyncio.run(feed.poll()) == 2
+    assert api.offsets == [0]  # A primeira página já chega ao cursor
+    assert feed.cursor == 2003
+    assert len(feed) == 62
+
+
+def test_repeated_events_are_counted_once(tmp_path):
+    api = FakeApi()
+    api.add(10, 1000)
+    feed = make_feed(tmp_path, api)
+    asyncio.run(feed.poll())
+    feed.cursor = None  # Força reler tudo
+    assert asyncio.run(feed.poll()) == 0
+    assert len(feed) == 5
+
+
+def test_old_deaths_are_pruned(tmp_path):
+    api = FakeApi()
+    api.events.append(event(1, "Antigo", NOW - datetime.timedelta(days=30)))
+    api.events.append(event(2, "Recente", NOW - datetime.timedelta(minutes=1)))
+    feed = make_feed(tmp_path, api)
+    asyncio.run(feed.poll())
+    assert len(feed) == 1
+
+
+def entry(message_id, nick, moment):
+    return types.SimpleNamespace(message_id=message_id, nick=nick, created_at=moment)
+
+
+def test_match_uses_each_death_once(tmp_path):
+    api = FakeApi()
+    death_at = NOW - datetime.timedelta(minutes=30)
+    api.events.append(event(1, "Ana", death_at))
+    api.events.append(event(2, "Bia", death_at - datetime.timedelta(hours=5)))
+    feed = make_feed(tmp_path, api)
+    asyncio.run(feed.poll())
+
+    matches = feed.match([
+        entry(11, "ana", death_at + datetime.timedelta(minutes=2)),
+        entry(12, "ANA", death_at + datetime.timedelta(minutes=3)),
+        entry(13, "Bia", death_at),  # Morte fora da janela
+        entry(14, "Caio", death_at),
+    ])
+    assert matches == {11: 1}
+
+
+def test_state_survives_a_restart(tmp_path):
+    api = FakeApi()
+    api.add(6, 1000)
+    feed = make_feed(tmp_path, api)
+    asyncio.run(feed.poll())
+    feed.save()
+
+    restored = make_feed(tmp_path, api)
+    moment = NOW - datetime.timedelta(minutes=6)
+    assert restored.match([entry(1, "Jogador0", moment)]) == {1: 1000}
+    assert restored.cursor == feed.cursor
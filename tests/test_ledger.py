@@ -0,0 +1,191 @@
+import datetime
+import json
+
+from approvals import APPROVED, DENIED
+from benchmarks.fakes import FakeAttachment, FakeAuthor, FakeMessage, FakeReaction, make_snowflake
+from ledger import RESCAN_WINDOW, RegearLedger, snowflake_time
+
+CHANNEL_ID = 1000
+CREATED_AT = datetime.datetime(2026, 1, 1, 21, 0, tzinfo=datetime.timezone.utc)
+
+
+def death(message_id, content="golem", reactions=(), nick="Ana"):
+    return FakeMessage(
+        message_id, CREATED_AT, FakeAuthor(nick), content, [FakeAttachment(f"https://cdn/{message_id}.png")],
+        [FakeReaction(emoji, count) for emoji, count in reactions],
+    )
+
+
+def chat(message_id, content="gg"):
+    return FakeMessage(message_id, CREATED_AT, FakeAuthor("Bia"), content)
+
+
+def make_ledger(*message_ids):
+    ledger = RegearLedger(CHANNEL_ID, seeded=True)
+    for message_id in message_ids:
+        ledger.add_message(death(message_id))
+    return ledger
+
+
+def status(ledger, message_id):
+    approval = ledger.approvals.get(message_id)
+    return approval.status if approval else None
+
+
+def test_reactions_set_and_clear_approval():
+    ledger = make_ledger(1)
+    ledger.add_reaction(1, "✅", 7, "Officer")
+    assert status(ledger, 1) == APPROVED
+    assert ledger.approvals[1].user_name == "Officer"
+    ledger.add_reaction(1, "❌", 8, "Other")
+    assert status(ledger, 1) == DENIED
+    ledger.remove_reaction(1, "❌", 8)
+    assert status(ledger, 1) == APPROVED
+    ledger.remove_reaction(1, "✅", 7)
+    assert status(ledger, 1) is None
+
+
+def test_reaction_of_approver_removed_while_others_remain():
+    ledger = make_ledger(1)
+    ledger.add_reaction(1, "✅", 7, "Officer")
+    ledger.add_reaction(1, "✅", 8, "Other")
+    ledger.remove_reaction(1, "✅", 8)
+    assert status(ledger, 1) == APPROVED
+    assert ledger.approvals[1].user_id is None
+
+
+def test_reactions_before_the_death_exists_are_kept():
+    ledger = RegearLedger(CHANNEL_ID, seeded=True)
+    ledger.add_reaction(1, "✅", 7, "Officer")
+    ledger.add_message(death(1))
+    assert ledger.entries[1].reactions == {"✅": 1}
+    assert status(ledger, 1) == APPROVED
+
+
+def test_review_survives_reaction_add_and_remove():
+    ledger = make_ledger(1, 2)
+    assert ledger.review([1, 2], DENIED, 5, "Officer") == 2
+    ledger.add_reaction(1, "✅", 6, "Member")
+    assert status(ledger, 1) == APPROVED
+    ledger.remove_reaction(1, "✅", 6)
+    assert status(ledger, 1) == DENIED
+    ledger.add_reaction(2, "✅", 6, "Member")
+    ledger.clear_reactions(2)
+    assert status(ledger, 2) == DENIED
+
+
+def test_review_counts_only_changes_and_skips_unknown_messages():
+    ledger = make_ledger(1, 2)
+    ledger.add_reaction(1, "✅", 7)
+    assert ledger.review([1, 2, 99], APPROVED, 5, "Officer") == 1
+    assert 99 not in ledger.approvals
+
+
+def test_removed_message_drops_approval_and_review():
+    ledger = make_ledger(1)
+    ledger.review([1], APPROVED, 5, "Officer")
+    ledger.remove_message(1)
+    assert 1 not in ledger.entries
+    assert 1 not in ledger.approvals
+    assert 1 not in ledger.reviews
+
+
+def test_edit_removing_attachment_drops_death():
+    ledger = make_ledger(1)
+    ledger.update_message(1, {"content": "golem", "attachments": []})
+    assert 1 not in ledger.entries
+
+
+def test_snapshot_round_trip():
+    ledger = make_ledger(1, 2)
+    ledger.add_reaction(1, "✅", 7, "Officer", at=CREATED_AT)
+    ledger.review([2], DENIED, 5, "Officer", at=CREATED_AT)
+    snapshot = json.loads(json.dumps(ledger.to_snapshot()))
+
+    loaded = RegearLedger.from_snapshot(snapshot)
+    assert sorted(loaded.entries) == [1, 2]
+    assert loaded.entries[1].reactions == {"✅": 1}
+    assert loaded.last_message_id == 2
+    assert (loaded.approvals[1].status, loaded.approvals[1].user_name) == (APPROVED, "Officer")
+    assert loaded.reviews[2].status == DENIED
+    assert loaded.stale and not loaded.seeded
+
+
+def test_checkpoint_only_advances_while_seeded():
+    ledger = RegearLedger(CHANNEL_ID)
+    ledger.add_message(death(5))
+    assert ledger.last_message_id is None
+    ledger.seed([death(3), chat(4), death(5)])
+    assert ledger.last_message_id == 5
+    assert sorted(ledger.entries) == [3, 5]
+    ledger.add_message(chat(6))
+    assert ledger.last_message_id == 6
+    ledger.mark_stale()
+    ledger.add_message(death(7))
+    assert ledger.last_message_id == 6
+
+
+def test_thread_starter_message_is_ignored():
+    ledger = RegearLedger(CHANNEL_ID, seeded=True)
+    ledger.add_message(death(CHANNEL_ID))
+    assert not ledger.entries
+
+
+def test_rescan_applies_offline_changes():
+    ledger = make_ledger(1, 2, 3)
+    ledger.review([1], APPROVED, 5, "Officer")
+    loaded = RegearLedger.from_snapshot(ledger.to_snapshot())
+
+    loaded.begin_rescan()
+    loaded.add_message(death(5, content="live"))  # Chegou pelo gateway durante o rescan
+    loaded.rescan([death(1, content="edited"), death(2, reactions=[("❌", 1)]), death(4)])
+
+    assert sorted(loaded.entries) == [1, 2, 4, 5]
+    assert loaded.entries[1].content == "edited"
+    assert status(loaded, 1) == APPROVED  # Reações iguais: a revisão salva continua valendo
+    assert status(loaded, 2) == DENIED
+    assert loaded.entries[5].content == "live"
+    assert loaded.seeded and not loaded.stale
+
+
+def test_entries_before_is_ordered_and_filtered():
+    ledger = make_ledger(3, 1, 2)
+    later = death(4)
+    later.created_at = CREATED_AT + datetime.timedelta(hours=1)
+    ledger.add_message(later)
+    assert [entry.message_id for entry in ledger.entries_before(CREATED_AT + datetime.timedelta(minutes=1))] == [1, 2, 3]
+
+
+def test_history_start_resumes_from_the_checkpoint():
+    ledger = RegearLedger(CHANNEL_ID)
+    assert ledger.history_start() is None  # Primeira leitura: o tópico inteiro
+    checkpoint = make_snowflake(CREATED_AT, 0)
+    ledger.seed([death(checkpoint)])
+    ledger.seeded = False
+    assert ledger.history_start() == checkpoint
+
+    ledger.mark_stale()
+    start = ledger.history_start()
+    assert snowflake_time(start) == CREATED_AT - RESCAN_WINDOW
+
+
+def test_history_start_reads_everything_without_a_window(monkeypatch):
+    monkeypatch.setattr("ledger.RESCAN_WINDOW", datetime.timedelta(0))
+    ledger = make_ledger(make_snowflake(CREATED_AT, 0))
+    ledger.mark_stale()
+    assert ledger.history_start() is None
+
+
+def test_rescan_window_keeps_older_deaths():
+    old_id = make_snowflake(CREATED_AT - RESCAN_WINDOW * 2, 0)
+    recent_id = make_snowflake(CREATED_AT - datetime.timedelta(hours=1), 0)
+    deleted_id = make_snowflake(CREATED_AT, 0)
+    ledger = RegearLedger.from_snapshot(make_ledger(old_id, recent_id, deleted_id).to_snapshot())
+    after = ledger.history_start()
+    assert old_id < after < recent_id
+
+    ledger.begin_rescan()
+    ledger.rescan([death(recent_id, content="edited")], after)
+    assert sorted(ledger.entries) == [old_id, recent_id]
+    assert ledger.entries[recent_id].content == "edited"
+    assert ledger.history_start() == deleted_id
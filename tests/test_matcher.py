@@ -0,0 +1,52 @@
+import pytest
+
+from matcher import BuildMatcher, normalize, numeric_tokens
+
+NAMES = ["golem", "martelo 1h", "maça 1h", "maça 1h clapper", "maça pesada", "segadeira"]
+
+
+@pytest.fixture
+def matcher():
+    return BuildMatcher(NAMES)
+
+
+def test_normalize_strips_accents_core_and_hand_spacing():
+    assert normalize("  Maça 1H  CORE") == "maca 1h"
+    assert normalize("martelo 1 h") == "martelo 1h"
+
+
+def test_numeric_tokens():
+    assert numeric_tokens("cajado t8 3") == ("3", "t8")
+    assert numeric_tokens("golem") == ()
+
+
+@pytest.mark.parametrize("text, build", [
+    ("Golem", "golem"),
+    ("golen", "golem"),
+    ("Maça 1H Claper", "maça 1h clapper"),
+    ("maca 1 h", "maça 1h"),
+    ("segadera core", "segadeira"),
+])
+def test_typos_match(matcher, text, build):
+    assert matcher.match(text).build == build
+
+
+@pytest.mark.parametrize("text", [
+    "Martelo 2H",
+    "Maça 2H",
+    "maça 1h t8",
+    "maça pesada .3",
+    "golem 2",
+])
+def test_different_hand_tier_or_enchant_does_not_match(matcher, text):
+    assert matcher.match(text).build is None
+
+
+def test_exact_match_has_full_confidence(matcher):
+    assert matcher.match("MARTELO 1H").confidence == 1.0
+
+
+def test_memoized_queries_count_hits(matcher):
+    matcher.match("golen")
+    matcher.match("golen")
+    assert (matcher.hits, matcher.misses) == (1, 1)
@@ -0,0 +1,153 @@
+import asyncio
+import types
+
+import discord
+import pytest
+
+import member_ops
+from member_ops import MemberOpQueue
+
+
+class FakeRole:
+    def __init__(self, role_id):
+        self.id = role_id
+
+    def is_default(self):
+        return False
+
+
+class FakeMember:
+    def __init__(self, member_id, roles=(), nick=None, failures=()):
+        self.id = member_id
+        self.roles = [FakeRole(role_id) for role_id in roles]
+        self.nick = nick
+        # Status HTTP devolvidos pelas próximas chamadas ao edit
+        self.failures = list(failures)
+        self.edits = []
+        self.kicked = None
+
+    async def edit(self, reason=None, **kwargs):
+        if self.failures:
+            raise http_error(self.failures.pop(0))
+        self.edits.append(kwargs)
+        if "roles" in kwargs:
+            self.roles = [FakeRole(role.id) for role in kwargs["roles"]]
+        if "nick" in kwargs:
+            self.nick = kwargs["nick"]
+
+    async def kick(self, reason=None):
+        self.kicked = reason
+
+
+class FakeGuild:
+    def __init__(self, *members):
+        self.members = {member.id: member for member in members}
+
+    def get_member(self, member_id):
+        return self.members.get(member_id)
+
+
+def http_error(status):
+    response = types.SimpleNamespace(status=status, reason="erro", headers={})
+    return discord.HTTPException(response, "erro")
+
+
+def role_ids(member):
+    return sorted(role.id for role in member.roles)
+
+
+async def drain(queue, *futures):
+    try:
+        return await asyncio.wait_for(asyncio.gather(*futures, return_exceptions=True), 5)
+    finally:
+        queue._worker_task.cancel()
+
+
+@pytest.fixture(autouse=True)
+def no_backoff(monkeypatch):
+    monkeypatch.setattr(member_ops, "BACKOFF_BASE", 0.0)
+
+
+def test_requests_for_the_same_member_become_one_edit(tmp_path):
+    member = FakeMember(1, roles=[10])
+
+    async def scenario():
+        queue = MemberOpQueue(str(tmp_path / "ops.log"))
+        queue.start(lambda: FakeGuild(member))
+        first = queue.submit(1, add_roles=[20])
+        second = queue.submit(1, remove_roles=[10], nick="Ana")
+        assert queue.pending_count() == 1
+        return queue, await drain(queue, first, second)
+
+    queue, results = asyncio.run(scenario())
+    assert results == [None, None]
+    assert len(member.edits) == 1
+    assert role_ids(member) == [20]
+    assert member.nick == "Ana"
+    assert queue.applied == 1
+
+
+def test_clear_roles_drops_earlier_additions(tmp_path):
+    member = FakeMember(1, roles=[10, 11])
+
+    async def scenario():
+        queue = MemberOpQueue(str(tmp_path / "ops.log"))
+        queue.start(lambda: FakeGuild(member))
+        futures = [queue.submit(1, add_roles=[20]), queue.submit(1, clear_roles=True)]
+        await drain(queue, *futures)
+
+    asyncio.run(scenario())
+    assert role_ids(member) == []
+
+
+def test_server_errors_are_retried(tmp_path):
+    member = FakeMember(1, failures=[500, 429])
+
+    async def scenario():
+        queue = MemberOpQueue(str(tmp_path / "ops.log"))
+        queue.start(lambda: FakeGuild(member))
+        return queue, await drain(queue, queue.submit(1, nick="Ana"))
+
+    queue, results = asyncio.run(scenario())
+    assert results == [None]
+    assert member.nick == "Ana"
+    assert (queue.retries, queue.applied, queue.failed) == (2, 1, 0)
+
+
+def test_client_errors_fail_the_future(tmp_path):
+    member = FakeMember(1, failures=[403])
+
+    async def scenario():
+        queue = MemberOpQueue(str(tmp_path / "ops.log"))
+        queue.start(lambda: FakeGuild(member))
+        return queue, await drain(queue, queue.submit(1, nick="Ana"))
+
+    queue, (result,) = asyncio.run(scenario())
+    assert isinstance(result, discord.HTTPException)
+    assert (queue.retries, queue.failed) == (0, 1)
+
+
+def test_pending_requests_resume_from_the_journal(tmp_path):
+    path = str(tmp_path / "ops.log")
+    member = FakeMember(1)
+
+    async def interrupted():
+        # Nunca iniciada: o pedido só fica no journal, como num crash antes de aplicar
+        MemberOpQueue(path).submit(1, add_roles=[20], nick="Ana")
+
+    async def resumed():
+        queue = MemberOpQueue(path)
+        queue.start(lambda: FakeGuild(member))
+        assert queue.pending_count() == 1
+        for _ in range(100):
+            if queue.applied:
+                break
+            await asyncio.sleep(0.01)
+        queue._worker_task.cancel()
+        return queue
+
+    asyncio.run(interrupted())
+    queue = asyncio.run(resumed())
+    assert queue.applied == 1
+    assert role_ids(member) == [20]
+    assert MemberOpQueue(path)._load_journal() == []
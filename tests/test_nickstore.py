@@ -0,0 +1,62 @@
+from nickstore import NickStore
+
+
+def read_log(path):
+    with open(path, encoding="utf-8") as f:
+        return f.read().splitlines()
+
+
+def test_nicks_are_unique_ignoring_case(tmp_path):
+    store = NickStore(str(tmp_path / "registrados.txt"))
+    assert store.register(1, "Ana")
+    assert store.owner_of("ANA") == 1
+    assert not store.register(2, "ana")
+    assert store.register(1, "aNa")  # O próprio dono pode mudar a grafia
+    assert store.nick_of(1) == "aNa"
+
+
+def test_changing_nick_frees_the_old_one(tmp_path):
+    store = NickStore(str(tmp_path / "registrados.txt"))
+    store.register(1, "Ana")
+    store.register(1, "Bia")
+    assert store.owner_of("Ana") is None
+    assert store.register(2, "ana")
+    assert sorted(store.items()) == [(1, "Bia"), (2, "ana")]
+
+
+def test_unregister_writes_a_tombstone(tmp_path):
+    path = str(tmp_path / "registrados.txt")
+    store = NickStore(path)
+    store.register(1, "Ana")
+    assert store.unregister(1) == "Ana"
+    assert store.unregister(1) is None
+    assert store.owner_of("Ana") is None
+    assert read_log(path) == ["1;Ana", "1;"]
+
+
+def test_state_is_rebuilt_by_replaying_the_log(tmp_path):
+    path = tmp_path / "registrados.txt"
+    path.write_text("1;Ana\n2;Bia\nlixo\n1;\n3;Caio\n2;Bianca\n\n", encoding="utf-8")
+    store = NickStore(str(path))
+    assert sorted(store.items()) == [(2, "Bianca"), (3, "Caio")]
+    assert store.owner_of("bia") is None
+    assert store.owner_of("BIANCA") == 2
+    assert len(store) == 2
+
+
+def test_log_with_many_obsolete_lines_is_compacted(tmp_path):
+    path = tmp_path / "registrados.txt"
+    path.write_text("".join(f"1;Nick{i}\n" for i in range(150)) + "2;Bia\n", encoding="utf-8")
+    store = NickStore(str(path))
+    assert sorted(store.items()) == [(1, "Nick149"), (2, "Bia")]
+    assert sorted(read_log(path)) == ["1;Nick149", "2;Bia"]
+
+    store.register(3, "Caio")
+    assert sorted(NickStore(str(path)).items()) == [(1, "Nick149"), (2, "Bia"), (3, "Caio")]
+
+
+def test_short_log_is_not_rewritten(tmp_path):
+    path = tmp_path / "registrados.txt"
+    path.write_text("1;Ana\n1;Bia\n", encoding="utf-8")
+    assert len(NickStore(str(path))) == 1
+    assert read_log(path) == ["1;Ana", "1;Bia"]
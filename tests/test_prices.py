@@ -0,0 +1,43 @@
+import json
+
+from prices import ITEM_IDS_PATH, PriceTable
+from report import PRICED_PURCHASE_HEADERS, iter_purchase_rows
+
+TABLE = PriceTable({"Elmo/Soldado": 100, "Peito/Soldado": 300, "Soldado": 50, "Bota/Caçador": 70}, 0, "v1")
+
+
+def test_category_key_wins_over_the_bare_name():
+    assert TABLE.get("Soldado", "Elmo") == 100
+    assert TABLE.get("Soldado", "Peito") == 300
+
+
+def test_bare_name_is_the_fallback():
+    assert TABLE.get("Soldado", "Bota") == 50
+    assert TABLE.get("Soldado") == 50
+    assert TABLE.get("Caçador") is None  # Só existe com a categoria
+    assert TABLE.get("Sem Preco", "Arma") is None
+
+
+def test_purchase_rows_total_only_priced_items():
+    rows = list(iter_purchase_rows({
+        "Elmo": {"Soldado": 2},
+        "Peito": {"Soldado": 1, "Sem Preco": 4},
+        "Arma": {},
+    }, TABLE))
+    assert rows == [
+        PRICED_PURCHASE_HEADERS,
+        ["Elmo", "Soldado", 2, 100, 200],
+        ["Elmo", "Total", 2, "", 200],
+        ["Peito", "Soldado", 1, 300, 300],
+        ["Peito", "Sem Preco", 4, "-", "-"],
+        ["Peito", "Total", 5, "", 300],
+        ["Total", "", 7, "", 500],
+    ]
+
+
+def test_shapeshifter_staffs_map_to_their_own_items():
+    with open(ITEM_IDS_PATH, encoding="utf-8") as f:
+        item_ids = json.load(f)
+    assert item_ids["Arma/Cajado Enraizado"] == "T8_2H_SHAPESHIFTER_SET2"
+    assert item_ids["Arma/Cajado Runico"] == "T8_2H_SHAPESHIFTER_KEEPER"
+    assert len(set(item_ids.values())) == len(item_ids)
@@ -0,0 +1,49 @@
+from reconcile import MAX_REMOVAL_RATIO, DiscordMember, is_suspicious, plan_roster_changes
+from roster import Roster
+
+ROSTER = Roster([{"Name": "Ana"}, {"Name": "BiaDark"}, {"Name": "Caio"}], fetched_at=0)
+
+
+def plan(members, registered=None):
+    return plan_roster_changes(members, ROSTER, registered or {})
+
+
+def test_member_who_left_the_guild_loses_the_role():
+    result = plan([DiscordMember(1, "Ana", "Ana", True), DiscordMember(2, "Saiu", "Saiu", True)])
+    assert result.remove_role == [2]
+    assert (result.add_role, result.rename) == ([], {})
+
+
+def test_registered_nick_is_used_over_the_display_name():
+    # O nome no Discord não está na guilda, mas o nick registrado está
+    result = plan([DiscordMember(1, "Outro Nome", "Outro Nome", True)], {1: "ana"})
+    assert result.remove_role == []
+    assert result.rename == {1: "Ana"}
+
+
+def test_registered_member_who_came_back_gets_the_role():
+    result = plan([DiscordMember(1, "Caio", "Caio", False), DiscordMember(2, "Ana", None, False)], {1: "Caio", 2: "Ana"})
+    assert result.add_role == [1, 2]
+    assert result.rename == {2: "Ana"}
+
+
+def test_unregistered_member_without_the_role_is_left_alone():
+    assert len(plan([DiscordMember(1, "Ana", None, False)])) == 0
+
+
+def test_rename_follows_the_official_spelling():
+    result = plan([DiscordMember(1, "biadark", "biadark", True), DiscordMember(2, "Caio", "Caio", True)],
+                  {1: "BIADARK", 2: "Caio"})
+    assert result.rename == {1: "BiaDark"}
+    assert result.summary() == "0 cargos a remover, 0 cargos a devolver, 1 nicks a corrigir"
+
+
+def test_removing_more_than_half_of_the_role_holders_is_suspicious():
+    members = [DiscordMember(i, f"Saiu{i}", None, True) for i in range(6)] + [DiscordMember(9, "Ana", None, True)]
+    result = plan(members)
+    assert len(result.remove_role) == 6
+    assert is_suspicious(result, role_holders=7)
+
+    result.remove_role = result.remove_role[:int(7 * MAX_REMOVAL_RATIO)]
+    assert not is_suspicious(result, role_holders=7)
+    assert not is_suspicious(plan([]), role_holders=0)
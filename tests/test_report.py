@@ -0,0 +1,61 @@
+import csv
+import gzip
+import io
+import zipfile
+
+import pytest
+
+from report import REPORT_HEADERS, close_files, iter_report_rows, write_report_files
+
+PURCHASE_HEADERS = ["Categoria", "Item", "Quantidade"]
+TRICKY_ROWS = [
+    ["2026-03-09 21:00:00", 'Ana;"Dark"', "golem; core", "https://cdn/1.png", "V"],
+    ["2026-03-09 21:05:00", "Bia\nNova", 'segadeira "x"', "https://cdn/2.png", "X"],
+]
+
+
+def sources():
+    return [
+        ("relatorio.csv", lambda: iter_report_rows(TRICKY_ROWS, REPORT_HEADERS[:5])),
+        ("relatorio_compra.csv", lambda: iter_report_rows([["Arma", "Lamento;Eterno", 1]], PURCHASE_HEADERS)),
+    ]
+
+
+def read_csv(data):
+    return list(csv.reader(io.StringIO(data.decode("utf-8"), newline=""), delimiter=";"))
+
+
+def read_files(files, compression):
+    contents = {}
+    for filename, fileobj in files:
+        data = fileobj.read()
+        if compression == "zip":
+            with zipfile.ZipFile(io.BytesIO(data)) as archive:
+                for name in archive.namelist():
+                    contents[name] = read_csv(archive.read(name))
+        elif compression == "gzip":
+            contents[filename.removesuffix(".gz")] = read_csv(gzip.decompress(data))
+        else:
+            contents[filename] = read_csv(data)
+    return contents
+
+
+@pytest.mark.parametrize("compression", ["none", "gzip", "zip"])
+def test_separators_and_quotes_survive_a_round_trip(compression):
+    files = write_report_files(sources(), compression)
+    try:
+        contents = read_files(files, compression)
+    finally:
+        close_files(files)
+    assert contents["relatorio.csv"] == [REPORT_HEADERS[:5]] + TRICKY_ROWS
+    assert contents["relatorio_compra.csv"] == [PURCHASE_HEADERS, ["Arma", "Lamento;Eterno", "1"]]
+
+
+def test_file_names_per_compression():
+    for compression, names in [("none", ["relatorio.csv", "relatorio_compra.csv"]),
+                               ("gzip", ["relatorio.csv.gz", "relatorio_compra.csv.gz"]),
+                               ("zip", ["relatorio.zip"]),
+                               ("auto", ["relatorio.csv", "relatorio_compra.csv"])]:
+        files = write_report_files(sources(), compression)
+        assert [filename for filename, _ in files] == names
+        close_files(files)
@@ -0,0 +1,96 @@
+import datetime
+
+import pytest
+
+from report import REPORT_HEADERS
+from warehouse import Warehouse, deaths_from_report, month_start
+
+CLOSED_AT = datetime.datetime(2026, 3, 10, 2, 0, tzinfo=datetime.timezone.utc)
+
+
+class Prices:
+    """Mesma consulta da PriceTable (prices importa o aiohttp)."""
+
+    def __init__(self, prices):
+        self.prices = prices
+
+    def get(self, item, category=None):
+        return self.prices.get(f"{category}/{item}", self.prices.get(item))
+
+
+@pytest.fixture
+def warehouse(tmp_path):
+    warehouse = Warehouse(str(tmp_path / "regears.db"))
+    yield warehouse
+    warehouse.close()
+
+
+def death(day, nick, build):
+    return (f"{day} 21:00:00", nick, build, build or "sei la", "V", 0)
+
+
+def totals(warehouse):
+    return warehouse._query("SELECT (SELECT SUM(deaths) FROM build_month), (SELECT SUM(deaths) FROM player_month)")[0]
+
+
+def test_month_start():
+    assert month_start(1, datetime.date(2026, 3, 15)) == "2026-03"
+    assert month_start(3, datetime.date(2026, 2, 1)) == "2025-12"
+    assert month_start(12, datetime.date(2026, 12, 31)) == "2026-01"
+
+
+def test_deaths_from_report():
+    row = ["2026-03-09 21:00:00", "Ana", "golem x", "link", "V", "Sim", "golem", "0.95", "Bob", "-", "-",
+           "https://albiononline.com/killboard/kill/1"]
+    unmatched = ["2026-03-09 21:05:00", "Caio", "sei la", "link", "-", "Não", "-", "0.00", "-", "-", "-", "Não"]
+    assert len(row) == len(REPORT_HEADERS)
+    assert deaths_from_report([row, unmatched]) == [
+        ("2026-03-09 21:00:00", "Ana", "golem", "golem x", "V", 1),
+        ("2026-03-09 21:05:00", "Caio", None, "sei la", "-", 0),
+    ]
+
+
+def test_triggers_keep_monthly_totals(warehouse, monkeypatch):
+    monkeypatch.setattr("warehouse.month_start", lambda months: "2026-02" if months == 2 else "2026-03")
+    warehouse.record_regear(1, "REGEAR 1", CLOSED_AT, [
+        death("2026-02-20", "Ana", "golem"),
+        death("2026-03-09", "Ana", "golem"),
+        death("2026-03-09", "ana", "segadeira"),
+        death("2026-03-09", "Bia", None),
+    ], {})
+    assert warehouse.build_deaths("golem", 2) == [("2026-02", 1), ("2026-03", 1)]
+    assert warehouse.top_players(1) == [("Ana", 2), ("Bia", 1)]  # Nick sem diferenciar maiúsculas
+    assert sorted(warehouse.top_builds(1)) == [("golem", 1), ("segadeira", 1)]
+    assert totals(warehouse) == (4, 4)
+
+
+def test_closing_again_replaces_rows_and_totals(warehouse, monkeypatch):
+    monkeypatch.setattr("warehouse.month_start", lambda months: "2026-03")
+    warehouse.record_regear(1, "REGEAR 1", CLOSED_AT, [death("2026-03-09", "Ana", "golem")] * 3, {})
+    warehouse.record_regear(2, "REGEAR 2", CLOSED_AT, [death("2026-03-09", "Bia", "golem")], {})
+    warehouse.record_regear(1, "REGEAR 1", CLOSED_AT, [death("2026-03-09", "Ana", "segadeira")], {})
+
+    assert totals(warehouse) == (2, 2)
+    assert sorted(warehouse.top_builds(1)) == [("golem", 1), ("segadeira", 1)]
+    assert sorted(warehouse.top_players(1)) == [("Ana", 1), ("Bia", 1)]
+    assert [row[3] for row in warehouse.recent_regears()] == [1, 1]
+    assert warehouse.recorded == 3
+
+
+def test_purchase_cost_uses_category_prices(warehouse):
+    prices = Prices({"Elmo/Soldado": 100, "Peito/Soldado": 300})
+    warehouse.record_regear(1, "REGEAR 1", CLOSED_AT, [], {
+        "Elmo": {"Soldado": 2}, "Peito": {"Soldado": 1}, "Arma": {"Sem Preco": 4},
+    }, prices)
+    assert warehouse.recent_regears() == [(1, "REGEAR 1", "2026-03-09 23:00:00", 0, 500)]
+
+
+def test_player_deaths(warehouse, monkeypatch):
+    monkeypatch.setattr("warehouse.month_start", lambda months: "2026-03")
+    warehouse.record_regear(1, "REGEAR 1", CLOSED_AT, [
+        death("2026-03-01", "Ana", "golem"), death("2026-03-05", "Ana", None), death("2026-02-01", "Ana", "golem"),
+    ], {})
+    assert warehouse.player_deaths("ANA", 1) == [
+        ("2026-03-05 21:00:00", "sei la", "V", "REGEAR 1"),
+        ("2026-03-01 21:00:00", "golem", "V", "REGEAR 1"),
+    ]
@@ -0,0 +1,199 @@
+"""Histórico dos regears fechados, num SQLite local (regears.db).
+
+Cada /criar_relatorio concluído grava as mortes e o relatório de compra do
+tópico. Fechar o mesmo regear de novo substitui as linhas anteriores. As
+mortes têm índices por data, nick e build. Triggers mantêm os totais
+mensais por build e por jogador a cada linha inserida ou apagada, então as
+consultas do histórico leem poucas linhas mesmo com um ano de regears.
+
+As funções são síncronas (sqlite3); o bot as chama com asyncio.to_thread.
+"""
+
+import datetime
+import os
+import sqlite3
+import threading
+
+from report import REPORT_HEADERS
+
+WAREHOUSE_PATH = os.environ.get("WAREHOUSE_PATH", "regears.db")
+# Horários gravados no mesmo fuso das planilhas do relatório (UTC-3)
+REPORT_OFFSET = datetime.timedelta(hours=3)
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS regears (
+    regear_id INTEGER PRIMARY KEY,
+    name TEXT NOT NULL,
+    closed_at TEXT NOT NULL,
+    deaths INTEGER NOT NULL,
+    total_cost INTEGER
+);
+CREATE TABLE IF NOT EXISTS deaths (
+    regear_id INTEGER NOT NULL,
+    died_at TEXT NOT NULL,
+    nick TEXT NOT NULL,
+    build TEXT,
+    content TEXT NOT NULL,
+    status TEXT NOT NULL,
+    confirmed INTEGER NOT NULL
+);
+CREATE INDEX IF NOT EXISTS deaths_regear ON deaths (regear_id);
+CREATE INDEX IF NOT EXISTS deaths_died_at ON deaths (died_at);
+CREATE INDEX IF NOT EXISTS deaths_nick ON deaths (nick COLLATE NOCASE, died_at);
+CREATE INDEX IF NOT EXISTS deaths_build ON deaths (build, died_at);
+CREATE TABLE IF NOT EXISTS purchases (
+    regear_id INTEGER NOT NULL,
+    category TEXT NOT NULL,
+    item TEXT NOT NULL,
+    quantity INTEGER NOT NULL,
+    unit_price INTEGER,
+    PRIMARY KEY (regear_id, category, item)
+);
+CREATE TABLE IF NOT EXISTS build_month (
+    month TEXT NOT NULL,
+    build TEXT NOT NULL,
+    deaths INTEGER NOT NULL,
+    PRIMARY KEY (month, build)
+);
+CREATE TABLE IF NOT EXISTS player_month (
+    month TEXT NOT NULL,
+    nick TEXT NOT NULL COLLATE NOCASE,
+    deaths INTEGER NOT NULL,
+    PRIMARY KEY (month, nick)
+);
+CREATE TRIGGER IF NOT EXISTS deaths_insert AFTER INSERT ON deaths BEGIN
+    INSERT INTO build_month (month, build, deaths) VALUES (substr(NEW.died_at, 1, 7), coalesce(NEW.build, '-'), 1)
+        ON CONFLICT (month, build) DO UPDATE SET deaths = deaths + 1;
+    INSERT INTO player_month (month, nick, deaths) VALUES (substr(NEW.died_at, 1, 7), NEW.nick, 1)
+        ON CONFLICT (month, nick) DO UPDATE SET deaths = deaths + 1;
+END;
+CREATE TRIGGER IF NOT EXISTS deaths_delete AFTER DELETE ON deaths BEGIN
+    UPDATE build_month SET deaths = deaths - 1
+        WHERE month = substr(OLD.died_at, 1, 7) AND build = coalesce(OLD.build, '-');
+    UPDATE player_month SET deaths = deaths - 1
+        WHERE month = substr(OLD.died_at, 1, 7) AND nick = OLD.nick;
+END;
+"""
+
+
+def local_time(moment):
+    return (moment - REPORT_OFFSET).strftime('%Y-%m-%d %H:%M:%S')
+
+
+def month_start(months_back, today=None):
+    """'YYYY-MM' do primeiro mês de uma janela de `months_back` meses que termina no mês atual."""
+    today = today or (datetime.datetime.now(datetime.timezone.utc) - REPORT_OFFSET).date()
+    index = today.year * 12 + today.month - 1 - (months_back - 1)
+    return f"{index // 12:04d}-{index % 12 + 1:02d}"
+
+
+def deaths_from_report(report_data, headers=REPORT_HEADERS):
+    """Linhas do relatório -> tuplas de morte do record_regear."""
+    column = {name: index for index, name in enumerate(headers)}
+    deaths = []
+    for row in report_data:
+        build = row[column["Build_Catalogo"]]
+        deaths.append((
+            row[column["Data"]], row[column["Nick"]], None if build == "-" else build, row[column["Build"]],
+            row[column["Emoji"]], int(row[column["Morte_Confirmada"]].startswith("http")),
+        ))
+    return deaths
+
+
+class Warehouse:
+    def __init__(self, path=WAREHOUSE_PATH):
+        self.path = path
+        self.recorded = 0
+        self._connection = None
+        # Uma conexão compartilhada pelas threads do to_thread, uma operação por vez
+        self._lock = threading.Lock()
+
+    def _connect(self):
+        if self._connection is None:
+            connection = sqlite3.connect(self.path, check_same_thread=False)
+            connection.execute("PRAGMA journal_mode=WAL")
+            connection.executescript(SCHEMA)
+            self._connection = connection
+        return self._connection
+
+    def record_regear(self, regear_id, name, closed_at, deaths, purchase_data, prices=None):
+        """Grava (ou substitui) um regear fechado.
+
+        closed_at é um datetime em UTC. deaths: [(died_at 'YYYY-MM-DD HH:MM:SS',
+        nick, build do catálogo ou None, texto, status, confirmada)], ver
+        deaths_from_report.
+        """
+        total_cost = None
+        purchases = []
+        for category, items in purchase_data.items():
+            for item, quantity in items.items():
+                unit_price = prices.get(item, category) if prices is not None else None
+                if unit_price is not None:
+                    total_cost = (total_cost or 0) + unit_price * quantity
+                purchases.append((regear_id, category, item, quantity, unit_price))
+
+        with self._lock:
+            connection = self._connect()
+            with connection:
+                connection.execute("DELETE FROM deaths WHERE regear_id = ?", (regear_id,))
+                connection.execute("DELETE FROM purchases WHERE regear_id = ?", (regear_id,))
+                connection.execute(
+                    "INSERT OR REPLACE INTO regears (regear_id, name, closed_at, deaths, total_cost) VALUES (?, ?, ?, ?, ?)",
+                    (regear_id, name, local_time(closed_at), len(deaths), total_cost),
+                )
+                connection.executemany(
+                    "INSERT INTO deaths (regear_id, died_at, nick, build, content, status, confirmed)"
+                    " VALUES (?, ?, ?, ?, ?, ?, ?)",
+                    [(regear_id, *death) for death in deaths],
+                )
+                connection.executemany(
+                    "INSERT INTO purchases (regear_id, category, item, quantity, unit_price) VALUES (?, ?, ?, ?, ?)",
+                    purchases,
+                )
+        self.recorded += 1
+
+    def _query(self, sql, params=()):
+        with self._lock:
+            return self._connect().execute(sql, params).fetchall()
+
+    def build_deaths(self, build, months=1):
+        """[(mês, mortes)] da build nos últimos `months` meses."""
+        return self._query(
+            "SELECT month, deaths FROM build_month WHERE build = ? AND month >= ? AND deaths > 0 ORDER BY month",
+            (build, month_start(months)),
+        )
+
+    def top_builds(self, months=1, limit=10):
+        return self._query(
+            "SELECT build, SUM(deaths) AS total FROM build_month WHERE month >= ? AND build != '-'"
+            " GROUP BY build HAVING total > 0 ORDER BY total DESC LIMIT ?",
+            (month_start(months), limit),
+        )
+
+    def top_players(self, months=1, limit=10):
+        return self._query(
+            "SELECT nick, SUM(deaths) AS total FROM player_month WHERE month >= ?"
+            " GROUP BY nick HAVING total > 0 ORDER BY total DESC LIMIT ?",
+            (month_start(months), limit),
+        )
+
+    def player_deaths(self, nick, months=1, limit=20):
+        """Mortes mais recentes do jogador: [(data, build, status, regear)]."""
+        return self._query(
+            "SELECT d.died_at, coalesce(d.build, d.content), d.status, r.name FROM deaths d"
+            " JOIN regears r USING (regear_id)"
+            " WHERE d.nick = ? COLLATE NOCASE AND d.died_at >= ? ORDER BY d.died_at DESC LIMIT ?",
+            (nick, month_start(months), limit),
+        )
+
+    def recent_regears(self, limit=10):
+        return self._query(
+            "SELECT regear_id, name, closed_at, deaths, total_cost FROM regears ORDER BY closed_at DESC LIMIT ?",
+            (limit,),
+        )
+
+    def close(self):
+        with self._lock:
+            if self._connection is not None:
+                self._connection.close()
+                self._connection = None